@@ -0,0 +1,51 @@
+"""
+Cart decoding cost for large carts: json + dict mapping (the previous fetch_cart path)
+vs. the schema-driven decoder that maps bytes straight into CartItem/StoreResult.
+
+Run from the client directory:
+    python -m benchmarks.bench_cart_decoding [items] [rounds]
+"""
+import json
+import sys
+import time
+
+from data.api import decoders
+
+
+def make_payload(items: int) -> bytes:
+    rows = []
+    for i in range(items):
+        row = {"quantity": i % 7 + 1, "price": round(3.5 + (i % 50) * 0.9, 2)}
+        # Mix the aliases the backends actually send
+        if i % 2:
+            row["item_name"] = f"Product {i}"
+            row["id"] = i
+        else:
+            row["name"] = f"מוצר {i}"
+        rows.append(row)
+    cart = {"store_name": "Mega", "address": "Herzl 1", "total_price": 1234.5, "items": rows}
+    return json.dumps({"cart": cart}).encode("utf-8")
+
+
+def bench(label: str, fn, content: bytes, rounds: int):
+    fn(content)  # warm-up
+    start = time.perf_counter()
+    for _ in range(rounds):
+        result = fn(content)
+    per_call = (time.perf_counter() - start) / rounds * 1000
+    print(f"{label:<32} {per_call:8.2f} ms/cart  ({len(result.items)} items)")
+
+
+def main(items: int = 10_000, rounds: int = 20):
+    content = make_payload(items)
+    print(f"{items} items, {len(content) / 1024:.0f} KiB payload, {rounds} rounds")
+    bench("json.loads + dict mapping", lambda c: decoders.map_cart_payload(json.loads(c)), content, rounds)
+    if decoders.MSGSPEC_AVAILABLE:
+        bench("msgspec typed decode", decoders.decode_cart_payload, content, rounds)
+    else:
+        print("msgspec not installed: decode_cart_payload uses the dict mapping (pip install msgspec)")
+
+
+if __name__ == "__main__":
+    args = [int(a) for a in sys.argv[1:3]]
+    main(*args)
@@ -0,0 +1,69 @@
+"""
+CartView.render_cart cost for 10/100/1000-item carts: rebuilding every card (what an
+unkeyed render does) vs. the keyed reconciliation after a single +/- click.
+
+Run from the client directory:
+    python -m benchmarks.bench_cart_render [rounds]
+"""
+import os
+import sys
+import time
+from dataclasses import replace
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PySide6.QtCore import QCoreApplication, QEvent
+from PySide6.QtWidgets import QApplication
+
+from models.types import CartItem
+from ui.components.cart_mfe.view import CartView
+
+
+def make_items(count: int) -> list:
+    return [CartItem(str(i), f"Product {i}", i % 5 + 1, round(3.5 + (i % 50) * 0.9, 2)) for i in range(count)]
+
+
+def settle(app):
+    # Include layout and the deferred deletion of replaced cards in the measurement
+    QCoreApplication.sendPostedEvents(None, QEvent.DeferredDelete)
+    app.processEvents()
+
+
+def bench(app, label: str, view: CartView, carts: list, rounds: int):
+    """Renders *carts* one after the other, *rounds* times; reports the time per sequence"""
+    for items in carts:  # warm-up: first paint and polish of new cards is not part of an update
+        view.render_cart("Mega", "Herzl 1", items, 0.0)
+        settle(app)
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for items in carts:
+            view.render_cart("Mega", "Herzl 1", items, 0.0)
+            settle(app)
+    per_round = (time.perf_counter() - start) / rounds * 1000
+    print(f"  {label:<36} {per_round:9.2f} ms")
+
+
+def main(rounds: int = 5):
+    app = QApplication.instance() or QApplication(sys.argv)
+    for count in (10, 100, 1000):
+        items = make_items(count)
+        clicked = [replace(item) for item in items]
+        clicked[count // 2].quantity += 1
+        print(f"{count} items, {rounds} rounds")
+
+        view = CartView()
+        view.resize(360, 800)
+        view.show()
+        # An empty render first forces every card to be deleted and recreated
+        bench(app, "rebuild all cards (clear + render)", view, [[], items], rounds)
+        # Click and undo: two renders, each changing one quantity
+        bench(app, "keyed, +1 then -1 (two renders)", view, [clicked, items], rounds)
+        bench(app, "keyed, unchanged cart", view, [items], rounds)
+        view.close()
+        view.deleteLater()
+        settle(app)
+
+
+if __name__ == "__main__":
+    args = [int(a) for a in sys.argv[1:2]]
+    main(*args)
@@ -0,0 +1,77 @@
+"""
+Per-call latency of bare requests.* calls vs. the pooled BackendTransport.
+
+Run from the client directory:
+    python -m benchmarks.bench_http_pool [calls]
+"""
+import statistics
+import sys
+import time
+
+import requests
+
+from data.api.http_transport import BackendTransport
+from mock.stub_backend import StubBackendServer
+
+
+def _summary(label: str, samples: list) -> str:
+    ms = sorted(s * 1000 for s in samples)
+    p95 = ms[int(len(ms) * 0.95) - 1]
+    return f"{label:<28} mean={statistics.mean(ms):7.3f}ms  p50={statistics.median(ms):7.3f}ms  p95={p95:7.3f}ms"
+
+
+def bench_bare(url: str, calls: int) -> list:
+    samples = []
+    for _ in range(calls):
+        start = time.perf_counter()
+        requests.get(url, timeout=10).json()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def bench_pooled(transport: BackendTransport, path: str, calls: int) -> list:
+    samples = []
+    for _ in range(calls):
+        start = time.perf_counter()
+        transport.request("GET", path, timeout=10).json()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def bench_click_pipeline(transport: BackendTransport, cart_id: str, clicks: int) -> list:
+    """One +/- click = PATCH -> optimize -> GET, all on the same pool"""
+    samples = []
+    for i in range(clicks):
+        start = time.perf_counter()
+        transport.request("PATCH", f"/cart/{cart_id}/items", timeout=10,
+                          json={"item_names": ["Milk"], "quantities": [i % 5 + 1]}, retry=True)
+        transport.request("POST", f"/cart/{cart_id}/optimize", timeout=10, retry=True)
+        transport.request("GET", f"/cart/{cart_id}", timeout=10).json()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def main(calls: int = 500):
+    server = StubBackendServer().start()
+    try:
+        cart_id = server.create_cart()
+        path = f"/cart/{cart_id}"
+        transport = BackendTransport(server.url)
+
+        # Warm-up both paths so imports / first connection are not measured
+        bench_bare(server.url + path, 10)
+        bench_pooled(transport, path, 10)
+
+        print(f"GET {path} x {calls}")
+        print(_summary("bare requests.get", bench_bare(server.url + path, calls)))
+        print(_summary("pooled BackendTransport", bench_pooled(transport, path, calls)))
+
+        print(f"\nPATCH -> optimize -> GET x {calls // 5}")
+        print(_summary("pooled click pipeline", bench_click_pipeline(transport, cart_id, calls // 5)))
+        transport.close()
+    finally:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 500)
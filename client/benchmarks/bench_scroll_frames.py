@@ -0,0 +1,79 @@
+"""
+Frame times while scrolling the cart: per-card QGraphicsDropShadowEffects (the previous
+cards) vs. shadows and icons painted from the shared render cache, and the painted list.
+
+A frame is one synchronous render of the list's viewport after a scroll step.
+Run from the client directory:
+    python -m benchmarks.bench_scroll_frames [items] [steps]
+"""
+import os
+import statistics
+import sys
+import time
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PySide6.QtGui import QColor
+from PySide6.QtWidgets import QApplication, QGraphicsDropShadowEffect
+
+from models.types import CartItem
+from ui.components.cart_mfe.view import CartView, CartItemCard
+from ui.components.cart_mfe.list_view import VirtualCartView
+
+
+def make_items(count: int) -> list:
+    return [CartItem(str(i), f"Product {i}", i % 5 + 1, round(3.5 + (i % 50) * 0.9, 2)) for i in range(count)]
+
+
+def add_blur_effects(view: CartView):
+    # What every card carried before the render cache
+    for card in view.items_container.findChildren(CartItemCard):
+        shadow = QGraphicsDropShadowEffect(card)
+        shadow.setBlurRadius(16)
+        shadow.setOffset(0, 2)
+        shadow.setColor(QColor(0, 0, 0, 60))
+        card.setGraphicsEffect(shadow)
+
+
+def frames(app, view, scroll_area, steps: int) -> list:
+    bar = scroll_area.verticalScrollBar()
+    viewport = scroll_area.viewport()
+    viewport.grab()  # warm-up: fills the caches
+    times = []
+    for step in range(steps):
+        bar.setValue(int(bar.maximum() * step / max(1, steps - 1)))
+        app.processEvents()
+        start = time.perf_counter()
+        viewport.grab()
+        times.append((time.perf_counter() - start) * 1000)
+    return times
+
+
+def report(label: str, times: list):
+    p95 = sorted(times)[int(len(times) * 0.95) - 1]
+    print(f"  {label:<34} mean {statistics.mean(times):6.2f} ms   p95 {p95:6.2f} ms")
+
+
+def main(items: int = 200, steps: int = 60):
+    app = QApplication.instance() or QApplication(sys.argv)
+    cart = make_items(items)
+    print(f"{items} items, {steps} scroll steps, 360x800 window")
+
+    for label, build in (("per-card blur effects (before)", "effects"),
+                         ("cached shadows and icons", "cached"),
+                         ("painted list (VirtualCartView)", "virtual")):
+        view = VirtualCartView() if build == "virtual" else CartView()
+        view.resize(360, 800)
+        view.show()
+        view.render_cart("Mega", "Herzl 1", cart, 0.0)
+        if build == "effects":
+            add_blur_effects(view)
+        app.processEvents()
+        area = view.list_view if build == "virtual" else view.scroll_area
+        report(label, frames(app, view, area, steps))
+        view.close()
+
+
+if __name__ == "__main__":
+    args = [int(a) for a in sys.argv[1:3]]
+    main(*args)
@@ -1,18 +1,34 @@
+import time
+
 from PySide6.QtWidgets import (
     QMainWindow, QWidget, QHBoxLayout, QVBoxLayout, 
-    QPushButton, QFrame, QLabel, QScrollArea, QSizePolicy
+    QPushButton, QFrame, QLabel, QScrollArea, QSizePolicy, QApplication
 )
-from PySide6.QtCore import QThreadPool, Qt, QPropertyAnimation, QEasingCurve
+from PySide6.QtCore import Qt, QPropertyAnimation, QEasingCurve
 from ui.components.cart_mfe.presenter import CartPresenter
+from ui.components.cart_mfe.list_view import VirtualCartView
 from ui.components.chat_mfe.presenter import ChatPresenter
 from ui.components.user_mfe.presenter import UserPresenter
 from data.repositories.supermarket_repo import SupermarketRepository
+from data.repositories.mutation_journal import MutationJournal
 from ui.dialogs.ambiguity_dialog import AmbiguityDialog
-from core.workers import AIWorker, CartOptimizeWorker, CartUpdateWorker
+from core.workers import AIReply, AIWorker, CartOptimizeWorker, LoginWorker, SessionInitWorker
+from core.task_executor import default_executor
+from core.request_generations import RequestGenerations
+from core.prompt_queue import PromptQueue
+from core.cart_mutation_coalescer import CartMutationCoalescer
 from core.user_manager import UserManager
+from core.backend_status import BackendStatusMonitor
+from core.cart_push_channel import CartPushChannel
 from models.types import ClarificationRequest, StoreResult
+from telemetry.metrics import REGISTRY
+from telemetry.tracing import TRACER
+from core.repaint_tracker import RepaintTracker
+from telemetry.log import get_logger
 from ui.styles.theme import get_all_stylesheets, CURRENT_THEME
 
+log = get_logger("controller")
+
 
 class AppController(QMainWindow):
     
@@ -20,7 +36,7 @@ class AppController(QMainWindow):
     # 1. Managing the overall UI layout and state (sidebar, chat, cart)
     # 2. Handling user interactions and routing them to the appropriate presenters and repositories
     # 3. Coordinating background workers for API calls to keep the UI responsive
-    def __init__(self):
+    def __init__(self, repo=None, virtual_cart: bool = False, executor=None):
         super().__init__()
         self.setWindowTitle("Supermarket AI Agent")
         self.resize(1400, 800)
@@ -30,14 +46,33 @@ class AppController(QMainWindow):
         self.setStyleSheet(get_all_stylesheets())
         
         # --- Data & State Layer ---
-        self.repo = SupermarketRepository()
+        # Any object with the SupermarketRepository API. The default journals cart changes to disk
+        # so edits made while the DB is down are not lost.
+        self.repo = repo or SupermarketRepository(journal=MutationJournal())
         self.user_manager = UserManager() 
+        # All background work (prompts, cart updates, optimize) runs on one bounded, prioritized pool,
+        # or as coroutines on the asyncio loop with the async transport (see main.build_executor)
+        self.executor = executor or default_executor()
+        QApplication.instance().aboutToQuit.connect(self.executor.shutdown)
         
         # --- Presentation Layer ---
         self.chat_presenter = ChatPresenter() # No repo needed for chat presenter since it only displays text and sends user input back to the controller
-        self.cart_presenter = CartPresenter(self.repo) # We pass the repo to the cart presenter because it needs to trigger updates when quantities change
-        
-        # Connect cart item change signal to update worker
+        # virtual_cart: paint the items as rows of one list instead of one widget per item (large carts)
+        self.cart_presenter = CartPresenter(self.repo, view=VirtualCartView() if virtual_cart else None) # We pass the repo to the cart presenter because it needs to trigger updates when quantities change
+        
+        # Connect cart item change signal to the coalescer (batches fast +/- clicks into one PATCH)
+        # Requests returning the cart are generation-tagged so a stale response never overwrites newer state
+        self.cart_generations = RequestGenerations()
+        self.cart_coalescer = CartMutationCoalescer(self.repo, executor=self.executor,
+                                                    generations=self.cart_generations)
+        self.cart_coalescer.cart_synced.connect(self.on_cart_updated)
+        self.cart_coalescer.mutations_deferred.connect(self.on_cart_changes_deferred)
+        
+        # Traces of user actions end once the affected panel has repainted
+        self.chat_repaint = RepaintTracker(self.chat_presenter.get_widget())
+        self.cart_repaint = RepaintTracker(self.cart_presenter.get_widget())
+        self.cart_coalescer.traces_synced.connect(self.cart_repaint.end_on_next_paint)
+        self.offline_notice_shown = False
         self.cart_presenter.cart_item_changed.connect(self.handle_cart_update)
         
         # Connect optimize button signal
@@ -46,6 +81,24 @@ class AppController(QMainWindow):
         # --- Wiring / Logic Flow ---
         self.chat_presenter.user_input_submitted.connect(self.handle_user_message)
         
+        # Prompts go through one ordered queue: the user can keep typing while the agent works
+        self.prompt_queue = PromptQueue(self.executor, self._make_prompt_task, depth=self.PROMPT_PIPELINE_DEPTH)
+        self.prompt_queue.prompt_active.connect(lambda prompt: self.chat_presenter.display_agent_response("Thinking..."))
+        self.prompt_queue.chunk_received.connect(self.chat_presenter.display_agent_chunk)
+        self.prompt_queue.reply_ready.connect(self.on_prompt_reply)
+        self.prompt_queue.backlog_changed.connect(self.chat_presenter.set_backlog)
+        self.prompt_queue.prompts_cancelled.connect(self.on_prompts_cancelled)
+        self.chat_presenter.cancel_queued_requested.connect(self.prompt_queue.cancel_queued)
+        
+        # --- Backend health (circuit breaker state changes) ---
+        self.backend_status = BackendStatusMonitor(self.repo.backend_health())
+        self.backend_status.state_changed.connect(self.on_backend_state_changed)
+        
+        # --- Cart push channel (server-sent deltas; fetch-after-action is the fallback) ---
+        self.cart_push = CartPushChannel()
+        self.cart_push.snapshot_received.connect(self.cart_presenter.update_data)
+        self.cart_push.delta_received.connect(self.cart_presenter.apply_delta)
+        
         # --- Sidebar state ---
         self.sidebar_expanded = True
         self.sidebar_animation = None
@@ -54,15 +107,52 @@ class AppController(QMainWindow):
         self.setup_ui()
         
         # --- Bootstrap ---
-        self.user_manager.login_guest()
-        
-        print("Initializing session with Agent...")
-        is_connected = self.repo.initialize_session()
-        
+        # Login and session init run concurrently in the background; the window paints right away
+        self.startup_pending = set()
+        self.start_session()
+
+    def start_session(self):
+        """Starts login + session init; prompts wait in the (paused) prompt queue until both have finished"""
+        log.info("Initializing session with agent")
+        self.chat_presenter.set_connecting(True)
+        self.startup_pending = {"login", "session"}
+        self.prompt_queue.pause()
+
+        login = self.executor.submit(LoginWorker(self.user_manager))
+        login.finished.connect(self.on_login_finished)
+        login.failed.connect(lambda error: self._startup_step_done("login"))
+
+        session = self.executor.submit(SessionInitWorker(self.repo))
+        session.finished.connect(self.on_session_initialized)
+        session.failed.connect(lambda error: self.on_session_initialized(False))
+
+    @property
+    def is_ready(self) -> bool:
+        return not self.startup_pending
+
+    def on_login_finished(self, profile):
+        self.user_manager.set_current_user(profile)
+        self._startup_step_done("login")
+
+    def on_session_initialized(self, is_connected: bool):
         if not is_connected:
             self.chat_presenter.display_agent_response("⚠️ Warning: Could not connect to the Agent server. Is it running on port 8001?")
         else:
             self.chat_presenter.display_agent_response("Hi! I'm your AI shopping assistant. What would you like to add to your cart today?")
+            self.subscribe_to_cart_updates()
+            if self.repo.has_pending_mutations():
+                # Changes journaled before the last exit / crash
+                self.cart_coalescer.replay_pending()
+        self._startup_step_done("session")
+
+    def _startup_step_done(self, step: str):
+        self.startup_pending.discard(step)
+        if not self.is_ready:
+            return
+        self.chat_presenter.set_connecting(False)
+        if self.prompt_queue.waiting():
+            log.info("Sending prompts typed while connecting", count=self.prompt_queue.waiting())
+        self.prompt_queue.resume()
 
     # ============= UI Construction Methods =================================================================
     def setup_ui(self):
@@ -276,69 +366,168 @@ class AppController(QMainWindow):
         self.sidebar_animation.start()
 
     # ============= Interaction Handlers ====================================================================
+    BACKEND_LABELS = {"agent": "AI agent", "db": "cart server"}
+    # Prompts with the agent at once; 1 keeps the conversation strictly turn by turn
+    PROMPT_PIPELINE_DEPTH = 1
+
+    def on_backend_state_changed(self, backend: str, state: str):
+        """Degrade gracefully while a backend's circuit is open instead of letting calls hang"""
+        label = self.BACKEND_LABELS.get(backend, backend)
+        if state == "open":
+            log.warning("Circuit opened", backend=backend)
+            if backend == "db":
+                self.cart_presenter.set_backend_available(False)
+            self.chat_presenter.display_agent_response(
+                f"⚠️ The {label} is not responding. I'll keep retrying in the background."
+            )
+        elif state == "closed":
+            log.info("Circuit closed", backend=backend)
+            if backend == "db":
+                self.cart_presenter.set_backend_available(True)
+                self.cart_coalescer.replay_pending()
+            self.chat_presenter.display_agent_response(f"✅ Connection to the {label} restored.")
+
+    def subscribe_to_cart_updates(self):
+        """Opens the push channel for the current cart (no-op for repositories without one)"""
+        url = self.repo.cart_push_url()
+        if url:
+            self.cart_push.subscribe(url)
+
     def handle_cart_update(self, item_id, new_quantity):
-        print(f"Controller: Syncing item {item_id} to quantity {new_quantity}")
-        
-        # Create and start the background worker
-        self.update_worker = CartUpdateWorker(self.repo, item_id, new_quantity)
-        
-        # Connect the worker's finished signal to an inline update function
-        self.update_worker.finished.connect(self.on_cart_updated)
-        self.update_worker.start()
-        
+        log.debug("Syncing item quantity", item_id=item_id, quantity=new_quantity)
+        
+        # The coalescer keeps the last quantity per item and flushes one PATCH -> optimize -> fetch
+        # per window; the result comes back through on_cart_updated
+        trace = TRACER.start_trace("user.change_quantity", item=item_id, quantity=new_quantity)
+        self.cart_coalescer.queue(item_id, new_quantity, trace)
+        
+    def on_cart_changes_deferred(self, cart_id: str):
+        """The DB could not be reached; the change is journaled and the cart panel keeps it"""
+        if not self.offline_notice_shown:
+            self.offline_notice_shown = True
+            self.chat_presenter.display_agent_response(
+                "💾 The cart server is unreachable. Your cart changes are saved and will be sent once it's back."
+            )
+
     def on_cart_updated(self, fresh_cart: StoreResult):
         # This gets called automatically when the background DB update finishes
-        print("Controller: Cart updated from DB. Refreshing UI...")
+        log.debug("Cart updated from DB", items=len(fresh_cart.items))
+        self.offline_notice_shown = False
         self.cart_presenter.update_data(fresh_cart)
         
     def handle_user_message(self, text):
         """The central function managing the process"""
         
-        print(f"[1] USER INPUT: '{text}' received by Controller.")
-        
-        # 1. Update chat that agent received the request
-        self.chat_presenter.display_agent_response("Thinking...")
-        
-        # 2. Start background worker to call the AI API
-        current_user_id = self.user_manager.current_user.id
-        
-        # Create worker
-        self.worker = AIWorker(self.repo, text, current_user_id)
-        
-        # Connect signals
-        self.worker.finished.connect(self.on_ai_response)
-        self.worker.start()
+        log.debug("User prompt received", chars=len(text))
+        
+        if not self.is_ready and not self.prompt_queue.waiting():
+            # Still connecting: the prompt (already shown in the chat) waits in the paused queue
+            self.chat_presenter.display_agent_response("⏳ Still connecting, I'll answer as soon as I'm ready.")
+        
+        # Queue the prompt; it keeps its own start time and trace. "Thinking..." and the streamed
+        # reply appear when its turn comes (prompt_active / chunk_received)
+        trace = TRACER.start_trace("user.send_prompt", chars=len(text))
+        prompt = self.prompt_queue.submit(text, trace=trace, started=time.perf_counter())
+        if prompt is None:
+            # The input stops sending while the queue is full, so this is a race with a second click
+            trace.set("rejected", "queue_full")
+            trace.end()
+            self.chat_presenter.display_agent_response("⚠️ Too many messages are waiting. Please wait for a reply first.")
 
-    def on_ai_response(self, result):
-        """Handling the response from the server/mock"""
-        
-        if isinstance(result, str):
+    def _make_prompt_task(self, prompt) -> AIWorker:
+        """Called when a queued prompt is sent to the agent"""
+        current_user = self.user_manager.current_user
+        current_user_id = current_user.id if current_user else None
+        # The agent may change the cart; unless the push channel already delivers those changes,
+        # the worker fetches it after the reply (off the GUI thread). The channel is a GUI-thread
+        # QObject, so its state is read here and handed over as a plain bool.
+        prompt.generation = self.cart_generations.issue()
+        return AIWorker(self.repo, prompt.text, current_user_id, refresh_cart=not self.cart_push.available)
 
-            print(f"[5] CONTROLLER: Agent text received: '{result}'")
-            self.chat_presenter.display_agent_response(result)
-            
-            print(f"[6] CONTROLLER: Triggering Cart Refresh (fetch_cart)...")
-            cart_data = self.repo.fetch_cart()
-            
-            print(f"[8] CONTROLLER: Updating UI with {len(cart_data.items)} items.")
-            self.cart_presenter.update_data(cart_data)
+    def on_prompt_reply(self, prompt, reply: AIReply):
+        """Replies arrive here in the order the prompts were sent"""
+        if reply is None:
+            # The task failed or was cancelled after it was sent
+            self.chat_presenter.display_agent_response("⚠️ Something went wrong while answering. Please try again.")
+            prompt.trace.end()
+            return
+        self.on_ai_response(reply, prompt.trace, prompt.started, prompt.generation)
+
+    def on_prompts_cancelled(self, prompts: list):
+        for prompt in prompts:
+            prompt.trace.set("cancelled", True)
+            prompt.trace.end()
+        self.chat_presenter.display_agent_response(f"🚫 Cancelled {len(prompts)} queued message(s).")
+
+    def on_ai_response(self, reply: AIReply, trace=None, started=None, generation: int = None):
+        """Handling the response from the server/mock (reply text and refreshed cart arrive together)"""
+        if started is not None:
+            REGISTRY.observe("pipeline_step_duration_seconds", time.perf_counter() - started, step="ai_reply")
+        
+        with TRACER.activate(trace):
+            repainted = self._show_ai_response(reply, generation)
+        if trace is not None:
+            repainted.end_on_next_paint([trace])
+
+    def _show_ai_response(self, reply: AIReply, generation: int = None) -> RepaintTracker:
+        """Renders the reply (and the cart when one came with it); returns the tracker of the last panel updated"""
+        if isinstance(reply.result, ClarificationRequest):
+            # The agent call failed, possibly after some chunks: close what streamed and say so
+            log.debug("Agent reply failed", question=reply.result.question)
+            self.chat_presenter.display_agent_response(
+                f"⚠️ The reply was interrupted ({reply.result.question}). Please try again.")
+            return self.chat_repaint
+        if not isinstance(reply.result, str):
+            return self.chat_repaint
+        
+        log.debug("Agent text received", chars=len(reply.result))
+        self.chat_presenter.complete_agent_stream(reply.result)
+        
+        if reply.cart is None:
+            # Changes the agent made have already been pushed as deltas
+            return self.chat_repaint
+        if generation is not None and not self.cart_generations.accept(generation, "ai_refresh"):
+            # A +/- click or optimize issued meanwhile will render a newer cart
+            return self.chat_repaint
+        
+        self.cart_presenter.update_data(reply.cart)
+        return self.cart_repaint
 
     def handle_optimize_request(self):
         """Called when user clicks 'Find Cheapest Store'"""
-        print("Controller: Optimizing cart requested...")
+        log.debug("Cart optimization requested")
         self.chat_presenter.display_agent_response("🔄 Checking prices across all stores...")
         
         # Start the background worker
-        self.opt_worker = CartOptimizeWorker(self.repo)
-        
-        # Reuse on_cart_updated because it does exactly what we need (updates the UI)
-        self.opt_worker.finished.connect(self.on_optimize_finished)
-        self.opt_worker.start()
+        trace = TRACER.start_trace("user.optimize")
+        generation = self.cart_generations.issue(mutation=True)
+        future = self.executor.submit(CartOptimizeWorker(self.repo), trace_parent=trace)
+        # A +/- click after this supersedes it (the click's update re-optimizes anyway)
+        self.cart_generations.track(generation, future)
+        future.finished.connect(lambda result: self.on_optimize_finished(result, trace, generation))
+        future.cancelled.connect(lambda: self._end_superseded(trace))
+        future.failed.connect(lambda error: self.on_optimize_failed(error, trace))
+
+    def on_optimize_failed(self, error, trace=None):
+        # The worker raised instead of returning a result; the trace still has to end to be exported
+        if trace is not None:
+            trace.set("error", repr(error))
+            trace.end()
+        self.chat_presenter.display_agent_response("⚠️ Optimization failed. Please try again.")
     
-    def on_optimize_finished(self, result: StoreResult):
-        
-        print(f"Controller: Optimization done. Store: {result.store_name}, Total: {result.total_price}")
-        self.cart_presenter.update_data(result)
+    def _end_superseded(self, trace):
+        trace.set("superseded", True)
+        trace.end()
+
+    def on_optimize_finished(self, result: StoreResult, trace=None, generation: int = None):
+        if generation is not None and not self.cart_generations.accept(generation, "optimize"):
+            self._end_superseded(trace)
+            return
+        log.info("Optimization done", store=result.store_name, total=result.total_price)
+        with TRACER.activate(trace):
+            self.cart_presenter.update_data(result)
+        if trace is not None:
+            self.cart_repaint.end_on_next_paint([trace])
     
         if result.total_price > 0:
             msg = f"✅ Done! The best deal is at **{result.store_name}** for **{result.total_price:.2f} NIS**."
@@ -0,0 +1,177 @@
+import asyncio
+import threading
+from collections import deque
+
+from PySide6.QtCore import QObject, Qt, Signal
+from core.task_executor import Priority, TaskContext, TaskFuture, default_executor
+from telemetry.metrics import REGISTRY
+from telemetry.tracing import TRACER
+from telemetry.log import get_logger
+
+log = get_logger("executor")
+
+
+class AsyncCall(QObject):
+    """Handle for a coroutine submitted to the AsyncBridge. Signals are delivered on the GUI thread."""
+
+    finished = Signal(object)
+    failed = Signal(object)
+
+    def __init__(self, future):
+        super().__init__()
+        self.future = future
+
+    def cancel(self):
+        self.future.cancel()
+
+
+class AsyncBridge(QObject):
+    """
+    Hosts a single asyncio event loop on one background thread and bridges it to Qt.
+
+    Any number of coroutines can be in flight at once without a thread per request;
+    their results come back to the GUI thread through queued Qt signals.
+    """
+
+    # Internal wake-up from the loop thread to the thread that owns the bridge. Completed
+    # futures travel through a deque; only an argument-less signal crosses threads.
+    _wake = Signal()
+
+    def __init__(self):
+        super().__init__()
+        self.loop = asyncio.new_event_loop()
+        self._pending = set()  # Keeps AsyncCall wrappers alive until their result is delivered
+        self._completed = deque()
+        # Always queued: a future that is already done calls back on the submitting thread,
+        # and results must not be emitted before the caller has connected to the handle.
+        self._wake.connect(self._drain_completed, Qt.QueuedConnection)
+        self._thread = threading.Thread(target=self._run_loop, name="asyncio-bridge", daemon=True)
+        self._thread.start()
+
+    def _run_loop(self):
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+
+    def submit(self, coro) -> AsyncCall:
+        """Schedules *coro* on the loop and returns a handle whose signals fire on the GUI thread"""
+        future = asyncio.run_coroutine_threadsafe(coro, self.loop)
+        call = AsyncCall(future)
+        self._pending.add(call)
+        future.add_done_callback(lambda f: self._on_future_done(call, f))
+        return call
+
+    def run_sync(self, coro, timeout: float = None):
+        """Blocks the calling thread until *coro* completes on the loop (used by the sync wrappers)"""
+        if threading.current_thread() is self._thread:
+            raise RuntimeError("run_sync() called from the asyncio loop thread would deadlock")
+        return asyncio.run_coroutine_threadsafe(coro, self.loop).result(timeout)
+
+    def _on_future_done(self, call: AsyncCall, future):
+        # Runs on the loop thread (or the caller's thread for cancellations)
+        self._completed.append((call, future))
+        self._wake.emit()
+
+    def _drain_completed(self):
+        while self._completed:
+            call, future = self._completed.popleft()
+            self._pending.discard(call)
+            if future.cancelled():
+                continue
+            error = future.exception()
+            if error is not None:
+                call.failed.emit(error)
+            else:
+                call.finished.emit(future.result())
+
+    def shutdown(self):
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join(timeout=5)
+
+
+class AsyncTaskExecutor(QObject):
+    """
+    TaskExecutor for the async transport: tasks that define run_async(context) run as
+    coroutines on the AsyncBridge loop, so a prompt or a cart update in flight holds no thread.
+
+    Same contract as TaskExecutor: submit() returns a TaskFuture whose progress and outcome
+    arrive on the GUI thread, and cancel() stops the coroutine at its next await. Tasks
+    without run_async (login, thumbnails) go to the fallback pool.
+    """
+
+    def __init__(self, bridge: AsyncBridge, fallback=None, registry=REGISTRY, parent=None):
+        super().__init__(parent)
+        self.bridge = bridge
+        self.fallback = fallback or default_executor()
+        self.registry = registry
+        self._futures = set()  # GUI thread: submitted futures whose outcome has not been delivered yet
+        self._running = {}     # Loop thread: TaskFuture -> asyncio.Task
+
+    def submit(self, task, priority: int = None, trace_parent=None) -> TaskFuture:
+        """Schedules task.run_async(context) on the loop (task.run(context) on the fallback pool)"""
+        if not hasattr(task, "run_async"):
+            return self.fallback.submit(task, priority, trace_parent)
+        if priority is None:
+            priority = getattr(task, "priority", Priority.BACKGROUND_SYNC)
+        future = TaskFuture(type(task).__name__, priority)
+        future.setParent(self)
+        self._futures.add(future)
+        self.bridge.loop.call_soon_threadsafe(self._start, task, future, trace_parent)
+        return future
+
+    def pending(self) -> int:
+        """Tasks submitted whose outcome has not been delivered yet (fallback pool included)"""
+        return len(self._futures) + self.fallback.pending()
+
+    def shutdown(self, timeout_ms: int = 3000):
+        """Cancels every coroutine task, then shuts down the fallback pool"""
+        for future in list(self._futures):
+            future.cancel()
+        return self.fallback.shutdown(timeout_ms)
+
+    # --- Loop thread ---
+    def _start(self, task, future: TaskFuture, trace_parent):
+        if future.token.cancelled:
+            self._finish(future, "cancelled", None)
+            return
+        self.registry.gauge("executor_active_tasks").inc()
+        running = self.bridge.loop.create_task(self._run(task, future, trace_parent))
+        self._running[future] = running
+        running.add_done_callback(lambda done: self._on_done(future, done))
+
+    async def _run(self, task, future: TaskFuture, trace_parent):
+        with TRACER.activate(trace_parent):
+            return await task.run_async(TaskContext(future.token, future))
+
+    def _on_done(self, future: TaskFuture, running):
+        self._running.pop(future, None)
+        self.registry.gauge("executor_active_tasks").dec()
+        error = None if running.cancelled() else running.exception()
+        if running.cancelled() or future.token.cancelled:
+            self._finish(future, "cancelled", None)
+        elif error is not None:
+            log.error("Background task failed", task=future.name, error=repr(error))
+            self._finish(future, "failed", error)
+        else:
+            self._finish(future, "ok", running.result())
+
+    def _finish(self, future: TaskFuture, outcome: str, value):
+        # Emitted from the loop thread, so delivery is always queued to the GUI thread
+        self.registry.inc("executor_tasks_total", task=future.name, outcome=outcome)
+        future._deliver.emit("finished" if outcome == "ok" else outcome, value)
+
+    def _cancel(self, future: TaskFuture):
+        running = self._running.get(future)
+        if running is not None:
+            running.cancel()
+
+    # --- GUI thread (called by TaskFuture) ---
+    def _try_dequeue(self, future: TaskFuture):
+        # A coroutine can always be stopped, started or not; its cancelled outcome follows from _on_done
+        self.bridge.loop.call_soon_threadsafe(self._cancel, future)
+
+    def _forget(self, future: TaskFuture):
+        if future not in self._futures:
+            return
+        self._futures.discard(future)
+        future.done = True
+        future.setParent(None)
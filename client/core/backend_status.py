@@ -0,0 +1,21 @@
+from PySide6.QtCore import QObject, Signal
+
+
+class BackendStatusMonitor(QObject):
+    """
+    Bridges BackendHealth state changes (reported on whatever worker thread made the call)
+    into a Qt signal, so UI slots run on the GUI thread.
+    """
+
+    # (backend name, new state) - states are the constants in data.api.backend_health
+    state_changed = Signal(str, str)
+
+    def __init__(self, healths: dict):
+        super().__init__()
+        self.healths = healths
+        for health in healths.values():
+            health.add_listener(self.state_changed.emit)
+
+    def state_of(self, backend: str) -> str:
+        health = self.healths.get(backend)
+        return health.state if health else None
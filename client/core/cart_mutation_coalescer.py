@@ -0,0 +1,147 @@
+from PySide6.QtCore import QObject, QTimer, Signal
+from core.workers import CartUpdateWorker
+from core.task_executor import default_executor
+from core.request_generations import RequestGenerations
+from models.types import StoreResult
+from telemetry.log import get_logger
+
+log = get_logger("coalescer")
+
+
+class CartMutationCoalescer(QObject):
+    """
+    Collects quantity changes for a short window and flushes them as one batched PATCH.
+
+    - Only the last quantity per item survives inside a window (absolute values, not deltas).
+    - The window restarts on every change, but a flush is never delayed past max_delay_ms.
+    - At most one flush per cart is in flight; changes arriving meanwhile wait for it,
+      so flushes for the same cart reach the DB strictly in order.
+    - Each queued change may carry the root span of its click; the batch runs under the newest
+      one, and all of them are handed back through traces_synced once the result is rendered.
+    - If the repository journals a batch it could not send (DB unreachable), the optimistic
+      cart stays on screen and the journal is replayed with backoff until it drains.
+    - Every change is a mutation in the shared RequestGenerations; a flush whose result was
+      superseded by a later mutation elsewhere (e.g. optimize) is not rendered.
+    """
+
+    # Emitted with the fresh cart once a flush completes and nothing newer is waiting
+    cart_synced = Signal(StoreResult)
+    # Emitted with the cart id when changes could not be sent and were kept for replay
+    mutations_deferred = Signal(str)
+    # Emitted right after cart_synced with the root spans of every click the result covers
+    traces_synced = Signal(object)
+
+    def __init__(self, repository, window_ms: int = 250, max_delay_ms: int = 1000,
+                 retry_ms: int = 2000, max_retry_ms: int = 30000, executor=None, generations=None):
+        super().__init__()
+        self.repository = repository
+        self.executor = executor or default_executor()
+        self.generations = generations or RequestGenerations()
+        self.window_ms = window_ms
+        self.max_delay_ms = max_delay_ms
+        self.retry_ms = retry_ms
+        self.max_retry_ms = max_retry_ms
+        self._retry_delay = retry_ms
+
+        self._pending = {}    # cart_id -> {item_id: quantity}
+        self._in_flight = {}  # cart_id -> TaskFuture of the flush being sent
+        self._traces = {}     # cart_id -> [root spans of clicks not yet reflected in a synced cart]
+
+        self._window_timer = QTimer(self)
+        self._window_timer.setSingleShot(True)
+        self._window_timer.timeout.connect(self.flush)
+
+        self._max_delay_timer = QTimer(self)
+        self._max_delay_timer.setSingleShot(True)
+        self._max_delay_timer.timeout.connect(self.flush)
+
+        self._retry_timer = QTimer(self)
+        self._retry_timer.setSingleShot(True)
+        self._retry_timer.timeout.connect(self.replay_pending)
+
+    def queue(self, item_id: str, new_quantity: int, trace=None):
+        """Records the latest desired quantity for an item and (re)arms the window"""
+        cart_id = self.repository.current_cart_id
+        self._pending.setdefault(cart_id, {})[item_id] = new_quantity
+        self.generations.issue(mutation=True)
+        if trace is not None:
+            self._traces.setdefault(cart_id, []).append(trace)
+
+        self._window_timer.start(self.window_ms)
+        if not self._max_delay_timer.isActive():
+            self._max_delay_timer.start(self.max_delay_ms)
+
+    def has_pending(self, cart_id: str = None) -> bool:
+        if cart_id is None:
+            return any(self._pending.values())
+        return bool(self._pending.get(cart_id))
+
+    def flush(self):
+        """Sends every pending batch whose cart has no flush in flight"""
+        self._window_timer.stop()
+        self._max_delay_timer.stop()
+        for cart_id in list(self._pending):
+            self._start_flush(cart_id)
+
+    def replay_pending(self):
+        """Re-sends journaled changes (e.g. once the DB is reachable again)"""
+        self._retry_timer.stop()
+        for cart_id in self.repository.pending_mutation_carts():
+            self._start_flush(cart_id, replay=True)
+
+    def _start_flush(self, cart_id, replay: bool = False):
+        if cart_id in self._in_flight:
+            return
+        batch = self._pending.pop(cart_id, {})
+        if not batch and not replay:
+            return
+
+        # An empty batch still makes the repository send what it has journaled for the cart
+        log.debug("Flushing item changes", cart_id=cart_id, items=len(batch), replay=replay)
+
+        traces = self._traces.get(cart_id)
+        generation = self.generations.issue()
+        future = self.executor.submit(CartUpdateWorker(self.repository, batch, cart_id, replay=replay),
+                                      trace_parent=traces[-1] if traces else None)
+        future.finished.connect(lambda result, cid=cart_id, gen=generation: self._on_flushed(cid, result, gen))
+        future.failed.connect(lambda error, cid=cart_id: self._on_flush_failed(cid, error))
+        self._in_flight[cart_id] = future
+
+    def _on_flush_failed(self, cart_id, error: Exception):
+        # The repository reports its own failures as results; this is a bug, not the network.
+        # Unblock the cart so later changes still go out.
+        self._in_flight.pop(cart_id, None)
+        if self._pending.get(cart_id) and not self._window_timer.isActive():
+            self._start_flush(cart_id)
+
+    def _on_flushed(self, cart_id, result: StoreResult, generation: int = None):
+        self._in_flight.pop(cart_id, None)
+
+        if self._pending.get(cart_id):
+            # Newer changes arrived while this batch was in flight: this result is already
+            # outdated, so don't render it. Send the next batch now unless its window is
+            # still collecting clicks (the timer will flush it).
+            if not self._window_timer.isActive():
+                self._start_flush(cart_id)
+            return
+
+        if self.repository.has_pending_mutations(cart_id):
+            # Not delivered: keep the optimistic cart on screen and try again later
+            log.info("Cart changes deferred", cart_id=cart_id, retry_ms=self._retry_delay)
+            self.mutations_deferred.emit(cart_id)
+            self._retry_timer.start(self._retry_delay)
+            self._retry_delay = min(self._retry_delay * 2, self.max_retry_ms)
+            return
+
+        self._retry_delay = self.retry_ms
+        if generation is not None and not self.generations.accept(generation, "cart_update"):
+            # Something newer (an optimization) was asked for meanwhile; its result is the one to show
+            for trace in self._traces.pop(cart_id, []):
+                trace.set("superseded", True)
+                trace.end()
+            return
+        self.cart_synced.emit(result)
+        # Nothing is pending for the cart, so this result reflects every click still traced
+        traces = self._traces.pop(cart_id, None)
+        if traces:
+            self.traces_synced.emit(traces)
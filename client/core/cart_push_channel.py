@@ -0,0 +1,102 @@
+import json
+
+from PySide6.QtCore import QObject, QTimer, QUrl, Signal
+from PySide6.QtWebSockets import QWebSocket
+from data.api.decoders import map_cart_payload, map_cart_delta
+from telemetry.log import get_logger
+
+log = get_logger("push")
+
+
+class CartPushChannel(QObject):
+    """
+    WebSocket subscription to the DB's updates for one cart.
+
+    On connect the server sends a snapshot, then one delta per change (including changes the
+    agent makes while it handles a chat message). Deltas carry the version they apply to; if
+    one is missed the channel asks the server for a fresh snapshot. While the channel is down
+    callers fall back to fetching the cart after every action, and it reconnects with backoff.
+    """
+
+    snapshot_received = Signal(object)  # StoreResult
+    delta_received = Signal(object)     # CartDelta
+    availability_changed = Signal(bool)
+
+    def __init__(self, reconnect_ms: int = 1000, max_reconnect_ms: int = 30000):
+        super().__init__()
+        self.reconnect_ms = reconnect_ms
+        self.max_reconnect_ms = max_reconnect_ms
+        self.url = None
+        self.version = None  # Last version applied; deltas must build on it
+        self.available = False
+        self._resyncing = False
+        self._retry_delay = reconnect_ms
+
+        self.socket = QWebSocket()
+        self.socket.connected.connect(self._on_connected)
+        self.socket.disconnected.connect(self._on_disconnected)
+        self.socket.textMessageReceived.connect(self._on_message)
+
+        self._reconnect_timer = QTimer(self)
+        self._reconnect_timer.setSingleShot(True)
+        self._reconnect_timer.timeout.connect(self._open)
+
+    def subscribe(self, url: str):
+        """Switches the channel to *url* (one cart at a time)"""
+        self.close()
+        self.socket.abort()
+        self.url = url
+        self.version = None
+        self._resyncing = False
+        self._retry_delay = self.reconnect_ms
+        self._open()
+
+    def close(self):
+        self.url = None
+        self._reconnect_timer.stop()
+        self.socket.close()
+
+    def _open(self):
+        if self.url:
+            log.debug("Connecting", url=self.url)
+            self.socket.open(QUrl(self.url))
+
+    def _set_available(self, available: bool):
+        if available != self.available:
+            self.available = available
+            self.availability_changed.emit(available)
+
+    def _on_connected(self):
+        log.info("Cart channel connected")
+        self._retry_delay = self.reconnect_ms
+        self._set_available(True)
+
+    def _on_disconnected(self):
+        self._set_available(False)
+        if self.url:
+            log.warning("Cart channel down", error=self.socket.errorString(), retry_ms=self._retry_delay)
+            self._reconnect_timer.start(self._retry_delay)
+            self._retry_delay = min(self._retry_delay * 2, self.max_reconnect_ms)
+
+    def _on_message(self, text: str):
+        try:
+            message = json.loads(text)
+            kind = message.get("type")
+            if kind == "snapshot":
+                self._resyncing = False
+                self.version = str(message.get("version"))
+                self.snapshot_received.emit(map_cart_payload(message))
+            elif kind == "delta":
+                delta = map_cart_delta(message)
+                if self._resyncing:
+                    return  # The requested snapshot already includes this change
+                if self.version is None or delta.base_version != self.version:
+                    # A change was missed (or arrived before the snapshot): start over from a snapshot
+                    log.info("Delta out of sequence, resyncing", version=delta.version, known=self.version)
+                    self._resyncing = True
+                    self.socket.sendTextMessage(json.dumps({"type": "resync"}))
+                    return
+                self.version = delta.version
+                self.delta_received.emit(delta)
+        except (ValueError, TypeError, KeyError, AttributeError) as e:
+            log.warning("Ignoring malformed message", error=str(e))
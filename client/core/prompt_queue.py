@@ -0,0 +1,127 @@
+from collections import deque
+from dataclasses import dataclass, field
+
+from PySide6.QtCore import QObject, Signal
+from telemetry.log import get_logger
+
+log = get_logger("prompts")
+
+
+@dataclass(eq=False)
+class QueuedPrompt:
+    text: str
+    trace: object = None       # Root span of the user action
+    started: float = None      # perf_counter() when the user sent it
+    generation: int = None     # Cart generation taken when it was sent to the agent
+    future: object = None
+    chunks: list = field(default_factory=list)  # Streamed pieces held back until it is the active prompt
+    reply: object = None
+    done: bool = False
+    cancelled: bool = False
+
+
+class PromptQueue(QObject):
+    """
+    Per-session queue of chat prompts.
+
+    Up to `depth` prompts are with the agent at once (1 = strictly one after the other); the
+    rest wait here, at most `max_waiting` of them, which is the backpressure the input shows.
+    Replies are delivered in the order the prompts were sent, even when a later one finishes
+    first. Only the oldest undelivered prompt (the active one) streams into the chat; pieces of
+    later replies are held back and replayed when their turn comes. Prompts still waiting can
+    be cancelled. While paused (e.g. before the session exists) nothing is sent.
+    """
+
+    prompt_active = Signal(object)          # QueuedPrompt whose reply is shown next
+    chunk_received = Signal(str)            # Streamed piece of the active prompt's reply
+    reply_ready = Signal(object, object)    # (QueuedPrompt, reply or None if the task failed), in order
+    prompts_cancelled = Signal(object)      # [QueuedPrompt] dropped before they were sent
+    backlog_changed = Signal(int, bool)     # (prompts waiting to be sent, queue full)
+
+    def __init__(self, executor, make_task, depth: int = 1, max_waiting: int = 5):
+        super().__init__()
+        self.executor = executor
+        self.make_task = make_task  # QueuedPrompt -> task for the executor (called when it is sent)
+        self.depth = depth
+        self.max_waiting = max_waiting
+        self.paused = False
+        self._waiting = deque()  # Not sent yet
+        self._sent = deque()     # With the agent or answered, not yet delivered; oldest first
+
+    @property
+    def is_full(self) -> bool:
+        return len(self._waiting) >= self.max_waiting
+
+    def waiting(self) -> int:
+        return len(self._waiting)
+
+    def in_flight(self) -> int:
+        return len(self._sent)
+
+    def submit(self, text: str, **fields) -> QueuedPrompt:
+        """Queues a prompt; returns None (and queues nothing) if the queue is full"""
+        if self.is_full:
+            return None
+        prompt = QueuedPrompt(text, **fields)
+        self._waiting.append(prompt)
+        self._dispatch()
+        self._emit_backlog()
+        return prompt
+
+    def cancel_queued(self) -> int:
+        """Drops every prompt that has not been sent to the agent yet"""
+        cancelled = list(self._waiting)
+        self._waiting.clear()
+        for prompt in cancelled:
+            prompt.cancelled = True
+        if cancelled:
+            log.info("Cancelled queued prompts", count=len(cancelled))
+            self.prompts_cancelled.emit(cancelled)
+            self._emit_backlog()
+        return len(cancelled)
+
+    def pause(self):
+        self.paused = True
+
+    def resume(self):
+        self.paused = False
+        self._dispatch()
+        self._emit_backlog()
+
+    # --- Internals ---
+    def _dispatch(self):
+        while not self.paused and self._waiting and len(self._sent) < self.depth:
+            prompt = self._waiting.popleft()
+            prompt.future = self.executor.submit(self.make_task(prompt), trace_parent=prompt.trace)
+            prompt.future.progress.connect(lambda chunk, p=prompt: self._on_chunk(p, chunk))
+            prompt.future.finished.connect(lambda reply, p=prompt: self._on_done(p, reply))
+            prompt.future.failed.connect(lambda error, p=prompt: self._on_done(p, None))
+            prompt.future.cancelled.connect(lambda p=prompt: self._on_done(p, None))
+            self._sent.append(prompt)
+            if len(self._sent) == 1:
+                self.prompt_active.emit(prompt)
+
+    def _on_chunk(self, prompt: QueuedPrompt, chunk: str):
+        if self._sent and self._sent[0] is prompt:
+            self.chunk_received.emit(chunk)
+        else:
+            prompt.chunks.append(chunk)
+
+    def _on_done(self, prompt: QueuedPrompt, reply):
+        prompt.reply = reply
+        prompt.done = True
+        while self._sent and self._sent[0].done:
+            head = self._sent.popleft()
+            self.reply_ready.emit(head, head.reply)
+            if self._sent:
+                # The next reply takes over the chat, starting with what it already streamed
+                head = self._sent[0]
+                self.prompt_active.emit(head)
+                chunks, head.chunks = head.chunks, []
+                for chunk in chunks:
+                    self.chunk_received.emit(chunk)
+        self._dispatch()
+        self._emit_backlog()
+
+    def _emit_backlog(self):
+        self.backlog_changed.emit(len(self._waiting), self.is_full)
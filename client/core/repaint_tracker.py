@@ -0,0 +1,54 @@
+from PySide6.QtCore import QEvent, QObject, QTimer
+from PySide6.QtWidgets import QApplication
+
+
+class RepaintTracker(QObject):
+    """
+    Ends trace spans once a widget has actually been repainted after an update.
+
+    While spans are waiting, an application-wide event filter watches for the first paint of
+    the widget or any of its children; the spans end right after that paint cycle. Hidden
+    widgets never paint, so their spans end immediately; timeout_ms bounds the wait otherwise.
+    """
+
+    def __init__(self, widget, timeout_ms: int = 1000):
+        super().__init__()
+        self.widget = widget
+        self._waiting = []
+        self._filtering = False
+        self._timeout = QTimer(self)
+        self._timeout.setSingleShot(True)
+        self._timeout.setInterval(timeout_ms)
+        self._timeout.timeout.connect(lambda: self._finish("timeout"))
+
+    def end_on_next_paint(self, spans):
+        spans = [span for span in spans if span is not None]
+        if not spans:
+            return
+        if not self.widget.isVisible():
+            for span in spans:
+                span.set("repaint", "hidden")
+                span.end()
+            return
+        self._waiting.extend(spans)
+        if not self._filtering:
+            self._filtering = True
+            QApplication.instance().installEventFilter(self)
+        self._timeout.start()
+
+    def eventFilter(self, obj, event):
+        if event.type() == QEvent.Paint and self._waiting and \
+                (obj is self.widget or (obj.isWidgetType() and self.widget.isAncestorOf(obj))):
+            # The paint cycle in progress finishes before queued calls run
+            QTimer.singleShot(0, lambda: self._finish("painted"))
+        return False
+
+    def _finish(self, reason: str):
+        self._timeout.stop()
+        if self._filtering:
+            self._filtering = False
+            QApplication.instance().removeEventFilter(self)
+        waiting, self._waiting = self._waiting, []
+        for span in waiting:
+            span.set("repaint", reason)
+            span.end()
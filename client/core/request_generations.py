@@ -0,0 +1,50 @@
+from telemetry.metrics import REGISTRY
+from telemetry.log import get_logger
+
+log = get_logger("generations")
+
+
+class RequestGenerations:
+    """
+    Latest-wins ordering for requests that return the whole cart.
+
+    Every request takes the next generation when it is issued. Issuing a mutation (+/- click,
+    optimize) raises a barrier: any response from an earlier generation no longer reflects
+    what the user asked for, so it is dropped instead of rendered, and superseded requests
+    that can still be stopped (reads, queued optimizations) are cancelled. Mutations already
+    sent are never cancelled; their results are just not shown. GUI thread only.
+    """
+
+    def __init__(self, registry=REGISTRY):
+        self.registry = registry
+        self.latest = 0
+        self._barrier = 0
+        self._cancellable = {}  # generation -> TaskFuture
+
+    def issue(self, mutation: bool = False) -> int:
+        self.latest += 1
+        if mutation:
+            self._barrier = self.latest
+            for generation in [g for g in self._cancellable if g < self.latest]:
+                log.debug("Cancelling superseded cart request", generation=generation, by=self.latest)
+                self._cancellable.pop(generation).cancel()
+        return self.latest
+
+    def track(self, generation: int, future):
+        """Lets a later mutation cancel *future* (a task that is safe to abandon)"""
+        if generation < self._barrier:
+            future.cancel()
+        else:
+            self._cancellable[generation] = future
+
+    def is_current(self, generation: int) -> bool:
+        return generation >= self._barrier
+
+    def accept(self, generation: int, source: str) -> bool:
+        """Call when a response arrives: True if it may be rendered, False (and counted) if superseded"""
+        self._cancellable.pop(generation, None)
+        if self.is_current(generation):
+            return True
+        log.debug("Dropping superseded cart response", source=source, generation=generation, barrier=self._barrier)
+        self.registry.inc("cart_responses_dropped_total", source=source)
+        return False
@@ -0,0 +1,118 @@
+import os
+import sys
+import threading
+import time
+import traceback
+from dataclasses import dataclass
+
+from PySide6.QtCore import QObject, QTimer
+from telemetry.metrics import REGISTRY
+from telemetry.log import get_logger
+
+log = get_logger("watchdog")
+
+
+@dataclass
+class StallReport:
+    duration_ms: float
+    stack: str = None      # GUI thread stack captured mid-stall (None if it ended before the watchdog looked)
+    where: str = "unknown" # Innermost frame, e.g. "user_client.py:27 in sync_profile"
+
+
+class StallError(AssertionError):
+    pass
+
+
+class StallWatchdog(QObject):
+    """
+    Measures GUI event-loop latency and reports stalls with the GUI thread's stack.
+
+    A heartbeat timer on the GUI thread records when it last ran; the lateness of each beat is
+    the event-loop latency. A background thread checks the heartbeat and, once it is overdue by
+    threshold_ms, captures the GUI thread's Python stack (sys._current_frames), so the report
+    shows the call that blocked. Stalls are logged and recorded in the metrics registry. With
+    fail_over_ms set (test mode), assert_no_stalls() raises for any stall longer than that.
+    """
+
+    def __init__(self, threshold_ms: float = 200, heartbeat_ms: int = 50, fail_over_ms: float = None,
+                 registry=REGISTRY):
+        super().__init__()
+        self.threshold_ms = threshold_ms
+        self.heartbeat_ms = heartbeat_ms
+        self.fail_over_ms = fail_over_ms
+        self.registry = registry
+        self.stalls = []  # StallReport, oldest first
+
+        self._timer = QTimer(self)
+        self._timer.setInterval(heartbeat_ms)
+        self._timer.timeout.connect(self._beat)
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self._gui_thread_id = None
+        self._last_beat = None
+        self._beat_count = 0
+        self._captured = None  # (beat_count, stack, where) taken by the watchdog thread
+
+    def start(self):
+        self._gui_thread_id = threading.get_ident()
+        self._last_beat = time.perf_counter()
+        self._stop.clear()
+        self._timer.start()
+        threading.Thread(target=self._watch, name="gui-watchdog", daemon=True).start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._timer.stop()
+
+    def assert_no_stalls(self):
+        """Test mode: raises StallError listing every stall over fail_over_ms"""
+        limit = self.fail_over_ms if self.fail_over_ms is not None else self.threshold_ms
+        failures = [stall for stall in self.stalls if stall.duration_ms > limit]
+        if failures:
+            details = "\n\n".join(f"GUI thread blocked for {stall.duration_ms:.0f} ms at {stall.where}:\n{stall.stack or ''}"
+                                  for stall in failures)
+            raise StallError(f"{len(failures)} event-loop stall(s) over {limit:.0f} ms\n{details}")
+
+    # --- GUI thread ---
+    def _beat(self):
+        now = time.perf_counter()
+        latency_ms = max(0.0, (now - self._last_beat) * 1000 - self.heartbeat_ms)
+        self.registry.observe("event_loop_latency_seconds", latency_ms / 1000)
+        if latency_ms >= self.threshold_ms:
+            with self._lock:
+                captured = self._captured
+            if captured and captured[0] == self._beat_count:
+                self._report(StallReport(latency_ms, captured[1], captured[2]))
+            else:
+                self._report(StallReport(latency_ms))
+        with self._lock:
+            self._beat_count += 1
+            self._last_beat = now
+
+    def _report(self, stall: StallReport):
+        self.stalls.append(stall)
+        self.registry.inc("gui_stalls_total")
+        self.registry.observe("gui_stall_duration_seconds", stall.duration_ms / 1000)
+        log.warning("GUI event loop stalled", ms=round(stall.duration_ms), where=stall.where)
+        if stall.stack:
+            log.debug("Stalled GUI thread stack", stack=stall.stack)
+
+    # --- Watchdog thread ---
+    def _watch(self):
+        check_s = self.heartbeat_ms / 2000
+        while not self._stop.wait(check_s):
+            with self._lock:
+                overdue_ms = (time.perf_counter() - self._last_beat) * 1000 - self.heartbeat_ms
+                beat = self._beat_count
+                already = self._captured is not None and self._captured[0] == beat
+            if overdue_ms < self.threshold_ms or already:
+                continue
+            frame = sys._current_frames().get(self._gui_thread_id)
+            if frame is None:
+                continue
+            summary = traceback.extract_stack(frame)
+            innermost = summary[-1]
+            where = f"{os.path.basename(innermost.filename)}:{innermost.lineno} in {innermost.name}"
+            with self._lock:
+                self._captured = (beat, "".join(summary.format()), where)
@@ -0,0 +1,226 @@
+import threading
+import time
+
+from PySide6.QtCore import QObject, QRunnable, QThreadPool, Signal
+from telemetry.metrics import REGISTRY
+from telemetry.tracing import TRACER
+from telemetry.log import get_logger
+
+log = get_logger("executor")
+
+
+class Priority:
+    """Higher runs first when threads are scarce"""
+    BACKGROUND_SYNC = 0  # Journal replay, prefetches
+    CART_MUTATION = 5    # +/- clicks, optimize
+    USER_PROMPT = 10     # The user is watching the chat
+
+    NAMES = {BACKGROUND_SYNC: "background_sync", CART_MUTATION: "cart_mutation", USER_PROMPT: "user_prompt"}
+
+
+class CancellationToken:
+    """Set by TaskFuture.cancel(); long-running tasks may poll it to stop early"""
+
+    def __init__(self):
+        self._event = threading.Event()
+
+    def cancel(self):
+        self._event.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+
+class TaskContext:
+    """What a running task sees: its cancellation token and a way to report partial results"""
+
+    def __init__(self, token: CancellationToken, future):
+        self.token = token
+        self._future = future
+
+    @property
+    def cancelled(self) -> bool:
+        return self.token.cancelled
+
+    def progress(self, value):
+        """Delivered to the future's progress signal (on the thread that submitted the task)"""
+        if not self.token.cancelled:
+            self._future._deliver.emit("progress", value)
+
+
+class TaskFuture(QObject):
+    """
+    Result of a submitted task. Exactly one of finished / failed / cancelled fires, on the
+    thread the task was submitted from (the GUI thread), after any progress signals.
+    Outcomes are re-emitted from that thread's event loop, so connecting right after
+    submit() never misses a fast task.
+    """
+
+    finished = Signal(object)
+    failed = Signal(object)   # The exception the task raised
+    cancelled = Signal()
+    progress = Signal(object)
+    _deliver = Signal(str, object)  # (kind, value) from the pool thread
+
+    def __init__(self, name: str, priority: int):
+        super().__init__()
+        self.name = name
+        self.priority = priority
+        self.token = CancellationToken()
+        self.done = False
+        self._deliver.connect(self._on_deliver)
+
+    def _on_deliver(self, kind: str, value):
+        if self.done:
+            return
+        if kind == "progress":
+            self.progress.emit(value)
+            return
+        if kind == "finished":
+            self.finished.emit(value)
+        elif kind == "failed":
+            self.failed.emit(value)
+        else:
+            self.cancelled.emit()
+        executor = self.parent()
+        if executor is not None:
+            executor._forget(self)
+
+    def cancel(self):
+        """Drops the task if it hasn't started; otherwise asks it to stop and discards its result"""
+        self.token.cancel()
+        executor = self.parent()
+        if executor is not None:
+            executor._try_dequeue(self)
+
+    def is_cancelled(self) -> bool:
+        return self.token.cancelled
+
+
+class _TaskRunnable(QRunnable):
+    def __init__(self, executor, task, future: TaskFuture, trace_parent):
+        # Auto-deleted by the pool after run(); until it starts the executor keeps it for tryTake()
+        super().__init__()
+        self.executor = executor
+        self.task = task
+        self.future = future
+        self.trace_parent = trace_parent
+        self.queued_at = time.perf_counter()
+
+    def run(self):
+        future = self.future
+        self.executor._on_started(self)
+        outcome = "cancelled"
+        try:
+            if not future.token.cancelled:
+                with TRACER.activate(self.trace_parent):
+                    result = self.task.run(TaskContext(future.token, future))
+                if not future.token.cancelled:
+                    outcome = "ok"
+                    future._deliver.emit("finished", result)
+        except Exception as e:
+            if not future.token.cancelled:
+                outcome = "failed"
+                log.error("Background task failed", task=future.name, error=repr(e))
+                future._deliver.emit("failed", e)
+        finally:
+            if outcome == "cancelled":
+                future._deliver.emit("cancelled", None)
+            self.executor._on_finished(outcome, future)
+
+
+class TaskExecutor(QObject):
+    """
+    Runs background work on a bounded QThreadPool instead of one QThread per request.
+
+    A task is any object with run(context) (see core.workers); submit() returns a TaskFuture
+    whose signals deliver the outcome. When all threads are busy, queued tasks start in
+    priority order (Priority). The executor owns every runnable and future until its outcome
+    has been delivered, so callers can drop their references at any time.
+    """
+
+    def __init__(self, max_threads: int = 4, registry=REGISTRY, parent=None):
+        super().__init__(parent)
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(max_threads)
+        self.registry = registry
+        self._futures = set()  # Submitted futures whose outcome has not been delivered yet
+        self._queued = {}      # TaskFuture -> _TaskRunnable, until a pool thread picks it up
+        self._lock = threading.Lock()
+
+    def submit(self, task, priority: int = None, trace_parent=None) -> TaskFuture:
+        """Queues task.run(context); priority defaults to task.priority"""
+        if priority is None:
+            priority = getattr(task, "priority", Priority.BACKGROUND_SYNC)
+        future = TaskFuture(type(task).__name__, priority)
+        future.setParent(self)
+        runnable = _TaskRunnable(self, task, future, trace_parent)
+        with self._lock:
+            self._futures.add(future)
+            self._queued[future] = runnable
+        self._depth(priority).inc()
+        self.pool.start(runnable, priority)
+        return future
+
+    def pending(self) -> int:
+        """Tasks submitted whose outcome has not been delivered yet"""
+        with self._lock:
+            return len(self._futures)
+
+    def shutdown(self, timeout_ms: int = 3000):
+        """Cancels everything (queued tasks never start) and waits for running ones to return"""
+        with self._lock:
+            futures = list(self._futures)
+        for future in futures:
+            future.cancel()
+        return self.pool.waitForDone(timeout_ms)
+
+    # --- Bookkeeping (called from worker threads unless noted) ---
+    def _depth(self, priority: int):
+        return self.registry.gauge("executor_queue_depth", priority=Priority.NAMES.get(priority, str(priority)))
+
+    def _try_dequeue(self, future: TaskFuture):
+        # GUI thread: a task that has not started yet is removed from the pool outright. Holding
+        # the lock keeps a pool thread from starting (and then auto-deleting) it meanwhile.
+        with self._lock:
+            runnable = self._queued.pop(future, None)
+            taken = runnable is not None and self.pool.tryTake(runnable)
+        if taken:
+            self._depth(future.priority).dec()
+            self.registry.inc("executor_tasks_total", task=future.name, outcome="cancelled")
+            future._on_deliver("cancelled", None)
+
+    def _on_started(self, runnable: _TaskRunnable):
+        with self._lock:
+            self._queued.pop(runnable.future, None)
+        priority = Priority.NAMES.get(runnable.future.priority, str(runnable.future.priority))
+        self._depth(runnable.future.priority).dec()
+        self.registry.observe("executor_queue_wait_seconds", time.perf_counter() - runnable.queued_at,
+                              priority=priority)
+        self.registry.gauge("executor_active_tasks").inc()
+
+    def _on_finished(self, outcome: str, future: TaskFuture):
+        self.registry.gauge("executor_active_tasks").dec()
+        self.registry.inc("executor_tasks_total", task=future.name, outcome=outcome)
+
+    def _forget(self, future: TaskFuture):
+        # GUI thread, once the outcome has been delivered
+        with self._lock:
+            if future not in self._futures:
+                return
+            self._futures.discard(future)
+            self._queued.pop(future, None)
+        future.done = True
+        future.setParent(None)  # Back to Python ownership; freed once the caller lets go too
+
+
+_default_executor = None
+
+
+def default_executor() -> TaskExecutor:
+    """Process-wide executor (created on first use, after the QApplication exists)"""
+    global _default_executor
+    if _default_executor is None:
+        _default_executor = TaskExecutor()
+    return _default_executor
@@ -0,0 +1,172 @@
+import requests
+from requests.adapters import HTTPAdapter
+
+from PySide6.QtCore import Qt, QObject, QBuffer, QByteArray, QIODevice, QRectF, QCoreApplication
+from PySide6.QtGui import QColor, QImage, QImageReader, QPainter, QPainterPath, QPixmap
+from core.task_executor import Priority, TaskExecutor
+from data.repositories.thumbnail_store import ThumbnailStore
+from ui.styles.render_cache import PixmapCache
+from telemetry.metrics import REGISTRY
+from telemetry.log import get_logger
+
+log = get_logger("thumbnails")
+
+# Anything bigger is not a thumbnail; refusing it keeps a bad catalogue entry from eating memory
+MAX_IMAGE_BYTES = 4 * 1024 * 1024
+
+
+def render_thumbnail(data: bytes, size: int, background: str, dpr: float = 1.0) -> QImage:
+    """
+    Decodes *data* into a round badge of *size* (logical pixels), the image covering the circle
+    like glyph_pixmap's glyph. Uses only QImage, so it runs on worker threads.
+    """
+    pixels = int(size * dpr)
+    buffer = QBuffer()
+    buffer.setData(QByteArray(data))
+    buffer.open(QIODevice.ReadOnly)
+    reader = QImageReader(buffer)
+    source = reader.size()
+    if source.isValid() and (source.width() > pixels or source.height() > pixels):
+        # Formats that support it (JPEG) decode straight at the smaller size
+        reader.setScaledSize(source.scaled(pixels, pixels, Qt.KeepAspectRatioByExpanding))
+    image = reader.read()
+    if image.isNull():
+        raise ValueError(f"Undecodable image: {reader.errorString()}")
+    if min(image.width(), image.height()) != pixels:  # Smaller side = badge size, the rest is clipped
+        image = image.scaled(pixels, pixels, Qt.KeepAspectRatioByExpanding, Qt.SmoothTransformation)
+
+    badge = QImage(pixels, pixels, QImage.Format_ARGB32_Premultiplied)
+    badge.fill(Qt.transparent)
+    painter = QPainter(badge)
+    painter.setRenderHint(QPainter.Antialiasing)
+    painter.setRenderHint(QPainter.SmoothPixmapTransform)
+    circle = QPainterPath()
+    circle.addEllipse(QRectF(0, 0, pixels, pixels))
+    painter.setClipPath(circle)
+    painter.fillRect(badge.rect(), QColor(background))  # Behind transparent product shots
+    painter.drawImage((pixels - image.width()) // 2, (pixels - image.height()) // 2, image)
+    painter.end()
+    badge.setDevicePixelRatio(dpr)
+    return badge
+
+
+class ThumbnailTask:
+    # Pictures are decoration: never ahead of anything the user is waiting for
+    priority = Priority.BACKGROUND_SYNC
+
+    def __init__(self, loader, url: str, size: int, background: str, dpr: float):
+        self.loader = loader
+        self.url = url
+        self.size = size
+        self.background = background
+        self.dpr = dpr
+
+    def run(self, context):
+        # Returns (source, QImage); source is "failed" (and the image the error) when there is no picture
+        loader = self.loader
+        try:
+            source, data = "disk", loader.store.get(self.url)
+            if data is None:
+                source = "network"
+                response = loader.session.get(self.url, timeout=loader.timeout)
+                response.raise_for_status()
+                data = response.content
+                if len(data) > MAX_IMAGE_BYTES:
+                    raise ValueError(f"Image too large ({len(data)} bytes)")
+            if context.cancelled:
+                return "cancelled", None  # Dropped by the executor; nobody waits for it
+            try:
+                image = render_thumbnail(data, self.size, self.background, self.dpr)
+            except ValueError:
+                if source == "disk":
+                    loader.store.discard(self.url)  # Would fail the same way after every restart
+                raise
+            if source == "network":
+                loader.store.put(self.url, data)  # Only images that decoded are kept
+            return source, image
+        except (requests.RequestException, ValueError, OSError) as e:
+            return "failed", e
+
+
+class ThumbnailLoader(QObject):
+    """
+    Product thumbnails for the cart cards.
+
+    request() answers from a memory LRU of QPixmaps when it can. Otherwise the image is read from
+    the disk store (or downloaded into it), decoded, downscaled and composited on a worker thread,
+    and the callback gets the pixmap on the GUI thread; only the QImage -> QPixmap conversion
+    happens there. Work runs on the loader's own small pool, so a slow image host never holds up
+    cart or chat tasks. Requests for a thumbnail already on its way share the download, and a URL
+    that failed is not tried again until clear_failures().
+    """
+
+    def __init__(self, store: ThumbnailStore = None, executor: TaskExecutor = None,
+                 memory_bytes: int = 8 * 1024 * 1024, timeout=(3.05, 10), registry=REGISTRY, parent=None):
+        super().__init__(parent)
+        self.store = store if store is not None else ThumbnailStore()
+        self.executor = executor if executor is not None else TaskExecutor(max_threads=2, registry=registry, parent=self)
+        self.memory = PixmapCache(memory_bytes, registry)
+        self.timeout = timeout
+        self.registry = registry
+
+        self.session = requests.Session()
+        threads = self.executor.pool.maxThreadCount()
+        self.session.mount("http://", HTTPAdapter(pool_maxsize=threads, max_retries=0))
+        self.session.mount("https://", HTTPAdapter(pool_maxsize=threads, max_retries=0))
+
+        self._waiting = {}   # key -> [callback], while its task runs
+        self._failed = set()  # URLs without a usable image
+
+    def request(self, url: str, size: int, background: str, dpr: float, callback) -> QPixmap:
+        """
+        The thumbnail of *url* if it is in memory. Otherwise None, and callback(url, pixmap) is
+        called on the GUI thread once it is ready (never, if the image can't be had).
+        """
+        key = (url, size, background, dpr)
+        pixmap = self.memory.find(key)
+        if pixmap is not None:
+            self.registry.inc("thumbnail_requests_total", source="memory")
+            return pixmap
+        if url in self._failed:
+            return None
+
+        waiting = self._waiting.get(key)
+        if waiting is None:
+            waiting = self._waiting[key] = []
+            future = self.executor.submit(ThumbnailTask(self, url, size, background, dpr))
+            future.finished.connect(lambda result, key=key: self._on_loaded(key, result))
+            future.cancelled.connect(lambda key=key: self._waiting.pop(key, None))
+        if callback not in waiting:  # A repainting view asks again and again; answer it once
+            waiting.append(callback)
+        return None
+
+    def clear_failures(self):
+        """Lets failed URLs be tried again (e.g. after the network came back)"""
+        self._failed.clear()
+
+    def _on_loaded(self, key, result):
+        source, image = result
+        callbacks = self._waiting.pop(key, [])
+        self.registry.inc("thumbnail_requests_total", source=source)
+        url = key[0]
+        if source == "failed":
+            self._failed.add(url)
+            log.info("Thumbnail unavailable", url=url, error=repr(image))
+            return
+        pixmap = QPixmap.fromImage(image)
+        pixmap.setDevicePixelRatio(image.devicePixelRatio())
+        self.memory.put(key, pixmap)
+        for callback in callbacks:
+            callback(url, pixmap)
+
+
+_default_loader = None
+
+
+def default_thumbnail_loader() -> ThumbnailLoader:
+    """Process-wide loader backed by the default disk store (created on first use)"""
+    global _default_loader
+    if _default_loader is None:
+        _default_loader = ThumbnailLoader()
+        QCoreApplication.instance().aboutToQuit.connect(_default_loader.executor.shutdown)
+    return _default_loader
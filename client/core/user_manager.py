@@ -14,9 +14,11 @@ class UserManager(QObject):
         self.current_user = None # single source of truth
 
     def login_guest(self):
-        """Bootstraps the application with a default user"""
-        # In blocking mode for simplicity (Use Threads in production)
-        self.current_user = self.client.login("GuestUser")
+        """Bootstraps the application with a default user (blocking; the app uses LoginWorker)"""
+        self.set_current_user(self.client.login("GuestUser"))
+
+    def set_current_user(self, profile: UserProfile):
+        self.current_user = profile
         self.profile_updated.emit(self.current_user)
 
     def update_full_profile(self, data_dict: dict):
@@ -1,45 +1,99 @@
-from PySide6.QtCore import QThread, Signal, QRunnable
+from dataclasses import dataclass
+from core.task_executor import Priority
 from models.types import StoreResult
 
-class AIWorker(QThread):
-    finished = Signal(object) 
+# Tasks for core.task_executor.TaskExecutor: run(context) executes on a pool thread and its
+# return value arrives through the future's finished signal. With the async transport,
+# core.async_bridge.AsyncTaskExecutor awaits run_async(context) on the asyncio loop instead,
+# against the BlockingRepository's async_repo, so no thread waits on the network.
 
-    def __init__(self, repository, user_prompt, user_id):
-        super().__init__()
+class LoginWorker:
+    # Startup: the window is already up, nothing can be sent until this is done
+    priority = Priority.USER_PROMPT
+
+    def __init__(self, user_manager, username: str = "GuestUser"):
+        self.user_manager = user_manager
+        self.username = username
+
+    def run(self, context):
+        # Returns the profile; UserManager.set_current_user applies it on the GUI thread
+        return self.user_manager.client.login(self.username)
+
+class SessionInitWorker:
+    priority = Priority.USER_PROMPT
+
+    def __init__(self, repository):
+        self.repository = repository
+
+    def run(self, context):
+        # True once the agent session (and its cart) exists
+        return self.repository.initialize_session()
+
+    async def run_async(self, context):
+        return await self.repository.async_repo.initialize_session()
+
+@dataclass
+class AIReply:
+    result: object              # Agent text, or a ClarificationRequest
+    cart: StoreResult = None    # Cart refreshed after the reply, when one was needed
+
+class AIWorker:
+    # The user is waiting on the reply, so it jumps ahead of cart work
+    priority = Priority.USER_PROMPT
+
+    def __init__(self, repository, user_prompt, user_id, refresh_cart: bool = False):
         self.repository = repository
         self.prompt = user_prompt
-        self.user_id = user_id  
-
-    def run(self):
-        result = self.repository.send_prompt_to_ai(self.prompt, self.user_id)
-        self.finished.emit(result)
-        
-class CartUpdateWorker(QThread):
-    # This signal will carry the updated StoreResult back to the Controller
-    finished = Signal(StoreResult)
-
-    def __init__(self, repository, item_id, new_quantity):
-        super().__init__()
+        self.user_id = user_id
+        # True if the cart must be fetched after the reply (the agent may have changed it). Decided
+        # on the GUI thread at dispatch, so run() never reads GUI-owned state.
+        self.refresh_cart = refresh_cart
+
+    def run(self, context):
+        # 1. Pieces of the agent reply go out through the future's progress signal as they stream in
+        result = self.repository.stream_prompt_to_ai(self.prompt, self.user_id, context.progress)
+
+        # 2. Chained stage: refresh the cart here, so text and cart reach the UI together
+        cart = None
+        if isinstance(result, str) and self.refresh_cart and not context.cancelled:
+            cart = self.repository.fetch_cart()
+        return AIReply(result, cart)
+
+    async def run_async(self, context):
+        repository = self.repository.async_repo
+        result = await repository.stream_prompt_to_ai(self.prompt, self.user_id, context.progress)
+        cart = None
+        if isinstance(result, str) and self.refresh_cart and not context.cancelled:
+            cart = await repository.fetch_cart()
+        return AIReply(result, cart)
+
+class CartUpdateWorker:
+    priority = Priority.CART_MUTATION
+
+    def __init__(self, repository, quantities: dict, cart_id: str = None, replay: bool = False):
         self.repository = repository
-        self.item_id = item_id
-        self.new_quantity = new_quantity
-
-    def run(self):
-        # Runs the heavy 3-step pipeline in the background
-        updated_cart = self.repository.update_cart_item(self.item_id, self.new_quantity)
-        
-        # Send the final result back to the main thread
-        self.finished.emit(updated_cart)
-    
-class CartOptimizeWorker(QThread):
-    # Returns the new optimized cart
-    finished = Signal(StoreResult)
+        self.quantities = quantities  # {item_id: new_quantity}, already coalesced
+        self.cart_id = cart_id
+        if replay:
+            # Re-sending journaled changes nobody is waiting on
+            self.priority = Priority.BACKGROUND_SYNC
+
+    def run(self, context):
+        # Runs the heavy 3-step pipeline in the background (one PATCH for the whole batch)
+        return self.repository.update_cart_items(self.quantities, self.cart_id)
+
+    async def run_async(self, context):
+        return await self.repository.async_repo.update_cart_items(self.quantities, self.cart_id)
+
+class CartOptimizeWorker:
+    priority = Priority.CART_MUTATION
 
     def __init__(self, repository):
-        super().__init__()
         self.repository = repository
 
-    def run(self):
-        # Runs the optimization in background
-        optimized_cart = self.repository.optimize_current_cart()
-        self.finished.emit(optimized_cart)
\ No newline at end of file
+    def run(self, context):
+        # Returns the new optimized cart
+        return self.repository.optimize_current_cart()
+
+    async def run_async(self, context):
+        return await self.repository.async_repo.optimize_current_cart()
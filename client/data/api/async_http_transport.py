@@ -0,0 +1,191 @@
+import asyncio
+import random
+import time
+import uuid
+
+import httpx
+from data.api.backend_health import BackendHealth, CircuitOpenError
+from data.api.http_transport import IDEMPOTENT_METHODS, KEYED_METHODS, RETRY_STATUSES
+from telemetry.metrics import REGISTRY, MetricsRegistry, endpoint_name
+from telemetry.tracing import TRACER
+from telemetry.log import get_logger
+
+try:
+    import h2  # noqa: F401  (HTTP/2 support for httpx is an optional extra)
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+log = get_logger("transport")
+
+
+class AsyncBackendTransport:
+    """
+    Async counterpart of BackendTransport for a single backend, on one httpx.AsyncClient.
+
+    Same contract as the requests path: POST/PATCH carry an Idempotency-Key that stays the same
+    across retries, idempotent (or retry=True) calls are retried with full-jitter backoff, the
+    BackendHealth gives per-endpoint adaptive timeouts and the circuit breaker, and every call is
+    metered and carries X-Request-ID / traceparent. Concurrent calls share the client's
+    connections, so none needs a thread.
+
+    With h2 installed, concurrent calls are streams of one HTTP/2 connection: negotiated via ALPN
+    for https, and spoken with prior knowledge (h2c) for plain http backends. A plain http
+    backend that turns out to speak only HTTP/1.1 is detected on the first call, which is resent
+    over HTTP/1.1 keep-alive connections from then on.
+    """
+
+    def __init__(self, base_url: str, max_connections: int = 4, max_retries: int = 2,
+                 backoff_base: float = 0.1, backoff_cap: float = 2.0, health: BackendHealth = None,
+                 metrics: MetricsRegistry = None, transport: httpx.AsyncBaseTransport = None,
+                 http2: bool = True):
+        self.base_url = base_url.rstrip("/")
+        self.health = health or BackendHealth(self.base_url)
+        self.metrics = metrics or REGISTRY
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self._limits = httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections)
+
+        # h2c client until the backend has answered over it once (None: nothing to find out)
+        self._h2c_client = None
+        self._h2c_confirmed = False
+        if transport is not None:
+            # A custom transport (e.g. httpx.MockTransport in tests) replaces the network layer
+            self.client = httpx.AsyncClient(base_url=self.base_url, transport=transport)
+        elif http2 and HTTP2_AVAILABLE and self.base_url.startswith("http://"):
+            self.client = self._h2c_client = self._new_client(http1=False, http2=True)
+        else:
+            self.client = self._new_client(http1=True, http2=http2 and HTTP2_AVAILABLE)
+
+    def _new_client(self, http1: bool, http2: bool) -> httpx.AsyncClient:
+        transport = httpx.AsyncHTTPTransport(http1=http1, http2=http2, limits=self._limits)
+        return httpx.AsyncClient(base_url=self.base_url, transport=transport)
+
+    async def request(self, method: str, path: str, *, timeout: float, json=None, headers: dict = None,
+                      idempotency_key: str = None, retry: bool = None, stream: bool = False) -> httpx.Response:
+        """
+        Sends a request and returns the response after raise_for_status() (see BackendTransport.request).
+        With stream=True the body is left unread; the caller must aclose() the response.
+        """
+        method = method.upper()
+        headers = dict(headers or {})
+        if method in KEYED_METHODS:
+            headers["Idempotency-Key"] = idempotency_key or uuid.uuid4().hex
+        if retry is None:
+            retry = method in IDEMPOTENT_METHODS
+
+        labels = {"backend": self.health.name, "endpoint": endpoint_name(method, path)}
+        with TRACER.span(f"http.{labels['endpoint']}", backend=self.health.name) as span:
+            headers["X-Request-ID"] = span.trace_id if span else uuid.uuid4().hex
+            if span:
+                headers["traceparent"] = span.traceparent()
+            response = await self._send(method, path, timeout, json, headers, retry, stream, labels)
+            if span:
+                span.set("status", response.status_code)
+            return response
+
+    async def _send(self, method, path, timeout, json, headers, retry, stream, labels) -> httpx.Response:
+        attempt = 0
+        while True:
+            try:
+                self.health.before_call()
+            except CircuitOpenError:
+                self.metrics.inc("http_errors_total", kind="circuit_open", **labels)
+                raise
+            connect, read = self.health.timeout_for(timeout, labels["endpoint"])
+            client = self.client
+            request = client.build_request(method, path, json=json, headers=headers,
+                                           timeout=httpx.Timeout(read, connect=connect))
+            started = time.perf_counter()
+            try:
+                response = await client.send(request, stream=stream)
+                if client is self._h2c_client:
+                    self._h2c_confirmed = True
+                latency = time.perf_counter() - started
+                await self._record_response(response, latency, labels, stream)  # Reads the body unless streaming
+            except (httpx.ConnectError, httpx.ConnectTimeout):
+                # Never reached the backend, so safe to retry (read timeouts are not, as with requests)
+                self.health.record_failure()
+                self.metrics.inc("http_errors_total", kind="connection", **labels)
+                if not retry or attempt >= self.max_retries:
+                    raise
+                attempt += 1
+                await self._sleep_before_retry(attempt, labels)
+                continue
+            except httpx.TimeoutException:
+                self.health.record_failure()
+                self.metrics.inc("http_errors_total", kind="timeout", **labels)
+                raise
+            except httpx.HTTPError:
+                if self._h2c_refused(client):
+                    # The backend never read the request (no HTTP/2 here); send it again over HTTP/1.1
+                    self.health.record_abandoned()
+                    continue
+                self.health.record_failure()
+                self.metrics.inc("http_errors_total", kind="request", **labels)
+                raise
+            except asyncio.CancelledError:
+                # The task was cancelled (e.g. a superseded prompt); says nothing about the backend
+                self.health.record_abandoned()
+                raise
+            except BaseException:
+                # A half-open probe must never stay in flight
+                self.health.record_failure()
+                raise
+
+            if response.status_code >= 500:
+                self.health.record_failure()
+            else:
+                self.health.record_success(latency, labels["endpoint"])
+
+            if retry and response.status_code in RETRY_STATUSES and attempt < self.max_retries:
+                await response.aclose()
+                attempt += 1
+                await self._sleep_before_retry(attempt, labels)
+                continue
+            if response.status_code >= 400:  # httpx would also raise for a 304
+                if stream:
+                    await response.aclose()
+                response.raise_for_status()
+            return response
+
+    async def _record_response(self, response: httpx.Response, latency: float, labels: dict, stream: bool):
+        self.metrics.observe("http_request_duration_seconds", latency, **labels)
+        if response.status_code >= 400:
+            kind = "http_5xx" if response.status_code >= 500 else "http_4xx"
+            self.metrics.inc("http_errors_total", kind=kind, **labels)
+        body = response.request.content if response.request is not None else None
+        if body:
+            self.metrics.inc("http_request_bytes_total", len(body), **labels)
+        if stream:
+            received = response.headers.get("Content-Length")
+        else:
+            received = len(await response.aread())
+        if received:
+            self.metrics.inc("http_response_bytes_total", int(received), **labels)
+
+    def _h2c_refused(self, client: httpx.AsyncClient) -> bool:
+        """True if *client* is the unconfirmed h2c client; switches to HTTP/1.1 (once)"""
+        if client is not self._h2c_client or self._h2c_confirmed:
+            return False
+        if self.client is client:
+            log.info("Backend does not speak HTTP/2 over plain http, using HTTP/1.1", backend=self.base_url)
+            self.client = self._new_client(http1=True, http2=False)
+        return True
+
+    def backoff_delay(self, attempt: int) -> float:
+        """Full-jitter backoff: uniform in [0, min(cap, base * 2^attempt)]"""
+        return random.uniform(0, min(self.backoff_cap, self.backoff_base * (2 ** attempt)))
+
+    async def _sleep_before_retry(self, attempt: int, labels: dict):
+        self.metrics.inc("http_retries_total", **labels)
+        delay = self.backoff_delay(attempt)
+        log.info("Retrying request", backend=self.base_url, attempt=attempt, max_retries=self.max_retries,
+                 delay_s=round(delay, 2))
+        await asyncio.sleep(delay)  # Other calls keep running on the loop meanwhile
+
+    async def close(self):
+        if self._h2c_client is not None and self._h2c_client is not self.client:
+            await self._h2c_client.aclose()
+        await self.client.aclose()
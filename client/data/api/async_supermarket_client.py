@@ -0,0 +1,140 @@
+import json
+
+import httpx
+from data.api.async_http_transport import AsyncBackendTransport
+from data.api.backend_health import BackendHealth
+from data.api.supermarket_client import CartResponse, SSEDecoder, cart_version, cart_push_url
+from telemetry.log import get_logger
+
+log = get_logger("api")
+
+
+class AsyncSupermarketAPIClient:
+    """
+    Async counterpart of SupermarketAPIClient built on httpx.
+
+    Each backend gets one AsyncBackendTransport (the same retries, Idempotency-Key replay, health
+    model, metrics and trace headers as BackendTransport). Concurrent calls to a backend (chat
+    message, cart fetch, ...) share its connections, as streams of one HTTP/2 connection when
+    h2 is installed and the backend speaks it (h2c for http URLs), so no call needs its own thread.
+    """
+
+    def __init__(self, base_url="http://localhost:8001", db_url="http://localhost:8000",
+                 agent_connections: int = 4, db_connections: int = 8, transport: httpx.AsyncBaseTransport = None):
+        self.base_url = base_url
+        self.db_url = db_url
+        # Same health floors as SupermarketAPIClient: a long LLM answer is not a sign of a hang
+        self.agent = AsyncBackendTransport(base_url, max_connections=agent_connections, transport=transport,
+                                           health=BackendHealth("agent", min_timeout=30.0))
+        self.db = AsyncBackendTransport(db_url, max_connections=db_connections, transport=transport,
+                                        health=BackendHealth("db", min_timeout=2.0))
+
+    # 1 - frontend to agent server
+    async def initialize_session(self) -> dict:
+        try:
+            response = await self.agent.request("POST", "/session/initialize", timeout=100)
+            log.payload("Session initialization response", lambda: response.text, every=1)
+            return response.json()
+        except httpx.ConnectError:
+            log.error("Agent server is not reachable", url=self.base_url)
+            raise Exception("No connection to Agent server on port 8001")
+        except Exception as e:
+            log.error("Session initialization failed", error=str(e))
+            raise Exception(f"API Error: {e}")
+
+    # 2 - frontend to agent server
+    async def send_message(self, prompt: str, user_id: str) -> dict:
+        log.debug("Sending request to agent", chars=len(prompt))
+        try:
+            response = await self.agent.request("POST", "/chat_message", json={"message": prompt}, timeout=100)
+            log.debug("Agent responded", status=response.status_code, http_version=response.http_version)
+            return response.json()
+        except httpx.ConnectError:
+            raise Exception("No connection to server")
+        except Exception as e:
+            raise Exception(f"API Error: {e}")
+
+    # 2b - frontend to agent server, streamed (same SSE contract as SupermarketAPIClient.stream_message)
+    async def stream_message(self, prompt: str, user_id: str):
+        log.debug("Streaming request to agent", chars=len(prompt))
+        headers = {"Accept": "text/event-stream, application/json"}
+        try:
+            response = await self.agent.request("POST", "/chat_message", json={"message": prompt},
+                                                headers=headers, timeout=100, stream=True)
+        except httpx.ConnectError:
+            raise Exception("No connection to server")
+        except Exception as e:
+            raise Exception(f"API Error: {e}")
+
+        try:
+            log.debug("Agent responded", status=response.status_code, http_version=response.http_version)
+            if not response.headers.get("Content-Type", "").startswith("text/event-stream"):
+                await response.aread()
+                yield response.json()
+                return
+
+            decoder = SSEDecoder()
+            async for line in response.aiter_lines():
+                data = decoder.feed(line)
+                if data == "[DONE]":
+                    return
+                if data is not None:
+                    yield json.loads(data)
+            data = decoder.flush()
+            if data is not None and data != "[DONE]":
+                yield json.loads(data)
+        except httpx.HTTPError as e:
+            raise Exception(f"API Error: {e}")
+        finally:
+            await response.aclose()
+
+    # 3 - frontend to DB server
+    async def get_cart_from_db(self, cart_id: str) -> dict:
+        return (await self.get_cart_versioned(cart_id)).json()
+
+    async def get_cart_versioned(self, cart_id: str, known_version: str = None) -> CartResponse:
+        """Conditional GET of the cart (see SupermarketAPIClient.get_cart_versioned)"""
+        headers = {"If-None-Match": known_version} if known_version else None
+        try:
+            response = await self.db.request("GET", f"/cart/{cart_id}", timeout=100, headers=headers)
+            if response.status_code == 304:
+                return CartResponse(version=known_version, not_modified=True)
+            return CartResponse(version=cart_version(response.headers), content=response.content)
+        except Exception as e:
+            raise Exception(f"DB API Error (get_cart): {e}")
+
+    # 4 - frontend to DB server
+    async def update_cart_item_in_db(self, cart_id: str, item_name: str, new_quantity: int) -> dict:
+        """Sends a PATCH request to the DB to update an item's quantity"""
+        return await self.update_cart_items_in_db(cart_id, {item_name: new_quantity})
+
+    async def update_cart_items_in_db(self, cart_id: str, quantities: dict) -> dict:
+        """Sends one batched PATCH request setting the quantity of every item in *quantities*"""
+        payload = {
+            "item_names": list(quantities.keys()),
+            "quantities": list(quantities.values())
+        }
+        try:
+            # Absolute quantities are safe to replay, so the PATCH may be retried
+            response = await self.db.request("PATCH", f"/cart/{cart_id}/items", json=payload, timeout=60, retry=True)
+            return response.json()
+        except Exception as e:
+            raise Exception(f"DB API Error (update_items): {e}")
+
+    # 5 - frontend to DB server
+    async def optimize_cart_in_db(self, cart_id: str) -> dict:
+        """Sends a POST request to re-optimize the cart based on current items"""
+        try:
+            # Re-running it is harmless
+            response = await self.db.request("POST", f"/cart/{cart_id}/optimize", timeout=60, retry=True)
+            return response.json()
+        except Exception as e:
+            raise Exception(f"DB API Error (optimize): {e}")
+
+    # 6 - DB server to frontend (push subscription, consumed by core.cart_push_channel)
+    def cart_push_url(self, cart_id: str) -> str:
+        return cart_push_url(self.db_url, cart_id)
+
+    async def close(self):
+        await self.agent.close()
+        await self.db.close()
@@ -0,0 +1,124 @@
+import threading
+import time
+from collections import deque
+
+import requests
+from telemetry.log import get_logger
+
+log = get_logger("health")
+
+# Circuit breaker states
+CLOSED = "closed"        # Healthy: calls go through
+OPEN = "open"            # Failing: calls fail fast without touching the network
+HALF_OPEN = "half_open"  # Cooling down is over: one probe call decides whether to close again
+
+
+class CircuitOpenError(requests.exceptions.ConnectionError):
+    """Raised instead of a network call while a backend's circuit is open"""
+
+
+class BackendHealth:
+    """
+    Health model for one backend (agent or DB): observed latencies + circuit breaker.
+
+    Timeouts adapt to the recent p99 latency of the endpoint being called (p99 * multiplier,
+    clamped between min_timeout and the caller's fixed timeout), so a hung server is detected in
+    seconds instead of a minute. Latencies are kept per endpoint (method + path template): a
+    slow /optimize is never cut off by a timeout learned from fast cart GETs. After failure_threshold consecutive failures the circuit opens and
+    calls fail fast; after reset_timeout one half-open probe is let through.
+    """
+
+    def __init__(self, name: str, min_timeout: float = 2.0, connect_timeout: float = 3.0,
+                 multiplier: float = 4.0, window: int = 100, min_samples: int = 20,
+                 failure_threshold: int = 5, reset_timeout: float = 10.0, clock=time.monotonic):
+        self.name = name
+        self.min_timeout = min_timeout
+        self.connect_timeout = connect_timeout
+        self.multiplier = multiplier
+        self.min_samples = min_samples
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._clock = clock
+
+        self.window = window
+        self._latencies = {}  # endpoint -> deque of recent latencies
+        self._state = CLOSED
+        self._consecutive_failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self._listeners = []
+        self._lock = threading.RLock()
+
+    # --- Observability ---
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._state
+
+    def add_listener(self, callback):
+        """callback(backend_name, new_state) is called (on the calling thread) on every state change"""
+        self._listeners.append(callback)
+
+    def p99(self, endpoint: str = None):
+        with self._lock:
+            latencies = self._latencies.get(endpoint, ())
+            if len(latencies) < self.min_samples:
+                return None
+            ordered = sorted(latencies)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))]
+
+    # --- Adaptive timeouts ---
+    def timeout_for(self, default: float, endpoint: str = None):
+        """(connect, read) timeout for a call to *endpoint* whose fixed timeout used to be *default*"""
+        p99 = self.p99(endpoint)
+        if p99 is None:
+            return (min(self.connect_timeout, default), default)
+        read = max(self.min_timeout, min(default, p99 * self.multiplier))
+        return (min(self.connect_timeout, read), read)
+
+    # --- Circuit breaker ---
+    def before_call(self):
+        """Raises CircuitOpenError if the call must fail fast; otherwise lets it through"""
+        with self._lock:
+            if self._state == CLOSED:
+                return
+            if self._state == OPEN and self._clock() - self._opened_at >= self.reset_timeout:
+                self._set_state(HALF_OPEN)
+            if self._state == HALF_OPEN and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return
+        raise CircuitOpenError(f"{self.name} backend unavailable (circuit open)")
+
+    def record_success(self, latency: float, endpoint: str = None):
+        with self._lock:
+            latencies = self._latencies.get(endpoint)
+            if latencies is None:
+                latencies = self._latencies[endpoint] = deque(maxlen=self.window)
+            latencies.append(latency)
+            self._consecutive_failures = 0
+            self._probe_in_flight = False
+            if self._state != CLOSED:
+                self._set_state(CLOSED)
+
+    def record_failure(self):
+        with self._lock:
+            self._consecutive_failures += 1
+            was_probe = self._probe_in_flight
+            self._probe_in_flight = False
+            if was_probe or (self._state == CLOSED and self._consecutive_failures >= self.failure_threshold):
+                self._opened_at = self._clock()
+                self._set_state(OPEN)
+
+    def record_abandoned(self):
+        """The caller gave up without an answer (a cancelled coroutine): frees the probe, no verdict"""
+        with self._lock:
+            self._probe_in_flight = False
+
+    def _set_state(self, state: str):
+        # Called with the lock held (re-entrant, so listeners may read .state)
+        if state == self._state:
+            return
+        self._state = state
+        log.warning("Backend circuit changed state", backend=self.name, state=state)
+        for callback in self._listeners:
+            callback(self.name, state)
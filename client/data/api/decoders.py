@@ -0,0 +1,119 @@
+import json
+from typing import List, Optional, Union
+from models.types import StoreResult, CartItem, CartDelta
+
+# msgspec is optional: with it, payload bytes are decoded straight into typed structs
+# (no intermediate dicts); without it we fall back to json + dict mapping.
+try:
+    import msgspec
+    MSGSPEC_AVAILABLE = True
+except ImportError:
+    msgspec = None
+    MSGSPEC_AVAILABLE = False
+
+
+# --- Dict mapping (lenient; used for already-decoded payloads and as the fallback) ---
+
+def _map_item(item: dict, idx: int) -> CartItem:
+    # Safely extract values: Backend might use 'item_name' or 'name'
+    item_name = item.get("item_name") or item.get("name") or f"Item {idx}"
+    # Make sure the ID is a string (fallback to item_name if no ID exists)
+    item_id = item.get("id")
+    return CartItem(
+        id=str(item_id) if item_id else item_name,
+        name=item_name,
+        quantity=int(item.get("quantity", 1)),
+        price=float(item.get("price", 0.0)),
+        image_url=item.get("image_url") or item.get("image") or None
+    )
+
+
+def map_cart_payload(data: dict) -> StoreResult:
+    """Converts a raw DB cart payload safely into the frontend model"""
+    cart_data = data.get("cart") or {}
+    items_objs = []
+    for idx, item in enumerate(cart_data.get("items") or []):
+        items_objs.append(_map_item(item, idx))
+
+    # Extract store info safely
+    return StoreResult(
+        store_name=cart_data.get("store_name") or "Supermarket",
+        address=cart_data.get("address") or "",
+        total_price=float(cart_data.get("total_price") or 0.0),
+        items=items_objs
+    )
+
+
+def map_cart_delta(data: dict) -> CartDelta:
+    """Converts a pushed {"type": "delta", ...} message into a CartDelta"""
+    total_price = data.get("total_price")
+    base_version = data.get("base_version")
+    return CartDelta(
+        version=str(data.get("version")),
+        base_version=str(base_version) if base_version is not None else None,
+        upserts=[_map_item(item, idx) for idx, item in enumerate(data.get("upserts") or [])],
+        removed=[str(item_id) for item_id in data.get("removed") or []],
+        store_name=data.get("store_name"),
+        address=data.get("address"),
+        total_price=float(total_price) if total_price is not None else None
+    )
+
+
+# --- Typed wire schema (msgspec) ---
+
+if MSGSPEC_AVAILABLE:
+    class _WireItem(msgspec.Struct):
+        id: Union[str, int, None] = None
+        item_name: Optional[str] = None
+        name: Optional[str] = None  # Alias some backends use instead of item_name
+        quantity: Union[int, float] = 1
+        price: float = 0.0
+        image_url: Optional[str] = None
+        image: Optional[str] = None  # Alias some backends use instead of image_url
+
+    class _WireCart(msgspec.Struct):
+        store_name: Optional[str] = None
+        address: Optional[str] = None
+        total_price: Optional[float] = None
+        items: List[_WireItem] = []
+
+    class _WireCartEnvelope(msgspec.Struct):
+        cart: Optional[_WireCart] = None
+
+    _cart_decoder = msgspec.json.Decoder(_WireCartEnvelope)
+
+
+def _store_result_from_wire(envelope) -> StoreResult:
+    cart = envelope.cart or _WireCart()
+    items_objs = []
+    append = items_objs.append
+    for idx, item in enumerate(cart.items):
+        item_name = item.item_name or item.name or f"Item {idx}"
+        item_id = item.id
+        append(CartItem(
+            id=str(item_id) if item_id else item_name,
+            name=item_name,
+            quantity=int(item.quantity),
+            price=item.price,
+            image_url=item.image_url or item.image
+        ))
+    return StoreResult(
+        store_name=cart.store_name or "Supermarket",
+        address=cart.address or "",
+        total_price=cart.total_price or 0.0,
+        items=items_objs
+    )
+
+
+def decode_cart_payload(content: bytes) -> StoreResult:
+    """
+    Decodes a DB cart response body (bytes) directly into a StoreResult.
+    Payloads that don't fit the typed schema (e.g. prices sent as strings) take the lenient path.
+    """
+    if MSGSPEC_AVAILABLE:
+        try:
+            return _store_result_from_wire(_cart_decoder.decode(content))
+        except msgspec.ValidationError:
+            pass
+    return map_cart_payload(json.loads(content))
+
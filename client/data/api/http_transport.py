@@ -0,0 +1,162 @@
+import random
+import time
+import uuid
+
+import requests
+from requests.adapters import HTTPAdapter
+from data.api.backend_health import BackendHealth, CircuitOpenError
+from telemetry.metrics import REGISTRY, MetricsRegistry, endpoint_name
+from telemetry.tracing import TRACER
+from telemetry.log import get_logger
+
+log = get_logger("transport")
+
+# Methods that are safe to repeat without side effects (RFC 9110)
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS", "PUT", "DELETE"})
+
+# Methods that get an Idempotency-Key header so the backend can de-duplicate replays
+KEYED_METHODS = frozenset({"POST", "PATCH"})
+
+# Gateway-style failures that are worth retrying; everything else surfaces immediately
+RETRY_STATUSES = frozenset({502, 503, 504})
+
+
+class BackendTransport:
+    """
+    Keep-alive connection pool for a single backend (agent or DB).
+
+    Every call goes through one shared requests.Session, so TCP (and TLS)
+    connections are reused instead of being opened per request. Idempotent
+    calls are retried with exponential backoff and full jitter.
+    """
+
+    def __init__(self, base_url: str, pool_connections: int = 1, pool_maxsize: int = 4,
+                 max_retries: int = 2, backoff_base: float = 0.1, backoff_cap: float = 2.0,
+                 health: BackendHealth = None, metrics: MetricsRegistry = None):
+        self.base_url = base_url.rstrip("/")
+        # Latency-based timeouts + circuit breaker for this backend
+        self.health = health or BackendHealth(self.base_url)
+        # Latency histograms and error/retry/byte counters, labelled by backend + endpoint
+        self.metrics = metrics or REGISTRY
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+
+        self.session = requests.Session()
+        # Retries are decided per call in request(), so the adapter itself never retries
+
+        adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize, max_retries=0)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def url(self, path: str) -> str:
+        return f"{self.base_url}{path}"
+
+    def request(self, method: str, path: str, *, timeout: float, json=None, headers: dict = None,
+                idempotency_key: str = None, retry: bool = None, stream: bool = False) -> requests.Response:
+        """
+        Sends a request on the pooled session and returns the response after raise_for_status().
+
+        POST/PATCH always carry an Idempotency-Key (generated if not given) that stays the same
+        across retries. They are only retried when the caller passes retry=True, i.e. when the
+        call is known to be safe to replay (e.g. setting absolute quantities).
+        With stream=True the body is left unread; the caller must close the response.
+        Every call carries an X-Request-ID (the trace id inside a traced user action, plus a
+        W3C traceparent header) so it can be found in the backend's logs.
+        """
+        method = method.upper()
+        headers = dict(headers or {})
+        if method in KEYED_METHODS:
+            headers["Idempotency-Key"] = idempotency_key or uuid.uuid4().hex
+        if retry is None:
+            retry = method in IDEMPOTENT_METHODS
+
+        labels = {"backend": self.health.name, "endpoint": endpoint_name(method, path)}
+        with TRACER.span(f"http.{labels['endpoint']}", backend=self.health.name) as span:
+            # Correlates this call with the backend's logs; inside a user action it is the trace id
+            headers["X-Request-ID"] = span.trace_id if span else uuid.uuid4().hex
+            if span:
+                headers["traceparent"] = span.traceparent()
+            response = self._send(method, path, timeout, json, headers, retry, stream, labels)
+            if span:
+                span.set("status", response.status_code)
+            return response
+
+    def _send(self, method, path, timeout, json, headers, retry, stream, labels) -> requests.Response:
+        attempt = 0
+        while True:
+            # Fails fast with CircuitOpenError while the backend is known to be down
+            try:
+                self.health.before_call()
+            except CircuitOpenError:
+                self.metrics.inc("http_errors_total", kind="circuit_open", **labels)
+                raise
+            started = time.perf_counter()
+            try:
+                response = self.session.request(method, self.url(path), json=json, headers=headers,
+                                                timeout=self.health.timeout_for(timeout, labels["endpoint"]), stream=stream)
+                latency = time.perf_counter() - started
+                self._record_response(response, latency, labels, stream)  # Reads the body unless streaming
+            except requests.exceptions.ConnectionError:
+                # ConnectTimeout is a ConnectionError as well; read timeouts are not retried
+                # because the request may already have been processed.
+                self.health.record_failure()
+                self.metrics.inc("http_errors_total", kind="connection", **labels)
+                if not retry or attempt >= self.max_retries:
+                    raise
+                attempt += 1
+                self._sleep_before_retry(attempt, labels)
+                continue
+            except requests.exceptions.Timeout:
+                self.health.record_failure()
+                self.metrics.inc("http_errors_total", kind="timeout", **labels)
+                raise
+            except requests.RequestException:
+                # Broken body, redirect loop, invalid URL...: the call failed all the same
+                self.health.record_failure()
+                self.metrics.inc("http_errors_total", kind="request", **labels)
+                raise
+            except BaseException:
+                # Not the backend's fault, but a half-open probe must never stay in flight
+                self.health.record_failure()
+                raise
+
+            if response.status_code >= 500:
+                self.health.record_failure()
+            else:
+                self.health.record_success(latency, labels["endpoint"])
+
+            if retry and response.status_code in RETRY_STATUSES and attempt < self.max_retries:
+                response.close()
+                attempt += 1
+                self._sleep_before_retry(attempt, labels)
+                continue
+            response.raise_for_status()
+            return response
+
+    def _record_response(self, response: requests.Response, latency: float, labels: dict, stream: bool):
+        # For streams this is the time to the response headers; the body is not read yet
+        self.metrics.observe("http_request_duration_seconds", latency, **labels)
+        if response.status_code >= 400:
+            kind = "http_5xx" if response.status_code >= 500 else "http_4xx"
+            self.metrics.inc("http_errors_total", kind=kind, **labels)
+        body = response.request.body if response.request is not None else None
+        if body:
+            self.metrics.inc("http_request_bytes_total", len(body), **labels)
+        received = response.headers.get("Content-Length") if stream else len(response.content)
+        if received:
+            self.metrics.inc("http_response_bytes_total", int(received), **labels)
+
+    def backoff_delay(self, attempt: int) -> float:
+        """Full-jitter backoff: uniform in [0, min(cap, base * 2^attempt)]"""
+        return random.uniform(0, min(self.backoff_cap, self.backoff_base * (2 ** attempt)))
+
+    def _sleep_before_retry(self, attempt: int, labels: dict):
+        self.metrics.inc("http_retries_total", **labels)
+        delay = self.backoff_delay(attempt)
+        log.info("Retrying request", backend=self.base_url, attempt=attempt, max_retries=self.max_retries,
+                 delay_s=round(delay, 2))
+        time.sleep(delay)
+
+    def close(self):
+        self.session.close()
@@ -1,81 +1,207 @@
 import requests
 import json
+from dataclasses import dataclass
+from typing import Optional
 from models.types import StoreResult, ClarificationRequest, CartItem
+from data.api.http_transport import BackendTransport
+from data.api.backend_health import BackendHealth
+from telemetry.log import get_logger
+
+log = get_logger("api")
+
+
+@dataclass
+class CartResponse:
+    """Raw cart fetch result. The body stays undecoded until json() is called."""
+    version: Optional[str]
+    not_modified: bool = False
+    content: bytes = b""
+
+    def json(self) -> dict:
+        return json.loads(self.content)
+
+
+def cart_version(headers) -> Optional[str]:
+    """The cart's version as reported by the DB: its ETag, or an explicit X-Cart-Version header"""
+    return headers.get("ETag") or headers.get("X-Cart-Version")
+
+
+class SSEDecoder:
+    """Incremental Server-Sent Events parser: feed it lines, get back each event's `data` payload"""
+
+    def __init__(self):
+        self._data_lines = []
+
+    def feed(self, line: str):
+        """Returns the event's data once its terminating blank line arrives, otherwise None"""
+        if line == "":
+            return self.flush()
+        if line.startswith("data:"):
+            value = line[5:]
+            self._data_lines.append(value[1:] if value.startswith(" ") else value)
+        # "event:", "id:", "retry:" and ":" comments carry nothing we need
+        return None
+
+    def flush(self):
+        if not self._data_lines:
+            return None
+        data = "\n".join(self._data_lines)
+        self._data_lines = []
+        return data
+
+
+def iter_sse_data(lines):
+    """Yields the `data` field of each Server-Sent Event in an iterable of decoded lines"""
+    decoder = SSEDecoder()
+    for line in lines:
+        data = decoder.feed(line)
+        if data is not None:
+            yield data
+    data = decoder.flush()
+    if data is not None:
+        yield data
+
+
+def cart_push_url(db_url: str, cart_id: str) -> str:
+    """WebSocket URL of the DB's push channel for *cart_id* (http -> ws, https -> wss)"""
+    return f"ws{db_url.rstrip('/')[4:]}/ws/cart/{cart_id}"
+
 
 class SupermarketAPIClient:
-    def __init__(self, base_url="http://localhost:8001", db_url="http://localhost:8000"):
+    def __init__(self, base_url="http://localhost:8001", db_url="http://localhost:8000",
+                 agent_pool_size: int = 4, db_pool_size: int = 8):
         self.base_url = base_url
         self.db_url = db_url
-        
+        # One keep-alive pool per backend. The DB pool is larger because a single
+        # quantity click runs PATCH -> optimize -> GET and several clicks can overlap.
+        # Each backend also gets its own health model: adaptive timeouts + circuit breaker.
+        # The agent's floor is high because a long LLM answer is not a sign of a hang.
+        self.agent = BackendTransport(base_url, pool_maxsize=agent_pool_size,
+                                      health=BackendHealth("agent", min_timeout=30.0))
+        self.db = BackendTransport(db_url, pool_maxsize=db_pool_size,
+                                   health=BackendHealth("db", min_timeout=2.0))
+
     # 1 - frontend to agent server
     def initialize_session(self) -> dict:
-        url = f"{self.base_url}/session/initialize"
         try:
-            response = requests.post(url, timeout=100)
-            response.raise_for_status()
-            print(f"API Client: Session initialization response: {response.text}")
+            response = self.agent.request("POST", "/session/initialize", timeout=100)
+            log.payload("Session initialization response", lambda: response.text, every=1)
             return response.json()
         except requests.exceptions.ConnectionError:
-            print("ERROR: Agent server (8001) is not reachable.")
+            log.error("Agent server is not reachable", url=self.base_url)
             raise Exception("No connection to Agent server on port 8001")
         except Exception as e:
-            print(f"ERROR: Session initialization failed: {e}")
+            log.error("Session initialization failed", error=str(e))
             raise Exception(f"API Error: {e}")
 
     # 2 - frontend to agent server
     def send_message(self, prompt: str, user_id: str) -> dict:
-        url = f"{self.base_url}/chat_message"
-        
-        print(f"[2] CLIENT: Sending request to Agent (Port 8001)...")
-        
+        log.debug("Sending request to agent", chars=len(prompt))
+
         payload = {
             "message": prompt,
         }
-        
+
         try:
-            response = requests.post(url, json=payload, timeout=100)
-            response.raise_for_status()
-            print(f"[3] CLIENT: Agent responded! Status Code: {response.status_code}")
+            response = self.agent.request("POST", "/chat_message", json=payload, timeout=100)
+            log.debug("Agent responded", status=response.status_code)
             return response.json()
-            
+
+        except requests.exceptions.ConnectionError:
+            raise Exception("No connection to server")
+        except Exception as e:
+            raise Exception(f"API Error: {e}")
+
+    # 2b - frontend to agent server, streamed
+    def stream_message(self, prompt: str, user_id: str):
+        """
+        Yields the agent reply as it is generated.
+
+        The agent may answer with Server-Sent Events, where each `data:` line is either
+        {"delta": "..."} (a text chunk) or a full {"type": "response", ...} payload, and
+        `data: [DONE]` ends the stream. A backend that does not stream simply returns the
+        usual JSON body, which is yielded once as a single event.
+        """
+        log.debug("Streaming request to agent", chars=len(prompt))
+
+        payload = {
+            "message": prompt,
+        }
+
+        try:
+            response = self.agent.request("POST", "/chat_message", json=payload, timeout=100, stream=True,
+                                          headers={"Accept": "text/event-stream, application/json"})
         except requests.exceptions.ConnectionError:
             raise Exception("No connection to server")
         except Exception as e:
             raise Exception(f"API Error: {e}")
-    
+
+        with response:
+            log.debug("Agent responded", status=response.status_code,
+                      content_type=response.headers.get("Content-Type"))
+            if not response.headers.get("Content-Type", "").startswith("text/event-stream"):
+                yield response.json()
+                return
+
+            try:
+                for data in iter_sse_data(response.iter_lines(decode_unicode=True)):
+                    if data == "[DONE]":
+                        return
+                    yield json.loads(data)
+            except requests.exceptions.RequestException as e:
+                raise Exception(f"API Error: {e}")
+
     # 3 - frontend to DB server
     def get_cart_from_db(self, cart_id: str) -> dict:
-        url = f"{self.db_url}/cart/{cart_id}"
+        return self.get_cart_versioned(cart_id).json()
+
+    def get_cart_versioned(self, cart_id: str, known_version: str = None) -> "CartResponse":
+        """
+        Conditional GET of the cart. With known_version, the request carries If-None-Match and
+        a 304 comes back as CartResponse(not_modified=True) without a body.
+        """
+        headers = {"If-None-Match": known_version} if known_version else None
         try:
-            response = requests.get(url, timeout=100)
-            response.raise_for_status()
-            return response.json()
+            response = self.db.request("GET", f"/cart/{cart_id}", timeout=100, headers=headers)
+            if response.status_code == 304:
+                return CartResponse(version=known_version, not_modified=True)
+            return CartResponse(version=cart_version(response.headers), content=response.content)
         except Exception as e:
             raise Exception(f"DB API Error (get_cart): {e}")
-    
+
     # 4 - frontend to DB server
     def update_cart_item_in_db(self, cart_id: str, item_name: str, new_quantity: int) -> dict:
         """Sends a PATCH request to the DB to update an item's quantity"""
-        url = f"{self.db_url}/cart/{cart_id}/items"
+        return self.update_cart_items_in_db(cart_id, {item_name: new_quantity})
+
+    def update_cart_items_in_db(self, cart_id: str, quantities: dict) -> dict:
+        """Sends one batched PATCH request setting the quantity of every item in *quantities*"""
         payload = {
-            "item_names": [item_name],
-            "quantities": [new_quantity]
+            "item_names": list(quantities.keys()),
+            "quantities": list(quantities.values())
         }
         try:
-            response = requests.patch(url, json=payload, timeout=60)
-            response.raise_for_status()
+            # Absolute quantities are safe to replay, so the PATCH may be retried
+            response = self.db.request("PATCH", f"/cart/{cart_id}/items", json=payload, timeout=60, retry=True)
             return response.json()
         except Exception as e:
             raise Exception(f"DB API Error (update_items): {e}")
-    
+
     # 5 - frontend to DB server
     def optimize_cart_in_db(self, cart_id: str) -> dict:
         """Sends a POST request to re-optimize the cart based on current items"""
-        url = f"{self.db_url}/cart/{cart_id}/optimize"
         try:
-            # Empty POST request as required by the backend
-            response = requests.post(url, timeout=60) 
-            response.raise_for_status()
+            # Empty POST request as required by the backend; re-running it is harmless
+            response = self.db.request("POST", f"/cart/{cart_id}/optimize", timeout=60, retry=True)
             return response.json()
         except Exception as e:
-            raise Exception(f"DB API Error (optimize): {e}")
\ No newline at end of file
+            raise Exception(f"DB API Error (optimize): {e}")
+
+    # 6 - DB server to frontend (push subscription, consumed by core.cart_push_channel)
+    def cart_push_url(self, cart_id: str) -> str:
+        return cart_push_url(self.db_url, cart_id)
+
+    def close(self):
+        """Releases the pooled connections of both backends"""
+        self.agent.close()
+        self.db.close()
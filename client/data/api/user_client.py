@@ -1,12 +1,15 @@
 import time
 from models.user_models import UserProfile
+from telemetry.log import get_logger
+
+log = get_logger("user_api")
 
 class UserAPIClient:
     """
     Simulates a REST Client implementation.
     """
     def login(self, username: str) -> UserProfile:
-        print(f"[API] POST /auth/login payload={{'username': '{username}'}}")
+        log.debug("POST /auth/login", username=username)
         # Simulate Network Delay
         time.sleep(0.5)
         
@@ -17,7 +20,7 @@ class UserAPIClient:
         )
 
     def sync_profile(self, profile: UserProfile):
-        print(f"[API] PUT /users/{profile.id}")
+        log.debug("PUT /users/{id}", user_id=profile.id)
         time.sleep(0.2)
-        # In a real app, this would serialize to JSON
-        print(f"[API] Body: {profile.model_dump_json(indent=2)}")
+        # In a real app, this would serialize to JSON. The dump is sampled and only built when logged.
+        log.payload("Profile sync body", profile.model_dump_json, every=20, user_id=profile.id)
@@ -0,0 +1,263 @@
+import asyncio
+import time
+
+from models.types import StoreResult, ClarificationRequest
+from data.api.async_supermarket_client import AsyncSupermarketAPIClient
+from data.api.decoders import decode_cart_payload
+from data.repositories.supermarket_repo import CartRepositoryBase, parse_agent_response, _is_rejected
+from data.repositories.cart_cache import clone_store_result
+from data.repositories.single_flight import AsyncSingleFlight
+from data.repositories.mutation_journal import MutationJournal
+from telemetry.metrics import REGISTRY, timed_step
+from telemetry.log import get_logger
+
+log = get_logger("repo")
+
+
+class AsyncSupermarketRepository(CartRepositoryBase):
+    """
+    Async version of SupermarketRepository; same contract, coroutine methods. Shares its
+    bookkeeping (journal, generations, cart cache) through CartRepositoryBase, so a failed
+    update is journaled and shown with the pending changes, and a failed fetch keeps the last
+    known cart, exactly as on the requests path.
+    """
+
+    def __init__(self, api: AsyncSupermarketAPIClient = None, journal: MutationJournal = None):
+        super().__init__(api or AsyncSupermarketAPIClient(), journal)
+        self._flights = AsyncSingleFlight()
+        self._patch_lock = asyncio.Lock() # Keeps "read pending -> PATCH -> ack" atomic
+
+    @timed_step("send_prompt")
+    async def send_prompt_to_ai(self, user_text: str, user_id: str):
+        try:
+            raw_response = await self.api.send_message(user_text, user_id)
+            log.payload("Agent raw response", raw_response, every=20)
+            return parse_agent_response(raw_response)
+        except Exception as e:
+            log.error("Agent call failed", error=str(e))
+            return ClarificationRequest(question="Server Error", options=["Try Again"])
+
+    @timed_step("stream_prompt")
+    async def stream_prompt_to_ai(self, user_text: str, user_id: str, on_chunk):
+        """Calls on_chunk(text) (on the loop thread) for each piece of the reply; returns the full reply"""
+        try:
+            chunks = []
+            final_text = None
+            started = time.perf_counter()
+            async for event in self.api.stream_message(user_text, user_id):
+                delta = event.get("delta")
+                if delta:
+                    if not chunks:
+                        REGISTRY.observe("pipeline_step_duration_seconds", time.perf_counter() - started,
+                                         step="first_chunk")
+                    chunks.append(delta)
+                    on_chunk(delta)
+                elif event.get("type"):
+                    final_text = parse_agent_response(event)
+
+            if final_text is None:
+                return "".join(chunks)
+            if not chunks and final_text:
+                on_chunk(final_text)
+            return final_text
+        except Exception as e:
+            log.error("Agent stream failed", error=str(e))
+            return ClarificationRequest(question="Server Error", options=["Try Again"])
+
+    async def initialize_session(self) -> bool:
+        try:
+            result = await self.api.initialize_session()
+            message = result.get("data", {}).get("message", "Session started")
+            self.current_cart_id = result.get("data", {}).get("cart_id")
+            log.info("System ready", message=message, cart_id=self.current_cart_id)
+            return True
+        except Exception as e:
+            log.error("Failed to initialize session", error=str(e))
+            return False
+
+    async def fetch_cart(self, cart_id: str = None) -> StoreResult:
+        """Fetches the cart (default: the current one) from the DB and converts it safely to the frontend model"""
+        cart_id = cart_id or self.current_cart_id
+        if not cart_id:
+            log.warning("No cart id stored, cannot fetch")
+            return StoreResult("Empty Cart", "", 0.0, [])
+
+        result, shared = await self._flights.do(("fetch", cart_id, self._generation(cart_id)),
+                                                lambda: self._fetch_cart(cart_id))
+        if shared:
+            # Every caller gets its own copy; CartModel mutates items in place
+            log.debug("Cart fetch shared with a concurrent request", cart_id=cart_id)
+            return clone_store_result(result)
+        return result
+
+    @timed_step("fetch_cart")
+    async def _fetch_cart(self, cart_id: str) -> StoreResult:
+        try:
+            known_version = self.cart_cache.latest_version(cart_id)
+            log.debug("Fetching cart", cart_id=cart_id, cached_version=known_version)
+            response = await self.api.get_cart_versioned(cart_id, known_version)
+            if response.version:
+                cached = self.cart_cache.get(cart_id, response.version)
+                if cached is not None:
+                    log.debug("Cart unchanged, served from cache", cart_id=cart_id, version=response.version)
+                    return cached
+            if response.not_modified:
+                response = await self.api.get_cart_versioned(cart_id)
+
+            with REGISTRY.timed("pipeline_step_duration_seconds", step="decode_cart"):
+                result_model = decode_cart_payload(response.content)
+            if response.version:
+                self.cart_cache.put(cart_id, response.version, result_model)
+            log.debug("Cart fetched", cart_id=cart_id, items=len(result_model.items), bytes=len(response.content))
+            return result_model
+        except Exception as e:
+            log.error("Cart fetch failed", cart_id=cart_id, error=str(e))
+            # Degrade gracefully: keep showing the last cart we know instead of wiping the panel
+            last_known = self._last_known_cart(cart_id)
+            if last_known is not None:
+                return last_known
+            return StoreResult("Server Error", "", 0.0, [])
+
+    async def update_cart_item(self, item_id: str, new_quantity: int) -> StoreResult:
+        """Updates quantity, re-optimizes, and returns the fresh cart"""
+        return await self.update_cart_items({item_id: new_quantity})
+
+    @timed_step("update_pipeline")
+    async def update_cart_items(self, quantities: dict, cart_id: str = None) -> StoreResult:
+        """Applies a batch of {item_id: quantity} in one PATCH, re-optimizes once, and returns the fresh cart"""
+        cart_id = cart_id or self.current_cart_id
+        if not cart_id:
+            log.warning("Cannot update item: no active cart session")
+            return StoreResult("Error", "", 0.0, [])
+
+        if self.journal is not None and quantities:
+            # Write-ahead: the change survives a failed PATCH (or a crash) and is replayed later
+            self.journal.append(cart_id, quantities)
+
+        try:
+            async with self._patch_lock:
+                # Unsent older changes of this cart travel in the same PATCH, so nothing is reordered
+                batch, last_seq = self.journal.pending(cart_id) if self.journal is not None else (quantities, 0)
+                if batch:
+                    log.debug("Patching cart items", cart_id=cart_id, items=len(batch))
+                    try:
+                        with REGISTRY.timed("pipeline_step_duration_seconds", step="patch"):
+                            await self.api.update_cart_items_in_db(cart_id, batch)
+                    except Exception as e:
+                        if not _is_rejected(e):
+                            raise
+                        # The DB refused something in the batch; only the refused changes are dropped
+                        applied = await self._patch_item_by_item(cart_id, batch)
+                        if self.journal is not None:
+                            self.journal.ack(cart_id, last_seq)  # Applied or refused, none is pending
+                        if not applied:
+                            raise
+                    finally:
+                        self._mark_mutated(cart_id)
+                    if self.journal is not None:
+                        self.journal.ack(cart_id, last_seq)
+
+            await self._optimize(cart_id)
+            return await self.fetch_cart(cart_id)
+        except Exception as e:
+            log.error("Cart update failed", cart_id=cart_id, error=str(e))
+            if self.has_pending_mutations(cart_id):
+                log.info("Change kept in the offline journal; it will be replayed", cart_id=cart_id)
+                return self._cart_with_pending(cart_id)
+            return StoreResult("Update Failed", "", 0.0, [])
+
+    async def _patch_item_by_item(self, cart_id: str, batch: dict) -> int:
+        """Async twin of SupermarketRepository._patch_item_by_item; returns how many the DB accepted"""
+        if len(batch) == 1:
+            log.warning("Cart change rejected by the DB, dropped", cart_id=cart_id, quantities=batch)
+            return 0
+        applied = 0
+        for item_id, quantity in batch.items():
+            try:
+                await self.api.update_cart_items_in_db(cart_id, {item_id: quantity})
+                applied += 1
+            except Exception as e:
+                if not _is_rejected(e):
+                    raise
+                log.warning("Cart change rejected by the DB, dropped", cart_id=cart_id, item_id=item_id,
+                            quantity=quantity)
+        return applied
+
+    @timed_step("optimize_pipeline")
+    async def optimize_current_cart(self) -> StoreResult:
+        """Triggers DB optimization and returns the fresh cart state"""
+        if not self.current_cart_id:
+            log.warning("Cannot optimize: no active cart session")
+            return StoreResult("Error", "", 0.0, [])
+
+        try:
+            log.debug("Optimizing cart", cart_id=self.current_cart_id)
+            await self._optimize(self.current_cart_id)
+            return await self.fetch_cart()
+        except Exception as e:
+            log.error("Optimization failed", cart_id=self.current_cart_id, error=str(e))
+            return StoreResult("Optimization Failed", "", 0.0, [])
+
+    async def _optimize(self, cart_id: str):
+        """Runs optimize_cart_in_db once for all concurrent callers of the same cart state"""
+        @timed_step("optimize")
+        async def run():
+            try:
+                return await self.api.optimize_cart_in_db(cart_id)
+            finally:
+                self._mark_mutated(cart_id)
+        return (await self._flights.do(("optimize", cart_id, self._generation(cart_id)), run))[0]
+
+
+class BlockingRepository:
+    """
+    Thin synchronous wrapper exposing the SupermarketRepository API on top of the async one.
+    Every call is run on the shared asyncio loop (see core.async_bridge.AsyncBridge), so
+    existing callers keep working while all traffic shares the backends' connections. The
+    controller's workers bypass it: AsyncTaskExecutor awaits them on the loop via async_repo.
+    """
+
+    def __init__(self, async_repo: AsyncSupermarketRepository, bridge):
+        self.async_repo = async_repo
+        self.bridge = bridge
+
+    @property
+    def current_cart_id(self):
+        return self.async_repo.current_cart_id
+
+    @current_cart_id.setter
+    def current_cart_id(self, value):
+        self.async_repo.current_cart_id = value
+
+    def backend_health(self) -> dict:
+        return self.async_repo.backend_health()
+
+    def has_pending_mutations(self, cart_id: str = None) -> bool:
+        return self.async_repo.has_pending_mutations(cart_id)
+
+    def pending_mutation_carts(self) -> list:
+        return self.async_repo.pending_mutation_carts()
+
+    def cart_push_url(self):
+        return self.async_repo.cart_push_url()
+
+    def send_prompt_to_ai(self, user_text: str, user_id: str):
+        return self.bridge.run_sync(self.async_repo.send_prompt_to_ai(user_text, user_id))
+
+    def stream_prompt_to_ai(self, user_text: str, user_id: str, on_chunk):
+        return self.bridge.run_sync(self.async_repo.stream_prompt_to_ai(user_text, user_id, on_chunk))
+
+    def initialize_session(self) -> bool:
+        return self.bridge.run_sync(self.async_repo.initialize_session())
+
+    def fetch_cart(self, cart_id: str = None) -> StoreResult:
+        return self.bridge.run_sync(self.async_repo.fetch_cart(cart_id))
+
+    def update_cart_item(self, item_id: str, new_quantity: int) -> StoreResult:
+        return self.bridge.run_sync(self.async_repo.update_cart_item(item_id, new_quantity))
+
+    def update_cart_items(self, quantities: dict, cart_id: str = None) -> StoreResult:
+        return self.bridge.run_sync(self.async_repo.update_cart_items(quantities, cart_id))
+
+    def optimize_current_cart(self) -> StoreResult:
+        return self.bridge.run_sync(self.async_repo.optimize_current_cart())
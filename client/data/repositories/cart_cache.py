@@ -0,0 +1,57 @@
+import threading
+from collections import OrderedDict
+from dataclasses import replace
+from typing import Optional
+from models.types import StoreResult
+
+
+def clone_store_result(result: StoreResult) -> StoreResult:
+    """Copies the result and its items; CartModel mutates items in place, the cache must not see that"""
+    return replace(result, items=[replace(item) for item in result.items])
+
+
+class CartCache:
+    """
+    In-memory cache of mapped StoreResults keyed by (cart_id, version).
+
+    The version is whatever the DB reports for the cart (ETag / X-Cart-Version). Entries are
+    evicted least-recently-used once max_entries is reached. Safe to use from worker threads.
+    """
+
+    def __init__(self, max_entries: int = 16):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # (cart_id, version) -> StoreResult
+        self._latest = {}              # cart_id -> newest version seen
+        self._lock = threading.Lock()
+
+    def latest_version(self, cart_id: str) -> Optional[str]:
+        with self._lock:
+            return self._latest.get(cart_id)
+
+    def get(self, cart_id: str, version: str) -> Optional[StoreResult]:
+        with self._lock:
+            result = self._entries.get((cart_id, version))
+            if result is None:
+                return None
+            self._entries.move_to_end((cart_id, version))
+        return clone_store_result(result)
+
+    def put(self, cart_id: str, version: str, result: StoreResult):
+        with self._lock:
+            self._entries[(cart_id, version)] = clone_store_result(result)
+            self._entries.move_to_end((cart_id, version))
+            self._latest[cart_id] = version
+            while len(self._entries) > self.max_entries:
+                (old_cart, old_version), _ = self._entries.popitem(last=False)
+                if self._latest.get(old_cart) == old_version:
+                    del self._latest[old_cart]
+
+    def invalidate(self, cart_id: str = None):
+        with self._lock:
+            if cart_id is None:
+                self._entries.clear()
+                self._latest.clear()
+                return
+            for key in [key for key in self._entries if key[0] == cart_id]:
+                del self._entries[key]
+            self._latest.pop(cart_id, None)
@@ -0,0 +1,165 @@
+import json
+import os
+import threading
+from collections import OrderedDict
+from telemetry.log import get_logger
+
+log = get_logger("journal")
+
+
+def default_journal_path() -> str:
+    return os.path.join(os.path.expanduser("~"), ".supermarket_agent", "pending_cart_mutations.jsonl")
+
+
+class MutationJournal:
+    """
+    Append-only on-disk log of cart quantity changes that have not reached the DB yet.
+
+    Each change is one JSON line {"seq", "cart", "item", "qty"}; once the DB has applied a
+    cart's changes up to some seq, an {"ack", "seq"} line retires them. Quantities are absolute,
+    so only the newest change per (cart, item) matters: when the file grows past max_bytes it is
+    rewritten with just the pending changes, which keeps it bounded by the number of distinct
+    pending items. Writes reach the OS immediately but are fsync'ed by a background thread at
+    most every fsync_interval seconds, so clicks never wait for the disk.
+    """
+
+    def __init__(self, path: str = None, max_bytes: int = 64 * 1024, fsync_interval: float = 0.1):
+        self.path = path or default_journal_path()
+        self.max_bytes = max_bytes
+        self.fsync_interval = fsync_interval
+
+        self._pending = OrderedDict()  # (cart_id, item_id) -> (seq, quantity), oldest first
+        self._seq = 0
+        self._lock = threading.Lock()
+        self._dirty = False
+
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self._load()
+        self._file = None
+        self._rewrite()  # Start from a compacted file (drops acked and superseded lines)
+
+        self._closed = threading.Event()
+        self._sync_thread = threading.Thread(target=self._sync_loop, name="journal-fsync", daemon=True)
+        self._sync_thread.start()
+
+    # --- Recording ---
+    def append(self, cart_id: str, quantities: dict) -> int:
+        """Records {item_id: quantity} for cart_id and returns the seq of the last record"""
+        with self._lock:
+            lines = []
+            for item_id, quantity in quantities.items():
+                self._seq += 1
+                key = (cart_id, item_id)
+                self._pending.pop(key, None)
+                self._pending[key] = (self._seq, quantity)
+                lines.append(json.dumps({"seq": self._seq, "cart": cart_id, "item": item_id, "qty": quantity}))
+            if lines:
+                self._write("\n".join(lines) + "\n")
+            return self._seq
+
+    def ack(self, cart_id: str, upto_seq: int):
+        """Retires every pending change of cart_id with seq <= upto_seq (the DB has applied them)"""
+        with self._lock:
+            done = [key for key, (seq, _) in self._pending.items() if key[0] == cart_id and seq <= upto_seq]
+            if not done:
+                return
+            for key in done:
+                del self._pending[key]
+            self._write(json.dumps({"ack": cart_id, "seq": upto_seq}) + "\n")
+
+    # --- Reading ---
+    def pending(self, cart_id: str):
+        """({item_id: quantity} in the order they were made, highest seq) for cart_id"""
+        with self._lock:
+            quantities = {}
+            last_seq = 0
+            for (cart, item_id), (seq, quantity) in self._pending.items():
+                if cart == cart_id:
+                    quantities[item_id] = quantity
+                    last_seq = max(last_seq, seq)
+            return quantities, last_seq
+
+    def pending_carts(self) -> list:
+        """Cart ids with pending changes, the one with the oldest change first"""
+        with self._lock:
+            return list(dict.fromkeys(cart for cart, _ in self._pending))
+
+    def has_pending(self, cart_id: str = None) -> bool:
+        with self._lock:
+            return any(cart_id is None or cart == cart_id for cart, _ in self._pending)
+
+    # --- Durability ---
+    def sync(self):
+        """fsyncs everything written so far (called periodically and on close)"""
+        with self._lock:
+            if self._dirty and self._file:
+                self._file.flush()
+                os.fsync(self._file.fileno())
+                self._dirty = False
+
+    def close(self):
+        self._closed.set()
+        self._sync_thread.join(timeout=1)
+        self.sync()
+        with self._lock:
+            self._file.close()
+            self._file = None
+
+    def size(self) -> int:
+        return self._size
+
+    def _sync_loop(self):
+        while not self._closed.wait(self.fsync_interval):
+            self.sync()
+
+    def _write(self, text: str):
+        # Called with the lock held
+        data = text.encode("utf-8")
+        self._file.write(data)
+        self._file.flush()  # Hand it to the OS now; the fsync is batched
+        self._size += len(data)
+        self._dirty = True
+        if self._size > self.max_bytes:
+            self._rewrite()
+
+    def _rewrite(self):
+        """Compaction: atomically replaces the file with one line per pending change"""
+        if self._file:
+            self._file.close()
+        ordered = sorted(self._pending.items(), key=lambda entry: entry[1][0])
+        data = "".join(json.dumps({"seq": seq, "cart": cart, "item": item_id, "qty": quantity}) + "\n"
+                       for (cart, item_id), (seq, quantity) in ordered).encode("utf-8")
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "wb") as tmp:
+            tmp.write(data)
+            tmp.flush()
+            os.fsync(tmp.fileno())
+        os.replace(tmp_path, self.path)
+        self._file = open(self.path, "ab")
+        self._size = len(data)
+        self._dirty = False
+        if self._size > self.max_bytes:
+            log.warning("Journal still over its size limit after compaction", pending=len(ordered), bytes=self._size)
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, "rb") as f:
+            for raw in f:
+                try:
+                    record = json.loads(raw)
+                except ValueError:
+                    # A torn last line from a crash mid-write; everything before it is intact
+                    log.warning("Skipping unreadable journal record", path=self.path)
+                    continue
+                if "ack" in record:
+                    cart_id, upto = record["ack"], record["seq"]
+                    for key in [key for key, (seq, _) in self._pending.items() if key[0] == cart_id and seq <= upto]:
+                        del self._pending[key]
+                else:
+                    key = (record["cart"], record["item"])
+                    self._pending.pop(key, None)
+                    self._pending[key] = (record["seq"], record["qty"])
+                self._seq = max(self._seq, record["seq"])
+        if self._pending:
+            log.info("Cart changes from a previous run are waiting to be sent", pending=len(self._pending))
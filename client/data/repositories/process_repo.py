@@ -0,0 +1,295 @@
+import itertools
+import multiprocessing
+import pickle
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from models.types import StoreResult, ClarificationRequest, CartItem
+from data.api.supermarket_client import SupermarketAPIClient
+from data.api.backend_health import CLOSED
+from data.repositories.supermarket_repo import SupermarketRepository
+from data.repositories.mutation_journal import MutationJournal
+from telemetry.metrics import REGISTRY
+from telemetry.log import get_logger, configure_logging, shutdown_logging
+
+log = get_logger("ipc")
+
+# Wire protocol: every frame is one pickled tuple sent with Connection.send_bytes.
+#   GUI -> child   (call_id, method, args)   call_id 0 expects no reply
+#   child -> GUI   (call_id, kind, value)    kind: "ok" | "error" | "chunk" | "health"
+# Carts cross as plain tuples instead of dataclasses: smaller frames and cheaper unpickling.
+PROTOCOL = pickle.HIGHEST_PROTOCOL
+
+
+class RepositoryProcessError(ConnectionError):
+    """The repository process exited (or was closed) before answering"""
+
+
+def pack(value):
+    if isinstance(value, StoreResult):
+        return ("cart", value.store_name, value.address, value.total_price,
+                [(item.id, item.name, item.quantity, item.price, item.image_url) for item in value.items])
+    if isinstance(value, ClarificationRequest):
+        return ("clarify", value.question, value.options)
+    return ("value", value)
+
+
+def unpack(frame):
+    kind = frame[0]
+    if kind == "cart":
+        return StoreResult(frame[1], frame[2], frame[3], [CartItem(*item) for item in frame[4]])
+    if kind == "clarify":
+        return ClarificationRequest(frame[1], frame[2])
+    return frame[1]
+
+
+def build_repository(base_url: str = None, db_url: str = None, journal: bool = True,
+                     journal_path: str = None) -> SupermarketRepository:
+    """The repository hosted by the child process (same defaults as the in-process one)"""
+    urls = {key: url for key, url in (("base_url", base_url), ("db_url", db_url)) if url}
+    return SupermarketRepository(SupermarketAPIClient(**urls),
+                                 journal=MutationJournal(journal_path) if journal else None)
+
+
+# --- Child process ---
+def _initialize_session(repo):
+    # The cart id is set by the session call, so it travels back with the result
+    return repo.initialize_session(), repo.current_cart_id
+
+
+_CALLS = {
+    "send_prompt_to_ai": SupermarketRepository.send_prompt_to_ai,
+    "stream_prompt_to_ai": SupermarketRepository.stream_prompt_to_ai,
+    "initialize_session": _initialize_session,
+    "fetch_cart": SupermarketRepository.fetch_cart,
+    "update_cart_item": SupermarketRepository.update_cart_item,
+    "update_cart_items": SupermarketRepository.update_cart_items,
+    "optimize_current_cart": SupermarketRepository.optimize_current_cart,
+    "has_pending_mutations": SupermarketRepository.has_pending_mutations,
+    "pending_mutation_carts": SupermarketRepository.pending_mutation_carts,
+    "cart_push_url": SupermarketRepository.cart_push_url,
+}
+
+
+def _error_value(error: Exception):
+    try:
+        pickle.dumps(error, PROTOCOL)
+        return error
+    except Exception:
+        return RuntimeError(f"{type(error).__name__}: {error}")
+
+
+def serve(conn, options: dict, max_calls: int = 8):
+    """Child process entry point: runs repository calls from the GUI on a small thread pool"""
+    configure_logging()
+    repo = build_repository(**options)
+    send_lock = threading.Lock()
+
+    def send(call_id, kind, value):
+        frame = pickle.dumps((call_id, kind, value), PROTOCOL)
+        try:
+            with send_lock:
+                conn.send_bytes(frame)
+        except OSError:
+            pass  # The GUI is gone; nobody is waiting for this answer
+
+    def run(call_id, method, args):
+        try:
+            if method == "stream_prompt_to_ai":
+                args = args + (lambda chunk: send(call_id, "chunk", chunk),)
+            send(call_id, "ok", pack(_CALLS[method](repo, *args)))
+        except Exception as e:
+            send(call_id, "error", _error_value(e))
+
+    for health in repo.backend_health().values():
+        health.add_listener(lambda backend, state: send(0, "health", (backend, state)))
+
+    log.info("Repository process ready", pid=multiprocessing.current_process().pid)
+    with ThreadPoolExecutor(max_workers=max_calls, thread_name_prefix="repo-call") as pool:
+        while True:
+            try:
+                call_id, method, args = pickle.loads(conn.recv_bytes())
+            except (EOFError, OSError):
+                break
+            if method == "close":
+                break
+            if method == "set_cart_id":
+                # Applied in arrival order, so calls sent after the change see the new cart
+                repo.current_cart_id = args[0]
+                continue
+            pool.submit(run, call_id, method, args)
+    if repo.journal is not None:
+        repo.journal.close()
+    conn.close()
+    shutdown_logging()
+
+
+# --- GUI process ---
+class RemoteHealth:
+    """GUI-side stand-in for a BackendHealth that lives in the repository process"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.state = CLOSED
+        self._listeners = []
+
+    def add_listener(self, callback):
+        """callback(backend_name, new_state) is called on the IPC reader thread"""
+        self._listeners.append(callback)
+
+    def _set_state(self, state: str):
+        self.state = state
+        for callback in list(self._listeners):
+            callback(self.name, state)
+
+
+class ProcessRepository:
+    """
+    SupermarketRepository API backed by a repository hosted in a child process.
+
+    HTTP, JSON decoding and response mapping run in the child, so they never compete with Qt
+    painting for the GUI process's GIL; the GUI only unpickles compact tuples on a reader
+    thread. Calls block the calling (worker) thread exactly like the in-process repository,
+    and streamed chunks are passed to on_chunk on that same thread, so workers are unchanged.
+    Options are passed to build_repository in the child. The child's own metrics and traces
+    stay in the child; the GUI records the round-trip time of every call.
+    """
+
+    def __init__(self, registry=REGISTRY, **options):
+        self.registry = registry
+        context = multiprocessing.get_context("spawn")  # fork would copy locks held by Qt's threads
+        self._conn, child_conn = context.Pipe()
+        self.process = context.Process(target=serve, args=(child_conn, options),
+                                       name="supermarket-repo", daemon=True)
+        self.process.start()
+        child_conn.close()
+
+        self._current_cart_id = None
+        self._health = {"agent": RemoteHealth("agent"), "db": RemoteHealth("db")}
+        self._ids = itertools.count(1)
+        self._calls = {}  # call_id -> SimpleQueue of (kind, value) for the waiting thread
+        self._lock = threading.Lock()
+        self._send_lock = threading.Lock()
+        self._closed = False
+        self._reader = threading.Thread(target=self._read_loop, name="repo-ipc", daemon=True)
+        self._reader.start()
+
+    @property
+    def current_cart_id(self):
+        return self._current_cart_id
+
+    @current_cart_id.setter
+    def current_cart_id(self, value):
+        self._current_cart_id = value
+        try:
+            self._send(0, "set_cart_id", (value,))
+        except OSError:
+            pass  # The child is gone; the next call reports it
+
+    def backend_health(self) -> dict:
+        return self._health
+
+    def has_pending_mutations(self, cart_id: str = None) -> bool:
+        return self._call("has_pending_mutations", cart_id)
+
+    def pending_mutation_carts(self) -> list:
+        return self._call("pending_mutation_carts")
+
+    def cart_push_url(self):
+        if not self.current_cart_id:
+            return None
+        return self._call("cart_push_url")
+
+    def send_prompt_to_ai(self, user_text: str, user_id: str):
+        return self._call("send_prompt_to_ai", user_text, user_id)
+
+    def stream_prompt_to_ai(self, user_text: str, user_id: str, on_chunk):
+        return self._call("stream_prompt_to_ai", user_text, user_id, on_chunk=on_chunk)
+
+    def initialize_session(self) -> bool:
+        ok, self._current_cart_id = self._call("initialize_session")
+        return ok
+
+    def fetch_cart(self, cart_id: str = None) -> StoreResult:
+        return self._call("fetch_cart", cart_id)
+
+    def update_cart_item(self, item_id: str, new_quantity: int) -> StoreResult:
+        return self._call("update_cart_item", item_id, new_quantity)
+
+    def update_cart_items(self, quantities: dict, cart_id: str = None) -> StoreResult:
+        return self._call("update_cart_items", quantities, cart_id)
+
+    def optimize_current_cart(self) -> StoreResult:
+        return self._call("optimize_current_cart")
+
+    def close(self, timeout: float = 2.0):
+        """Asks the child to finish running calls and exit; kills it after *timeout*"""
+        with self._lock:
+            if self._closed:
+                return
+        try:
+            self._send(0, "close", ())
+        except OSError:
+            pass
+        self.process.join(timeout)
+        if self.process.is_alive():
+            log.warning("Repository process did not exit, terminating", pid=self.process.pid)
+            self.process.terminate()
+            self.process.join(timeout)
+        self._reader.join(timeout)
+
+    # --- Internals ---
+    def _send(self, call_id: int, method: str, args: tuple):
+        frame = pickle.dumps((call_id, method, args), PROTOCOL)
+        with self._send_lock:
+            self._conn.send_bytes(frame)
+
+    def _call(self, method: str, *args, on_chunk=None):
+        started = time.perf_counter()
+        call_id = next(self._ids)
+        replies = queue.SimpleQueue()
+        with self._lock:
+            if self._closed:
+                raise RepositoryProcessError("Repository process is not running")
+            self._calls[call_id] = replies
+        try:
+            try:
+                self._send(call_id, method, args)
+            except OSError as e:
+                # The child died and the reader has not noticed yet
+                raise RepositoryProcessError("Repository process is not running") from e
+            while True:
+                kind, value = replies.get()
+                if kind == "chunk":
+                    on_chunk(value)
+                elif kind == "error":
+                    raise value
+                else:
+                    return unpack(value)
+        finally:
+            with self._lock:
+                self._calls.pop(call_id, None)
+            self.registry.observe("ipc_call_duration_seconds", time.perf_counter() - started, method=method)
+
+    def _read_loop(self):
+        try:
+            while True:
+                call_id, kind, value = pickle.loads(self._conn.recv_bytes())
+                if kind == "health":
+                    self._health[value[0]]._set_state(value[1])
+                    continue
+                with self._lock:
+                    replies = self._calls.get(call_id)
+                if replies is not None:
+                    replies.put((kind, value))
+        except (EOFError, OSError):
+            pass
+        with self._lock:
+            self._closed = True
+            waiting = list(self._calls.values())
+        if waiting:
+            log.warning("Repository process exited with calls in flight", calls=len(waiting))
+        for replies in waiting:
+            replies.put(("error", RepositoryProcessError("Repository process exited")))
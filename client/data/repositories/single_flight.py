@@ -0,0 +1,89 @@
+import asyncio
+import threading
+
+
+class _Flight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Collapses concurrent identical calls into one.
+
+    The first caller for a key runs the function; callers that arrive with the same key while
+    it is running wait for it and get the same result (or exception). Once the call finishes
+    the key is forgotten, so later callers always trigger a new call.
+    """
+
+    def __init__(self):
+        self._flights = {}  # key -> _Flight
+        self._lock = threading.Lock()
+
+    def do(self, key, fn):
+        """Returns (result, shared); shared is True for callers that joined someone else's call"""
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result, True
+
+        try:
+            flight.result = fn()
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.done.set()
+        return flight.result, False
+
+    def in_flight(self, key) -> bool:
+        with self._lock:
+            return key in self._flights
+
+
+class AsyncSingleFlight:
+    """
+    SingleFlight for coroutines on one event loop (no locks needed: the loop runs one at a time).
+
+    fn is a coroutine function; callers that join await the leader's outcome. A joiner that is
+    cancelled does not cancel the leader's call.
+    """
+
+    def __init__(self):
+        self._flights = {}  # key -> asyncio.Future of the running call
+
+    async def do(self, key, fn):
+        """Returns (result, shared); shared is True for callers that joined someone else's call"""
+        flight = self._flights.get(key)
+        if flight is not None:
+            return await asyncio.shield(flight), True
+
+        flight = self._flights[key] = asyncio.get_running_loop().create_future()
+        try:
+            result = await fn()
+        except BaseException as e:
+            if isinstance(e, asyncio.CancelledError):
+                flight.cancel()
+            else:
+                flight.set_exception(e)
+                flight.exception()  # Retrieved: nobody may have joined
+            raise
+        else:
+            flight.set_result(result)
+        finally:
+            del self._flights[key]
+        return result, False
+
+    def in_flight(self, key) -> bool:
+        return key in self._flights
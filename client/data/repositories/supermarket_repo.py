@@ -1,142 +1,326 @@
-from models.types import StoreResult, ClarificationRequest, CartItem
+import threading
+import time
+
+from models.types import StoreResult, ClarificationRequest, to_agorot
 from data.api.supermarket_client import SupermarketAPIClient
+from data.api.decoders import decode_cart_payload
+from data.repositories.cart_cache import CartCache, clone_store_result
+from data.repositories.single_flight import SingleFlight
+from data.repositories.mutation_journal import MutationJournal
+from telemetry.metrics import REGISTRY, timed_step
+from telemetry.log import get_logger
+
+log = get_logger("repo")
+
+
+# --- Agent payload parsing (shared by the sync and async repositories) ---
+
+def parse_agent_response(raw_response: dict) -> str:
+    """Extracts the agent's text from a /chat_message payload"""
+    msg_type = raw_response.get("type")
+    data = raw_response.get("data")
+
+    if msg_type == "response":
+        ai_text = data.get("ai_message")
+        log.debug("Received AI response", chars=len(ai_text or ""))
+        return ai_text
 
-class SupermarketRepository:
-    def __init__(self):
-        self.api = SupermarketAPIClient() # Connection to the API layer
+    raise ValueError("Unknown response type from server")
+
+
+def _is_rejected(error: Exception) -> bool:
+    """True if the DB answered with a 4xx (as opposed to being unreachable or failing)"""
+    while error is not None:
+        # requests.HTTPError and httpx.HTTPStatusError (async transport) both carry the response
+        status = getattr(getattr(error, "response", None), "status_code", None)
+        if status is not None:
+            return 400 <= status < 500
+        error = error.__context__
+    return False
+
+
+class CartRepositoryBase:
+    """
+    What SupermarketRepository and AsyncSupermarketRepository share: the current cart, the
+    mapped-cart cache, mutation generations and the offline journal. Nothing here does I/O,
+    so these methods are safe to call from the GUI thread with either repository.
+    """
+
+    def __init__(self, api, journal: MutationJournal = None):
+        self.api = api # Connection to the API layer
         self.current_cart_id = None
+        self.cart_cache = CartCache() # Mapped carts by (cart_id, version) for conditional GETs
+        # Concurrent identical fetches/optimizations share one call (the subclass's _flights). Keys
+        # include the cart's mutation generation, so a call made after a mutation never joins an older one.
+        self._generations = {} # cart_id -> number of completed mutations
+        self._generations_lock = threading.Lock()
+        # Optional write-ahead journal: cart changes made while the DB is unreachable are kept
+        # on disk and replayed in order (see update_cart_items)
+        self.journal = journal
+
+    def _generation(self, cart_id: str) -> int:
+        with self._generations_lock:
+            return self._generations.get(cart_id, 0)
 
+    def _mark_mutated(self, cart_id: str):
+        # Callers arriving from now on start a new flight instead of sharing a stale one
+        with self._generations_lock:
+            self._generations[cart_id] = self._generations.get(cart_id, 0) + 1
+
+    def backend_health(self) -> dict:
+        """{"agent": BackendHealth, "db": BackendHealth} for status reporting"""
+        return {"agent": self.api.agent.health, "db": self.api.db.health}
+
+    def cart_push_url(self):
+        """WebSocket URL for cart updates of the current cart (None before the session starts)"""
+        if not self.current_cart_id:
+            return None
+        return self.api.cart_push_url(self.current_cart_id)
+
+    def has_pending_mutations(self, cart_id: str = None) -> bool:
+        """True while journaled changes (for cart_id, or any cart) have not reached the DB"""
+        return self.journal is not None and self.journal.has_pending(cart_id)
+
+    def pending_mutation_carts(self) -> list:
+        """Carts with journaled changes, oldest first; replay with update_cart_items({}, cart_id)"""
+        return self.journal.pending_carts() if self.journal is not None else []
+
+    def _last_known_cart(self, cart_id: str):
+        """Newest mapped cart we hold for cart_id (None if it was never fetched)"""
+        return self.cart_cache.get(cart_id, self.cart_cache.latest_version(cart_id))
+
+    def _cart_with_pending(self, cart_id: str) -> StoreResult:
+        """Last known cart with the unsent quantities applied (what the user expects to see)"""
+        cached = self._last_known_cart(cart_id)
+        if cached is None:
+            return StoreResult("Saved Offline", "", 0.0, [])
+        cart = clone_store_result(cached)  # The cached entry stays what the DB last said
+        quantities, _ = self.journal.pending(cart_id)
+        items = []
+        for item in cart.items:
+            item.quantity = quantities.get(item.id, item.quantity)
+            if item.quantity > 0:
+                items.append(item)
+        cart.items = items
+        # Summed in agorot like CartModel, so the offline total matches what the panel shows
+        cart.total_price = sum(to_agorot(item.price) * item.quantity for item in items) / 100
+        return cart
+
+
+class SupermarketRepository(CartRepositoryBase):
+    def __init__(self, api: SupermarketAPIClient = None, journal: MutationJournal = None):
+        super().__init__(api or SupermarketAPIClient(), journal)
+        self._flights = SingleFlight()
+        self._patch_lock = threading.Lock() # Keeps "read pending -> PATCH -> ack" atomic
+
+    @timed_step("send_prompt")
     def send_prompt_to_ai(self, user_text: str, user_id: str):
         # 1. Call to server
         try:
             raw_response = self.api.send_message(user_text, user_id)
             
-            print(f"[4] REPO: Agent Raw Response: {raw_response}")
+            log.payload("Agent raw response", raw_response, every=20)
             
             # 2. Response parsing (Factory Pattern)
-            msg_type = raw_response.get("type")
-            data = raw_response.get("data")
-
-            if msg_type == "response":
-                ai_text = data.get("ai_message")
-                print(f"Repository: Received AI response: {ai_text}")
-                return ai_text
-            
-            else:
-                raise ValueError("Unknown response type from server")
+            return parse_agent_response(raw_response)
 
         except Exception as e:
             # In case of error, return an error message to the user (e.g. via the Clarification mechanism)
             # Or raise an Exception that the Worker will catch
-            print(f"Repository Error: {e}")
+            log.error("Agent call failed", error=str(e))
             return ClarificationRequest(question="Server Error", options=["Try Again"])
         
+    @timed_step("stream_prompt")
+    def stream_prompt_to_ai(self, user_text: str, user_id: str, on_chunk):
+        """
+        Same contract as send_prompt_to_ai, but calls on_chunk(text) for every piece of the
+        reply as it arrives, so the UI can render before the agent has finished.
+        """
+        try:
+            chunks = []
+            final_text = None
+            started = time.perf_counter()
+            for event in self.api.stream_message(user_text, user_id):
+                delta = event.get("delta")
+                if delta:
+                    if not chunks:
+                        REGISTRY.observe("pipeline_step_duration_seconds", time.perf_counter() - started,
+                                         step="first_chunk")
+                    chunks.append(delta)
+                    on_chunk(delta)
+                elif event.get("type"):
+                    # A complete payload (non-streaming backend, or the final summary event)
+                    final_text = parse_agent_response(event)
+
+            if final_text is None:
+                return "".join(chunks)
+            if not chunks and final_text:
+                on_chunk(final_text)
+            return final_text
+
+        except Exception as e:
+            log.error("Agent stream failed", error=str(e))
+            return ClarificationRequest(question="Server Error", options=["Try Again"])
+
     def initialize_session(self) -> bool:
         try:
             result = self.api.initialize_session()
             message = result.get("data", {}).get("message", "Session started")
             self.current_cart_id = result.get("data", {}).get("cart_id")
-            print(f"✅ System Ready: {message}. cart id is {self.current_cart_id}")
+            log.info("System ready", message=message, cart_id=self.current_cart_id)
             return True
         except Exception as e:
-            print(f"❌ Failed to initialize session: {e}")
+            log.error("Failed to initialize session", error=str(e))
             return False
     
-    def fetch_cart(self) -> StoreResult:
-        """Fetches the cart directly from the DB and converts it safely to the frontend model"""
-        print(f"[7] REPO: Fetching fresh cart from DB (Port 8000)...")
-        
-        if not self.current_cart_id:
-            print("⚠️ No cart ID stored in Repo. Cannot fetch.")
+    def fetch_cart(self, cart_id: str = None) -> StoreResult:
+        """Fetches the cart (default: the current one) from the DB and converts it safely to the frontend model"""
+        cart_id = cart_id or self.current_cart_id
+        if not cart_id:
+            log.warning("No cart id stored, cannot fetch")
             return StoreResult("Empty Cart", "", 0.0, [])
 
+        result, shared = self._flights.do(("fetch", cart_id, self._generation(cart_id)),
+                                          lambda: self._fetch_cart(cart_id))
+        if shared:
+            # Every caller gets its own copy; CartModel mutates items in place
+            log.debug("Cart fetch shared with a concurrent request", cart_id=cart_id)
+            return clone_store_result(result)
+        return result
+
+    @timed_step("fetch_cart")
+    def _fetch_cart(self, cart_id: str) -> StoreResult:
         try:
-            print(f"Fetching cart from DB with ID: {self.current_cart_id}")
-            data = self.api.get_cart_from_db(self.current_cart_id)
-            
-            # Print the raw DB payload so we can see exactly what came from the backend
-            print(f"Raw DB Cart Data: {data}")
-            
-            cart_data = data.get("cart", {})
-            items_list = cart_data.get("items", [])
+            known_version = self.cart_cache.latest_version(cart_id)
+            log.debug("Fetching cart", cart_id=cart_id, cached_version=known_version)
+            response = self.api.get_cart_versioned(cart_id, known_version)
             
-            print(f"[7.5] REPO: DB returned items: {items_list}")
+            # 304 / unchanged version: reuse the already-mapped result, skip download and parsing
+            if response.version:
+                cached = self.cart_cache.get(cart_id, response.version)
+                if cached is not None:
+                    log.debug("Cart unchanged, served from cache", cart_id=cart_id, version=response.version)
+                    return cached
+            if response.not_modified:
+                # The entry was evicted between the two calls; fall back to a full fetch
+                response = self.api.get_cart_versioned(cart_id)
             
-            print(f"Found {len(items_list)} items in the DB response.")
+            # Decode the body bytes straight into the frontend model (no intermediate dicts)
+            with REGISTRY.timed("pipeline_step_duration_seconds", step="decode_cart"):
+                result_model = decode_cart_payload(response.content)
+            if response.version:
+                self.cart_cache.put(cart_id, response.version, result_model)
             
-            items_objs = []
-            for idx, item in enumerate(items_list):
-                # Safely extract values: Backend might use 'item_name' or 'name'
-                item_name = item.get("item_name") or item.get("name") or f"Item {idx}"
-                quantity = item.get("quantity", 1)
-                price = item.get("price", 0.0)
-                
-                # Make sure the ID is a string (fallback to item_name if no ID exists)
-                item_id = str(item.get("id") or item_name)
-                
-                items_objs.append(CartItem(
-                    id=item_id,
-                    name=item_name,
-                    quantity=int(quantity),
-                    price=float(price)
-                ))
-            
-            # Extract store info safely
-            store_name = cart_data.get("store_name") or "Supermarket"
-            address = cart_data.get("address") or ""
-            total_price = float(cart_data.get("total_price") or 0.0)
-            
-            result_model = StoreResult(
-                store_name=store_name,
-                address=address,
-                total_price=total_price,
-                items=items_objs
-            )
-            
-            print(f"✅ Successfully mapped StoreResult: {len(result_model.items)} items ready for UI")
+            log.debug("Cart fetched", cart_id=cart_id, items=len(result_model.items), bytes=len(response.content))
             return result_model
             
         except Exception as e:
-            print(f"❌ Cart Fetch Error: {e}")
+            log.error("Cart fetch failed", cart_id=cart_id, error=str(e))
+            # Degrade gracefully: keep showing the last cart we know instead of wiping the panel
+            last_known = self._last_known_cart(cart_id)
+            if last_known is not None:
+                return last_known
             return StoreResult("Server Error", "", 0.0, [])
         
     def update_cart_item(self, item_id: str, new_quantity: int) -> StoreResult:
         """Updates quantity, re-optimizes, and returns the fresh cart"""
-        if not self.current_cart_id:
-            print("⚠️ Cannot update item: No active cart session.")
+        return self.update_cart_items({item_id: new_quantity})
+
+    @timed_step("update_pipeline")
+    def update_cart_items(self, quantities: dict, cart_id: str = None) -> StoreResult:
+        """Applies a batch of {item_id: quantity} in one PATCH, re-optimizes once, and returns the fresh cart"""
+        cart_id = cart_id or self.current_cart_id
+        if not cart_id:
+            log.warning("Cannot update item: no active cart session")
             return StoreResult("Error", "", 0.0, [])
+        
+        if self.journal is not None and quantities:
+            # Write-ahead: the change survives a failed PATCH (or a crash) and is replayed later
+            self.journal.append(cart_id, quantities)
             
         try:
-            print(f"Step 1: Patching DB Item '{item_id}' to quantity {new_quantity}")
-            # 1. Update quantitiesa5090586-991f-41a4-98b9-b99626758ea22c5c6d1f-058d-4757-be97-6261dc231bfe
-            self.api.update_cart_item_in_db(self.current_cart_id, item_id, new_quantity)
+            with self._patch_lock:
+                # Unsent older changes of this cart travel in the same PATCH, so nothing is reordered
+                batch, last_seq = self.journal.pending(cart_id) if self.journal is not None else (quantities, 0)
+                if batch:
+                    log.debug("Patching cart items", cart_id=cart_id, items=len(batch))
+                    # 1. Update quantities (one batched PATCH)
+                    try:
+                        with REGISTRY.timed("pipeline_step_duration_seconds", step="patch"):
+                            self.api.update_cart_items_in_db(cart_id, batch)
+                    except Exception as e:
+                        if not _is_rejected(e):
+                            raise
+                        # The DB refused something in the batch; only the refused changes are dropped
+                        applied = self._patch_item_by_item(cart_id, batch)
+                        if self.journal is not None:
+                            self.journal.ack(cart_id, last_seq)  # Applied or refused, none is pending
+                        if not applied:
+                            raise
+                    finally:
+                        self._mark_mutated(cart_id)
+                    if self.journal is not None:
+                        self.journal.ack(cart_id, last_seq)
             
-            print(f"Step 2: Re-optimizing cart {self.current_cart_id}...")
             # 2. Trigger optimization
-            self.api.optimize_cart_in_db(self.current_cart_id)
+            self._optimize(cart_id)
             
-            print("Step 3: Fetching fresh cart data...")
             # 3. Pull the updated data using the method we already wrote
-            return self.fetch_cart()
+            return self.fetch_cart(cart_id)
             
         except Exception as e:
-            print(f"❌ DB Update Pipeline Error: {e}")
+            log.error("Cart update failed", cart_id=cart_id, error=str(e))
+            if self.has_pending_mutations(cart_id):
+                log.info("Change kept in the offline journal; it will be replayed", cart_id=cart_id)
+                return self._cart_with_pending(cart_id)
             return StoreResult("Update Failed", "", 0.0, [])
-        
+
+    def _patch_item_by_item(self, cart_id: str, batch: dict) -> int:
+        """
+        Re-sends a rejected batch one item at a time (the coalescer and the journal merge
+        unrelated changes into one PATCH); returns how many the DB accepted. Connectivity
+        errors propagate, leaving the whole batch pending.
+        """
+        if len(batch) == 1:
+            log.warning("Cart change rejected by the DB, dropped", cart_id=cart_id, quantities=batch)
+            return 0
+        applied = 0
+        for item_id, quantity in batch.items():
+            try:
+                self.api.update_cart_items_in_db(cart_id, {item_id: quantity})
+                applied += 1
+            except Exception as e:
+                if not _is_rejected(e):
+                    raise
+                log.warning("Cart change rejected by the DB, dropped", cart_id=cart_id, item_id=item_id,
+                            quantity=quantity)
+        return applied
+
+    @timed_step("optimize_pipeline")
     def optimize_current_cart(self) -> StoreResult:
         """Triggers DB optimization and returns the fresh cart state"""
         if not self.current_cart_id:
-            print("⚠️ Cannot optimize: No active cart session.")
+            log.warning("Cannot optimize: no active cart session")
             return StoreResult("Error", "", 0.0, [])
 
         try:
-            print(f"🔄 Optimizing cart {self.current_cart_id}...")
-            # 1. Call the optimize endpoint
-            self.api.optimize_cart_in_db(self.current_cart_id)
+            log.debug("Optimizing cart", cart_id=self.current_cart_id)
+            # 1. Call the optimize endpoint (shared with an optimization already running)
+            self._optimize(self.current_cart_id)
             
             # 2. Fetch the updated result (new total price, new store)
             return self.fetch_cart()
             
         except Exception as e:
-            print(f"❌ Optimization Failed: {e}")
-            return StoreResult("Optimization Failed", "", 0.0, [])
\ No newline at end of file
+            log.error("Optimization failed", cart_id=self.current_cart_id, error=str(e))
+            return StoreResult("Optimization Failed", "", 0.0, [])
+
+    def _optimize(self, cart_id: str):
+        """Runs optimize_cart_in_db once for all concurrent callers of the same cart state"""
+        @timed_step("optimize")
+        def run():
+            try:
+                return self.api.optimize_cart_in_db(cart_id)
+            finally:
+                self._mark_mutated(cart_id)
+        return self._flights.do(("optimize", cart_id, self._generation(cart_id)), run)[0]
@@ -0,0 +1,165 @@
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from typing import Optional
+from telemetry.log import get_logger
+
+log = get_logger("thumbnails")
+
+
+def default_thumbnail_dir() -> str:
+    return os.path.join(os.path.expanduser("~"), ".supermarket_agent", "thumbnails")
+
+
+def _digest(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+class ThumbnailStore:
+    """
+    Content-addressed disk cache of downloaded product images.
+
+    blobs/<sha256 of the bytes> holds every distinct image once (chains reuse one picture under
+    many URLs, and a URL that moves keeps its blob); refs/<sha256 of the URL> names the blob the
+    URL downloaded to. The blobs are bounded by max_bytes: the least recently read ones are
+    evicted first, together with the refs naming them (refs left dangling by a crash are pruned
+    on load). Files are written to a temporary name and renamed, so a crash never leaves a torn
+    image. Safe to use from worker threads.
+    """
+
+    def __init__(self, path: str = None, max_bytes: int = 64 * 1024 * 1024):
+        self.path = path or default_thumbnail_dir()
+        self.max_bytes = max_bytes
+        self._blobs_dir = os.path.join(self.path, "blobs")
+        self._refs_dir = os.path.join(self.path, "refs")
+        self._blobs = OrderedDict()  # digest -> size, least recently used first
+        self._refs = {}  # ref file name -> digest
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+        os.makedirs(self._blobs_dir, exist_ok=True)
+        os.makedirs(self._refs_dir, exist_ok=True)
+        self._load()
+
+    @property
+    def bytes_used(self) -> int:
+        return self._bytes
+
+    def __len__(self):
+        return len(self._blobs)
+
+    def get(self, url: str) -> Optional[bytes]:
+        """The image last stored for *url*, or None"""
+        with self._lock:
+            digest = self._refs.get(_digest(url.encode("utf-8")))
+            if digest not in self._blobs:
+                return None
+            blob = os.path.join(self._blobs_dir, digest)
+            try:
+                with open(blob, "rb") as f:
+                    data = f.read()
+                os.utime(blob)  # Recency survives restarts
+            except OSError:
+                self._drop({digest})
+                return None
+            self._blobs.move_to_end(digest)
+        return data
+
+    def put(self, url: str, data: bytes) -> str:
+        """Stores *data* as the image of *url*; returns its digest"""
+        digest = _digest(data)
+        with self._lock:
+            if digest in self._blobs:
+                self._blobs.move_to_end(digest)
+            else:
+                self._write(os.path.join(self._blobs_dir, digest), data)
+                self._blobs[digest] = len(data)
+                self._bytes += len(data)
+            ref = _digest(url.encode("utf-8"))
+            self._write(os.path.join(self._refs_dir, ref), digest.encode("ascii"))
+            self._refs[ref] = digest
+            self._evict()  # The new blob is the most recent, so it stays
+        return digest
+
+    def discard(self, url: str):
+        """Removes the image of *url* (e.g. one that no longer decodes), with every ref naming it"""
+        with self._lock:
+            digest = self._refs.get(_digest(url.encode("utf-8")))
+            if digest is not None:
+                self._drop({digest})
+                log.info("Thumbnail discarded", url=url, digest=digest)
+
+    # --- Internals ---
+    def _load(self):
+        # Oldest first, by last read (see get)
+        entries = []
+        for name in self._listdir(self._blobs_dir):
+            try:
+                stat = os.stat(os.path.join(self._blobs_dir, name))
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, name, stat.st_size))
+        for _, digest, size in sorted(entries):
+            self._blobs[digest] = size
+            self._bytes += size
+
+        dangling = 0
+        for name in self._listdir(self._refs_dir):
+            path = os.path.join(self._refs_dir, name)
+            try:
+                with open(path, "r", encoding="ascii") as f:
+                    digest = f.read().strip()
+            except (OSError, UnicodeDecodeError):
+                digest = None
+            if digest in self._blobs:
+                self._refs[name] = digest
+                continue
+            dangling += 1
+            self._remove(path)
+        if dangling:
+            log.debug("Dangling thumbnail refs pruned", refs=dangling)
+        self._evict()
+
+    def _listdir(self, directory: str) -> list:
+        # Entry names, minus (and deleting) the temporary files a crash mid-write left behind
+        names = []
+        for name in os.listdir(directory):
+            if name.endswith(".tmp"):
+                self._remove(os.path.join(directory, name))
+            else:
+                names.append(name)
+        return names
+
+    @staticmethod
+    def _remove(path: str):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def _write(self, path: str, data: bytes):
+        tmp = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+
+    def _drop(self, digests: set):
+        # Deletes the blobs and every ref naming one of them (called with the lock held)
+        for digest in digests:
+            self._bytes -= self._blobs.pop(digest, 0)
+            self._remove(os.path.join(self._blobs_dir, digest))
+        for ref in [ref for ref, digest in self._refs.items() if digest in digests]:
+            del self._refs[ref]
+            self._remove(os.path.join(self._refs_dir, ref))
+
+    def _evict(self):
+        evicted, remaining = set(), self._bytes
+        for digest, size in self._blobs.items():  # Least recently used first
+            if remaining <= self.max_bytes or len(evicted) == len(self._blobs) - 1:
+                break
+            evicted.add(digest)
+            remaining -= size
+        if evicted:
+            self._drop(evicted)
+            log.debug("Thumbnails evicted", blobs=len(evicted), bytes=self._bytes)
@@ -3,14 +3,85 @@ from PySide6.QtWidgets import QApplication
 from core.app_controller import AppController
 
 
+def build_repository():
+    """
+    Opt-in: `--async-transport` runs all traffic on one asyncio loop (HTTP/2 when h2 is installed,
+    h2c for http backends, HTTP/1.1 for those that refuse it);
+    `--process-repo` hosts the repository (HTTP, decoding, mapping) in a child process
+    """
+    if "--process-repo" in sys.argv:
+        import atexit
+        from data.repositories.process_repo import ProcessRepository
+        repo = ProcessRepository()
+        atexit.register(repo.close)
+        return repo
+    if "--async-transport" not in sys.argv:
+        return None
+    from core.async_bridge import AsyncBridge
+    from data.repositories.async_supermarket_repo import AsyncSupermarketRepository, BlockingRepository
+    from data.repositories.mutation_journal import MutationJournal
+    return BlockingRepository(AsyncSupermarketRepository(journal=MutationJournal()), AsyncBridge())
+
+
+def build_executor(repo):
+    """With `--async-transport` prompts and cart work run as coroutines on the repository's loop"""
+    bridge = getattr(repo, "bridge", None)
+    if bridge is None:
+        return None
+    from core.async_bridge import AsyncTaskExecutor
+    return AsyncTaskExecutor(bridge)
+
+
+def start_logging():
+    """Log levels come from $SUPERMARKET_LOG, e.g. "info,transport=debug" (default: info)"""
+    import atexit
+    from telemetry.log import configure_logging, shutdown_logging
+    configure_logging()
+    # Registered first so it runs last: exporters that log at exit still get flushed
+    atexit.register(shutdown_logging)
+
+
+def start_metrics_export():
+    """Opt-in: `--metrics-file PATH` (.json or .prom) and/or `--metrics-port N` (Prometheus /metrics)"""
+    args = sys.argv
+    path = args[args.index("--metrics-file") + 1] if "--metrics-file" in args else None
+    port = int(args[args.index("--metrics-port") + 1]) if "--metrics-port" in args else None
+    if path is None and port is None:
+        return None
+    from telemetry.metrics import MetricsExporter
+    return MetricsExporter(path=path, port=port)
+
+
+def start_stall_watchdog():
+    """Logs GUI event-loop stalls over `--stall-threshold-ms N` (default 200) with the blocking stack"""
+    from core.stall_watchdog import StallWatchdog
+    args = sys.argv
+    threshold = float(args[args.index("--stall-threshold-ms") + 1]) if "--stall-threshold-ms" in args else 200
+    return StallWatchdog(threshold_ms=threshold).start()
+
+
+def start_trace_export():
+    """Opt-in: `--trace-file PATH` writes every traced user action as a Chrome trace at exit"""
+    if "--trace-file" not in sys.argv:
+        return
+    import atexit
+    from telemetry.tracing import TRACER
+    atexit.register(TRACER.export_chrome_trace, sys.argv[sys.argv.index("--trace-file") + 1])
+
+
 if __name__ == "__main__":
     # Create the application (global resource management)
     app = QApplication(sys.argv)
+    start_logging()
+    metrics_exporter = start_metrics_export()
+    start_trace_export()
+    stall_watchdog = start_stall_watchdog()
     
     # Create the main controller
-    controller = AppController()
+    repo = build_repository()
+    controller = AppController(repo=repo, virtual_cart="--virtual-cart" in sys.argv, executor=build_executor(repo))
     controller.show()
     
     # Start the event loop (Event Loop)
     # This is not a REPL, the software "hangs" here waiting for mouse clicks
-    sys.exit(app.exec())
\ No newline at end of file
+    sys.exit(app.exec())
@@ -0,0 +1,92 @@
+import socket
+import threading
+
+import h2.config
+import h2.connection
+import h2.events
+
+
+class H2cServer:
+    """
+    Minimal HTTP/2 server over plain TCP (h2c with prior knowledge, as the async transport
+    speaks it to http:// backends). handler(method, path, body) returns (status, body bytes)
+    and every body is served as JSON. Counts connections and the most streams open at once,
+    so tests can check that concurrent calls were multiplexed.
+    """
+
+    def __init__(self, handler, host="127.0.0.1", port=0, delay: float = 0.0):
+        self.handler = handler
+        self.delay = delay  # Seconds before each answer, so concurrent requests overlap
+        self.connections = 0
+        self.max_open_streams = 0
+        self._open_streams = 0
+        self._lock = threading.Lock()
+        self._socket = socket.create_server((host, port))
+
+    @property
+    def url(self) -> str:
+        host, port = self._socket.getsockname()[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        threading.Thread(target=self._accept_loop, name="h2c-server", daemon=True).start()
+        return self
+
+    def stop(self):
+        self._socket.close()
+
+    def _accept_loop(self):
+        while True:
+            try:
+                conn, _ = self._socket.accept()
+            except OSError:
+                return  # stop() closed the listening socket
+            with self._lock:
+                self.connections += 1
+            threading.Thread(target=self._serve, args=(conn,), daemon=True).start()
+
+    def _serve(self, conn: socket.socket):
+        h2conn = h2.connection.H2Connection(h2.config.H2Configuration(client_side=False, header_encoding="utf-8"))
+        send_lock = threading.Lock()  # The connection state is shared with the delayed answers
+        requests = {}  # stream_id -> [headers, body]
+        with send_lock:
+            h2conn.initiate_connection()
+            conn.sendall(h2conn.data_to_send())
+        with conn:
+            while True:
+                try:
+                    data = conn.recv(65535)
+                except OSError:
+                    return
+                if not data:
+                    return
+                with send_lock:
+                    for event in h2conn.receive_data(data):
+                        if isinstance(event, h2.events.RequestReceived):
+                            requests[event.stream_id] = [dict(event.headers), b""]
+                            with self._lock:
+                                self._open_streams += 1
+                                self.max_open_streams = max(self.max_open_streams, self._open_streams)
+                        elif isinstance(event, h2.events.DataReceived):
+                            requests[event.stream_id][1] += event.data
+                            h2conn.acknowledge_received_data(event.flow_controlled_length, event.stream_id)
+                        elif isinstance(event, h2.events.StreamEnded):
+                            answer = threading.Timer(self.delay, self._respond, (
+                                conn, h2conn, send_lock, event.stream_id, requests.pop(event.stream_id)))
+                            answer.daemon = True
+                            answer.start()
+                    conn.sendall(h2conn.data_to_send())
+
+    def _respond(self, conn, h2conn, send_lock, stream_id: int, request):
+        headers, body = request
+        status, payload = self.handler(headers[":method"], headers[":path"], body)
+        with send_lock:
+            h2conn.send_headers(stream_id, [(":status", str(status)), ("content-type", "application/json"),
+                                            ("content-length", str(len(payload)))])
+            h2conn.send_data(stream_id, payload, end_stream=True)
+            try:
+                conn.sendall(h2conn.data_to_send())
+            except OSError:
+                pass  # The client went away
+        with self._lock:
+            self._open_streams -= 1
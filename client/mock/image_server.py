@@ -0,0 +1,99 @@
+import struct
+import sys
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+def make_png(width: int, height: int, rgb=(255, 128, 0)) -> bytes:
+    """A solid-color RGB PNG (pure Python, so the server needs no Qt)"""
+    def chunk(kind: bytes, data: bytes) -> bytes:
+        return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+
+    row = b"\x00" + bytes(rgb) * width  # Filter type 0, then the pixels
+    return (b"\x89PNG\r\n\x1a\n"
+            + chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0))
+            + chunk(b"IDAT", zlib.compress(row * height))
+            + chunk(b"IEND", b""))
+
+
+class ImageFixtureHandler(BaseHTTPRequestHandler):
+    """Serves the server's images by path; anything else is a 404"""
+
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        # Keep benchmark / test output clean
+        pass
+
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.hits[self.path] = server.hits.get(self.path, 0) + 1
+            image = server.images.get(self.path)
+        if server.delay:
+            time.sleep(server.delay)
+        if image is None:
+            self.send_response(404)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        data, content_type = image
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+class ImageFixtureServer(ThreadingHTTPServer):
+    """
+    Local stand-in for a chain's product image host. Images are registered with add();
+    hits counts the requests per path and delay makes every response slow.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, delay: float = 0.0):
+        super().__init__((host, port), ImageFixtureHandler)
+        self.images = {}  # path -> (bytes, content type)
+        self.hits = {}    # path -> requests received
+        self.delay = delay
+        self.lock = threading.Lock()
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def add(self, path: str, data: bytes, content_type: str = "image/png") -> str:
+        """Serves *data* at *path*; returns its full URL"""
+        with self.lock:
+            self.images[path] = (data, content_type)
+        return self.url + path
+
+    # --- lifecycle ---
+    def start(self):
+        # Short poll interval so stop() returns quickly in tests
+        self._thread = threading.Thread(target=self.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+
+if __name__ == "__main__":
+    port = int(sys.argv[1]) if len(sys.argv) > 1 else 8002
+    server = ImageFixtureServer(host="", port=port)
+    for index, rgb in enumerate([(230, 80, 60), (60, 160, 90), (70, 110, 220), (240, 190, 40)]):
+        server.add(f"/products/{index}.png", make_png(256, 256, rgb))
+    print(f"🖼️  Image fixture server is running at http://localhost:{port}/products/0.png .. 3.png")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.server_close()
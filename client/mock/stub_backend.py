@@ -0,0 +1,310 @@
+import base64
+import hashlib
+import json
+import struct
+import sys
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+# RFC 6455 handshake constant
+WEBSOCKET_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+
+
+def _empty_cart() -> dict:
+    return {"store_name": "Stub Supermarket", "address": "Localhost Blvd 1", "total_price": 0.0, "items": []}
+
+
+class StubBackendHandler(BaseHTTPRequestHandler):
+    """
+    Minimal in-memory stand-in for both the agent (8001) and DB (8000) servers.
+    Speaks HTTP/1.1 so clients can keep connections alive between calls.
+    """
+
+    protocol_version = "HTTP/1.1"
+    # Headers and body are written separately; without TCP_NODELAY a kept-alive
+    # connection hits the Nagle / delayed-ACK 40 ms stall like no real server would.
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        # Keep benchmark / test output clean
+        pass
+
+    # --- helpers ---
+    def _read_json(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        if not length:
+            return {}
+        return json.loads(self.rfile.read(length).decode("utf-8"))
+
+    def _send_json(self, payload, status=200, headers: dict = None):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _write_chunk(self, data: bytes):
+        # HTTP/1.1 chunked transfer encoding keeps the connection reusable after the stream
+        self.wfile.write(f"{len(data):X}\r\n".encode("ascii") + data + b"\r\n")
+        self.wfile.flush()
+
+    def _stream_reply(self, reply: str):
+        """Sends the reply word by word as Server-Sent Events"""
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        for i, word in enumerate(reply.split(" ")):
+            delta = word if i == 0 else " " + word
+            self._write_chunk(f"data: {json.dumps({'delta': delta})}\n\n".encode("utf-8"))
+            if self.server.stream_delay:
+                time.sleep(self.server.stream_delay)
+        self._write_chunk(b"data: [DONE]\n\n")
+        self._write_chunk(b"")
+
+    # --- WebSocket push channel (minimal RFC 6455: unfragmented text frames) ---
+    def _read_frame(self):
+        """Returns (opcode, payload bytes) of the next client frame, or (None, b"") on EOF"""
+        header = self.rfile.read(2)
+        if len(header) < 2:
+            return None, b""
+        opcode = header[0] & 0x0F
+        length = header[1] & 0x7F
+        if length == 126:
+            length = struct.unpack(">H", self.rfile.read(2))[0]
+        elif length == 127:
+            length = struct.unpack(">Q", self.rfile.read(8))[0]
+        mask = self.rfile.read(4) if header[1] & 0x80 else b"\0\0\0\0"
+        payload = bytearray(self.rfile.read(length))
+        for i in range(length):
+            payload[i] ^= mask[i % 4]
+        return opcode, bytes(payload)
+
+    def _serve_websocket(self, cart_id: str):
+        """Upgrades the connection and pushes a snapshot, then a delta for every change of the cart"""
+        key = self.headers.get("Sec-WebSocket-Key", "")
+        accept = base64.b64encode(hashlib.sha1((key + WEBSOCKET_GUID).encode("ascii")).digest()).decode("ascii")
+        self.send_response(101)
+        self.send_header("Upgrade", "websocket")
+        self.send_header("Connection", "Upgrade")
+        self.send_header("Sec-WebSocket-Accept", accept)
+        self.end_headers()
+        self.wfile.flush()
+        self.close_connection = True
+
+        subscriber = PushSubscriber(self.wfile)
+        self.server.subscribe(cart_id, subscriber)
+        try:
+            while True:
+                opcode, payload = self._read_frame()
+                if opcode is None or opcode == 0x8:
+                    subscriber.send_frame(0x8, payload[:2])
+                    return
+                if opcode == 0x9:
+                    subscriber.send_frame(0xA, payload)
+                elif opcode == 0x1 and json.loads(payload).get("type") == "resync":
+                    self.server.send_snapshot(cart_id, subscriber)
+        except (OSError, ValueError):
+            pass
+        finally:
+            self.server.unsubscribe(cart_id, subscriber)
+
+    def _cart_id(self):
+        parts = self.path.strip("/").split("/")
+        return parts[1] if len(parts) > 1 and parts[0] == "cart" else None
+
+    # --- routes ---
+    def do_POST(self):
+        if self.path == "/session/initialize":
+            cart_id = self.server.create_cart()
+            self._send_json({"type": "session_initialized", "data": {"cart_id": cart_id, "message": "Stub ready"}})
+        elif self.path == "/chat_message":
+            payload = self._read_json()
+            reply = f"Echo: {payload.get('message', '')}"
+            if "text/event-stream" in (self.headers.get("Accept") or ""):
+                self._stream_reply(reply)
+            else:
+                self._send_json({"type": "response", "data": {"ai_message": reply}})
+        elif self.path.endswith("/optimize"):
+            self._read_json()
+            self.server.count_call("optimize")
+            self.server.bump_version(self._cart_id())
+            self._send_json({"status": "optimized", "cart_id": self._cart_id()})
+        else:
+            self._send_json({"detail": "Not Found"}, status=404)
+
+    def do_GET(self):
+        if self.path.startswith("/ws/cart/") and self.headers.get("Upgrade", "").lower() == "websocket":
+            self._serve_websocket(self.path.rsplit("/", 1)[-1])
+            return
+        cart_id = self._cart_id()
+        if cart_id is None:
+            self._send_json({"detail": "Not Found"}, status=404)
+            return
+        self.server.count_call("get_cart")
+        cart, version = self.server.get_cart_with_version(cart_id)
+        etag = f'"v{version}"'
+        if self.headers.get("If-None-Match") == etag:
+            self.server.not_modified_count += 1
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        self._send_json({"cart": cart}, headers={"ETag": etag})
+
+    def do_PATCH(self):
+        cart_id = self._cart_id()
+        payload = self._read_json()
+        self.server.set_quantities(cart_id, payload.get("item_names", []), payload.get("quantities", []))
+        self._send_json({"status": "updated", "cart_id": cart_id})
+
+
+class PushSubscriber:
+    """Server side of one WebSocket connection; frames may be sent from any thread"""
+
+    def __init__(self, wfile):
+        self.wfile = wfile
+        self.lock = threading.Lock()
+
+    def send_frame(self, opcode: int, payload: bytes):
+        length = len(payload)
+        if length < 126:
+            header = bytes([0x80 | opcode, length])
+        elif length < 65536:
+            header = bytes([0x80 | opcode, 126]) + struct.pack(">H", length)
+        else:
+            header = bytes([0x80 | opcode, 127]) + struct.pack(">Q", length)
+        with self.lock:
+            self.wfile.write(header + payload)
+            self.wfile.flush()
+
+    def send_json(self, message: dict):
+        self.send_frame(0x1, json.dumps(message).encode("utf-8"))
+
+
+class StubBackendServer(ThreadingHTTPServer):
+    """Threaded stub server that can be started/stopped from tests and benchmarks"""
+
+    daemon_threads = True
+
+    def __init__(self, host="127.0.0.1", port=0):
+        super().__init__((host, port), StubBackendHandler)
+        self.carts = {}
+        self.versions = {}  # cart_id -> int, bumped on every change (served as the ETag)
+        self.not_modified_count = 0
+        self.lock = threading.RLock()  # Re-entrant: snapshots are sent while subscribing
+        self.stream_delay = 0.0  # Seconds between streamed chat chunks
+        self.request_delay = 0.0  # Seconds every cart GET / optimize takes (simulates a slow DB)
+        self.call_counts = {}  # "get_cart" / "optimize" -> number of requests served
+        self.subscribers = {}  # cart_id -> [PushSubscriber]
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def count_call(self, name: str):
+        with self.lock:
+            self.call_counts[name] = self.call_counts.get(name, 0) + 1
+        if self.request_delay:
+            time.sleep(self.request_delay)
+
+    # --- push channel ---
+    def subscribe(self, cart_id: str, subscriber: PushSubscriber):
+        with self.lock:
+            self.subscribers.setdefault(cart_id, []).append(subscriber)
+            self.send_snapshot(cart_id, subscriber)
+
+    def unsubscribe(self, cart_id: str, subscriber: PushSubscriber):
+        with self.lock:
+            if subscriber in self.subscribers.get(cart_id, []):
+                self.subscribers[cart_id].remove(subscriber)
+
+    def send_snapshot(self, cart_id: str, subscriber: PushSubscriber):
+        with self.lock:
+            cart = self.carts.setdefault(cart_id, _empty_cart())
+            subscriber.send_json({"type": "snapshot", "version": str(self.versions.get(cart_id, 0)), "cart": cart})
+
+    def _publish_delta(self, cart_id: str, upserts: list, removed: list):
+        # Called with self.lock held, so deltas go out in version order
+        cart = self.carts[cart_id]
+        version = self.versions.get(cart_id, 0)
+        message = {
+            "type": "delta", "version": str(version), "base_version": str(version - 1),
+            "upserts": upserts, "removed": removed,
+            "store_name": cart["store_name"], "address": cart["address"], "total_price": cart["total_price"],
+        }
+        for subscriber in list(self.subscribers.get(cart_id, [])):
+            try:
+                subscriber.send_json(message)
+            except OSError:
+                self.subscribers[cart_id].remove(subscriber)
+
+    # --- cart state ---
+    def create_cart(self) -> str:
+        cart_id = str(uuid.uuid4())
+        with self.lock:
+            self.carts[cart_id] = _empty_cart()
+        return cart_id
+
+    def get_cart(self, cart_id: str) -> dict:
+        return self.get_cart_with_version(cart_id)[0]
+
+    def get_cart_with_version(self, cart_id: str):
+        with self.lock:
+            cart = self.carts.setdefault(cart_id, _empty_cart())
+            return json.loads(json.dumps(cart)), self.versions.get(cart_id, 0)
+
+    def bump_version(self, cart_id: str):
+        with self.lock:
+            self.carts.setdefault(cart_id, _empty_cart())
+            self.versions[cart_id] = self.versions.get(cart_id, 0) + 1
+            self._publish_delta(cart_id, [], [])
+
+    def set_quantities(self, cart_id: str, names: list, quantities: list):
+        with self.lock:
+            cart = self.carts.setdefault(cart_id, _empty_cart())
+            by_name = {item["item_name"]: item for item in cart["items"]}
+            for name, qty in zip(names, quantities):
+                if name in by_name:
+                    by_name[name]["quantity"] = qty
+                else:
+                    item = {"id": name, "item_name": name, "quantity": qty, "price": 10.0}
+                    cart["items"].append(item)
+                    by_name[name] = item
+            removed = [item["id"] for item in cart["items"] if item["quantity"] <= 0]
+            cart["items"] = [item for item in cart["items"] if item["quantity"] > 0]
+            cart["total_price"] = round(sum(i["quantity"] * i["price"] for i in cart["items"]), 2)
+            self.versions[cart_id] = self.versions.get(cart_id, 0) + 1
+            upserts = [dict(by_name[name]) for name in names if by_name[name]["quantity"] > 0]
+            self._publish_delta(cart_id, upserts, removed)
+
+    # --- lifecycle ---
+    def start(self):
+        # Short poll interval so stop() returns quickly in tests
+        self._thread = threading.Thread(target=self.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+
+if __name__ == "__main__":
+    port = int(sys.argv[1]) if len(sys.argv) > 1 else 8000
+    server = StubBackendServer(host="", port=port)
+    print(f"🧪 Stub backend is running at http://localhost:{port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.server_close()
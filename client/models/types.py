@@ -1,22 +1,38 @@
 from dataclasses import dataclass
 from typing import List, Optional
 
-# Representation of an item in the cart
-@dataclass
+def to_agorot(shekels: float) -> int:
+    """Money is kept in integer agorot (1/100 ₪), so totals never drift over many edits"""
+    return int(round(shekels * 100))
+
+# Representation of an item in the cart (slots: carts can hold hundreds of these)
+@dataclass(slots=True)
 class CartItem:
     id: str
     name: str
     quantity: int
     price: float
+    image_url: Optional[str] = None  # Product thumbnail from the chain's catalogue, when it has one
 
 # Representation of a successful response from the server
-@dataclass
+@dataclass(slots=True)
 class StoreResult:
     store_name: str
     address: str
     total_price: float
     items: List[CartItem]
 
+# Incremental cart change pushed by the DB (items are upserted by id, removed ids are dropped)
+@dataclass(slots=True)
+class CartDelta:
+    version: str
+    base_version: Optional[str]
+    upserts: List[CartItem]
+    removed: List[str]
+    store_name: Optional[str] = None
+    address: Optional[str] = None
+    total_price: Optional[float] = None
+
 # Representation of a clarification request (when the AI is confused)
 @dataclass
 class ClarificationRequest:
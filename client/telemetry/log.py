@@ -0,0 +1,142 @@
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+import threading
+
+ROOT = "supermarket"
+
+# SUPERMARKET_LOG="info,transport=debug,repo=warning": default level, then per-component overrides
+ENV_VAR = "SUPERMARKET_LOG"
+
+
+class StructuredLogger:
+    """
+    Logger for one component (repo, transport, coalescer, ...).
+
+    Calls take a constant message plus key=value fields. The level check happens first, so a
+    disabled call costs one integer comparison; enabled records are formatted on the logging
+    thread, not the caller's (see configure_logging). Fields are rendered later, so pass values
+    that won't change afterwards (ids, counts, strings) rather than live objects.
+    """
+
+    def __init__(self, component: str):
+        self.component = component
+        self._logger = logging.getLogger(f"{ROOT}.{component}")
+        self._sample_counts = {}
+        self._sample_lock = threading.Lock()
+
+    def is_enabled(self, level: int) -> bool:
+        return self._logger.isEnabledFor(level)
+
+    def _log(self, level: int, msg: str, fields: dict, exc_info=None):
+        if self._logger.isEnabledFor(level):
+            self._logger.log(level, msg, exc_info=exc_info,
+                             extra={"component": self.component, "fields": fields})
+
+    def debug(self, msg: str, **fields):
+        self._log(logging.DEBUG, msg, fields)
+
+    def info(self, msg: str, **fields):
+        self._log(logging.INFO, msg, fields)
+
+    def warning(self, msg: str, **fields):
+        self._log(logging.WARNING, msg, fields)
+
+    def error(self, msg: str, exc_info=None, **fields):
+        self._log(logging.ERROR, msg, fields, exc_info)
+
+    def payload(self, msg: str, payload, every: int = 100, **fields):
+        """
+        DEBUG dump of a high-volume payload, emitted for the first call and then one in *every*.
+        *payload* may be a callable; it is only evaluated for the calls that are logged.
+        """
+        if not self._logger.isEnabledFor(logging.DEBUG):
+            return
+        with self._sample_lock:
+            count = self._sample_counts.get(msg, 0)
+            self._sample_counts[msg] = count + 1
+        if count % every:
+            return
+        value = payload() if callable(payload) else payload
+        self._log(logging.DEBUG, msg, dict(fields, payload=value, sampled=f"1/{every}"))
+
+
+def get_logger(component: str) -> StructuredLogger:
+    return StructuredLogger(component)
+
+
+class StructuredFormatter(logging.Formatter):
+    """'12:00:01.234 INFO  repo: Cart fetched cart_id=abc items=3'"""
+
+    def __init__(self):
+        super().__init__("%(asctime)s.%(msecs)03d %(levelname)-5s %(component)s: %(message)s", "%H:%M:%S")
+
+    def format(self, record):
+        if not hasattr(record, "component"):
+            record.component = record.name
+        text = super().format(record)
+        fields = getattr(record, "fields", None)
+        if fields:
+            text += " " + " ".join(f"{key}={value!r}" if isinstance(value, str) and " " in value
+                                   else f"{key}={value}" for key, value in fields.items())
+        return text
+
+
+class _DeferredQueueHandler(logging.handlers.QueueHandler):
+    # The stock prepare() formats on the calling thread; hand the raw record to the listener instead
+    def prepare(self, record):
+        return record
+
+
+_listener = None
+
+
+def parse_levels(spec: str):
+    """'info,transport=debug' -> (logging.INFO, {"transport": logging.DEBUG})"""
+    default = logging.INFO
+    components = {}
+    for part in filter(None, (p.strip() for p in (spec or "").split(","))):
+        if "=" in part:
+            component, level = part.split("=", 1)
+            components[component.strip()] = logging.getLevelName(level.strip().upper())
+        else:
+            default = logging.getLevelName(part.upper())
+    return default, components
+
+
+def configure_logging(spec: str = None, handler: logging.Handler = None):
+    """
+    Routes all component loggers through a background QueueListener.
+    *spec* defaults to $SUPERMARKET_LOG (see parse_levels); *handler* defaults to stderr.
+    """
+    global _listener
+    shutdown_logging()
+    default, components = parse_levels(spec if spec is not None else os.environ.get(ENV_VAR, "info"))
+
+    root = logging.getLogger(ROOT)
+    root.handlers.clear()
+    root.setLevel(default)
+    root.propagate = False
+    for name, logger in logging.root.manager.loggerDict.items():
+        if name.startswith(ROOT + ".") and isinstance(logger, logging.Logger):
+            logger.setLevel(logging.NOTSET)
+    for component, level in components.items():
+        logging.getLogger(f"{ROOT}.{component}").setLevel(level)
+
+    handler = handler or logging.StreamHandler(sys.stderr)
+    handler.setFormatter(StructuredFormatter())
+    log_queue = queue.SimpleQueue()
+    root.addHandler(_DeferredQueueHandler(log_queue))
+    _listener = logging.handlers.QueueListener(log_queue, handler, respect_handler_level=True)
+    _listener.start()
+    return _listener
+
+
+def shutdown_logging():
+    """Flushes and stops the background listener (safe to call more than once)"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
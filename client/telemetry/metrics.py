@@ -0,0 +1,320 @@
+import atexit
+import bisect
+import functools
+import inspect
+import json
+import os
+import re
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from telemetry.tracing import TRACER
+from telemetry.log import get_logger
+
+log = get_logger("metrics")
+
+# Latency buckets (seconds): 0.5 ms .. ~55 s, each 1.25x the previous one.
+# Quantiles are interpolated inside a bucket, so estimates are off by at most 25%.
+DEFAULT_BUCKETS = tuple(round(0.0005 * 1.25 ** i, 6) for i in range(53))
+
+# Path segments that identify a resource rather than an endpoint (uuids, numbers, hex ids)
+_ID_SEGMENT = re.compile(r"^(?:[0-9a-fA-F-]{8,}|\d+)$")
+
+
+def endpoint_name(method: str, path: str) -> str:
+    """'GET /cart/3f2a...' -> 'GET /cart/{id}' so every cart shares one histogram"""
+    segments = [("{id}" if _ID_SEGMENT.match(segment) else segment) for segment in path.split("?")[0].split("/")]
+    return f"{method} {'/'.join(segments)}"
+
+
+def _label_key(labels: dict) -> tuple:
+    return tuple(sorted(labels.items()))
+
+
+def _format_labels(key: tuple, extra: str = "") -> str:
+    parts = [f'{name}="{value}"' for name, value in key]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class Counter:
+    def __init__(self):
+        self.value = 0
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1):
+        with self._lock:
+            self.value += amount
+
+
+class Gauge:
+    """A value that goes up and down (queue depth, tasks running)"""
+
+    def __init__(self):
+        self.value = 0
+        self._lock = threading.Lock()
+
+    def set(self, value):
+        with self._lock:
+            self.value = value
+
+    def inc(self, amount=1):
+        with self._lock:
+            self.value += amount
+
+    def dec(self, amount=1):
+        self.inc(-amount)
+
+
+class Histogram:
+    """Fixed-bucket histogram: O(log buckets) per observation, no samples kept"""
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # Last slot: above the largest bucket
+        self.count = 0
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.count += 1
+            self.sum += value
+
+    def quantile(self, q: float):
+        with self._lock:
+            counts = list(self.counts)
+            total = self.count
+        if not total:
+            return None
+        rank = q * total
+        seen = 0
+        for index, bucket_count in enumerate(counts):
+            if bucket_count and seen + bucket_count >= rank:
+                lower = self.buckets[index - 1] if index > 0 else 0.0
+                upper = self.buckets[index] if index < len(self.buckets) else self.buckets[-1]
+                return lower + (upper - lower) * (rank - seen) / bucket_count
+            seen += bucket_count
+        return self.buckets[-1]
+
+
+class MetricsRegistry:
+    """
+    Process-wide counters and latency histograms, keyed by metric name + labels.
+
+    Recording is a dict lookup and a short lock, cheap enough for every request. Reading
+    (snapshot / Prometheus text) happens off the hot path, from the exporter.
+    """
+
+    def __init__(self):
+        self._counters = {}    # name -> {label_key: Counter}
+        self._gauges = {}      # name -> {label_key: Gauge}
+        self._histograms = {}  # name -> {label_key: Histogram}
+        self._help = {}
+        self._lock = threading.Lock()
+
+    def _get(self, family: dict, name: str, labels: dict, factory):
+        key = _label_key(labels)
+        series = family.get(name)
+        metric = series.get(key) if series else None
+        if metric is None:
+            with self._lock:
+                series = family.setdefault(name, {})
+                metric = series.setdefault(key, factory())
+        return metric
+
+    def describe(self, name: str, help_text: str):
+        self._help[name] = help_text
+
+    def counter(self, name: str, **labels) -> Counter:
+        return self._get(self._counters, name, labels, Counter)
+
+    def gauge(self, name: str, **labels) -> Gauge:
+        return self._get(self._gauges, name, labels, Gauge)
+
+    def histogram(self, name: str, **labels) -> Histogram:
+        return self._get(self._histograms, name, labels, Histogram)
+
+    def inc(self, name: str, amount=1, **labels):
+        self.counter(name, **labels).inc(amount)
+
+    def observe(self, name: str, value: float, **labels):
+        self.histogram(name, **labels).observe(value)
+
+    @contextmanager
+    def timed(self, name: str, **labels):
+        """Records the duration of the with-block (also when it raises)"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - started, **labels)
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+            self._gauges.clear()
+            self._histograms.clear()
+
+    # --- Export ---
+    def snapshot(self) -> dict:
+        """{"counters"/"gauges": {name: [{labels, value}]}, "histograms": {name: [{labels, count, sum, p50, p95, p99}]}}"""
+        with self._lock:
+            counters = {name: dict(series) for name, series in self._counters.items()}
+            gauges = {name: dict(series) for name, series in self._gauges.items()}
+            histograms = {name: dict(series) for name, series in self._histograms.items()}
+        return {
+            "counters": {
+                name: [{"labels": dict(key), "value": counter.value} for key, counter in series.items()]
+                for name, series in counters.items()
+            },
+            "gauges": {
+                name: [{"labels": dict(key), "value": gauge.value} for key, gauge in series.items()]
+                for name, series in gauges.items()
+            },
+            "histograms": {
+                name: [{"labels": dict(key), "count": hist.count, "sum": round(hist.sum, 6),
+                        "p50": hist.quantile(0.50), "p95": hist.quantile(0.95), "p99": hist.quantile(0.99)}
+                       for key, hist in series.items()]
+                for name, series in histograms.items()
+            },
+        }
+
+    def prometheus_text(self) -> str:
+        """Prometheus text exposition format (version 0.0.4)"""
+        lines = []
+        with self._lock:
+            counters = {name: dict(series) for name, series in self._counters.items()}
+            gauges = {name: dict(series) for name, series in self._gauges.items()}
+            histograms = {name: dict(series) for name, series in self._histograms.items()}
+        for kind, family in (("counter", counters), ("gauge", gauges)):
+            for name, series in sorted(family.items()):
+                if name in self._help:
+                    lines.append(f"# HELP {name} {self._help[name]}")
+                lines.append(f"# TYPE {name} {kind}")
+                for key, metric in series.items():
+                    lines.append(f"{name}{_format_labels(key)} {metric.value}")
+        for name, series in sorted(histograms.items()):
+            if name in self._help:
+                lines.append(f"# HELP {name} {self._help[name]}")
+            lines.append(f"# TYPE {name} histogram")
+            for key, hist in series.items():
+                with hist._lock:
+                    counts, total, value_sum = list(hist.counts), hist.count, hist.sum
+                cumulative = 0
+                for bound, bucket_count in zip(hist.buckets, counts):
+                    cumulative += bucket_count
+                    le = 'le="%s"' % bound
+                    lines.append(f"{name}_bucket{_format_labels(key, le)} {cumulative}")
+                le = 'le="+Inf"'
+                lines.append(f"{name}_bucket{_format_labels(key, le)} {total}")
+                lines.append(f"{name}_sum{_format_labels(key)} {value_sum}")
+                lines.append(f"{name}_count{_format_labels(key)} {total}")
+        return "\n".join(lines) + "\n"
+
+    def dump(self, path: str):
+        """Writes the registry to *path*: Prometheus text for .prom/.txt, JSON (with p50/p95/p99) otherwise"""
+        if path.endswith((".prom", ".txt")):
+            data = self.prometheus_text()
+        else:
+            data = json.dumps(self.snapshot(), indent=2)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+
+# The registry every module records into
+REGISTRY = MetricsRegistry()
+REGISTRY.describe("http_request_duration_seconds", "Backend call latency by backend and endpoint")
+REGISTRY.describe("http_errors_total", "Failed backend calls by kind (connection, timeout, request, http_5xx, http_4xx, circuit_open)")
+REGISTRY.describe("http_retries_total", "Backend calls that were retried")
+REGISTRY.describe("http_request_bytes_total", "Request body bytes sent")
+REGISTRY.describe("http_response_bytes_total", "Response body bytes received")
+REGISTRY.describe("pipeline_step_duration_seconds", "Duration of client-side pipeline steps")
+REGISTRY.describe("cart_responses_dropped_total", "Cart responses not rendered because a later mutation superseded them")
+REGISTRY.describe("event_loop_latency_seconds", "How late the GUI heartbeat timer fired (event-loop latency)")
+REGISTRY.describe("gui_stalls_total", "GUI event-loop stalls over the watchdog threshold")
+REGISTRY.describe("gui_stall_duration_seconds", "Duration of GUI event-loop stalls over the watchdog threshold")
+REGISTRY.describe("executor_queue_depth", "Background tasks waiting for a worker thread, by priority")
+REGISTRY.describe("executor_active_tasks", "Background tasks currently running")
+REGISTRY.describe("executor_queue_wait_seconds", "Time a background task waited before it started, by priority")
+REGISTRY.describe("executor_tasks_total", "Finished background tasks by task and outcome (ok, failed, cancelled)")
+REGISTRY.describe("render_cache_requests_total", "Shared pixmap cache lookups (shadows, avatars, icons) by result (hit, miss)")
+REGISTRY.describe("thumbnail_requests_total", "Product thumbnail lookups by source (memory, disk, network, failed)")
+REGISTRY.describe("ipc_call_duration_seconds", "Round trip of repository calls to the repository process, by method")
+
+
+def timed_step(step: str):
+    """
+    Decorator: records every call of the function in pipeline_step_duration_seconds{step=...}
+    and, inside a traced user action, as a child span named after the step
+    """
+    def decorator(fn):
+        if inspect.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                with TRACER.span(step), REGISTRY.timed("pipeline_step_duration_seconds", step=step):
+                    return await fn(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with TRACER.span(step), REGISTRY.timed("pipeline_step_duration_seconds", step=step):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        if self.path != "/metrics":
+            self.send_error(404)
+            return
+        body = self.server.registry.prometheus_text().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class MetricsExporter:
+    """Optional exporters: periodic file dump and/or a Prometheus-scrapable /metrics endpoint"""
+
+    def __init__(self, registry: MetricsRegistry = REGISTRY, path: str = None, port: int = None,
+                 interval: float = 5.0):
+        self.registry = registry
+        self.path = path
+        self.interval = interval
+        self.server = None
+        self._stop = threading.Event()
+
+        if path:
+            threading.Thread(target=self._dump_loop, name="metrics-dump", daemon=True).start()
+            atexit.register(self.registry.dump, path)
+        if port is not None:
+            self.server = ThreadingHTTPServer(("127.0.0.1", port), _MetricsHandler)
+            self.server.daemon_threads = True
+            self.server.registry = registry
+            threading.Thread(target=self.server.serve_forever, name="metrics-http", daemon=True).start()
+            log.info("Serving Prometheus metrics", url=f"http://127.0.0.1:{self.server.server_address[1]}/metrics")
+
+    def _dump_loop(self):
+        while not self._stop.wait(self.interval):
+            self.registry.dump(self.path)
+
+    def stop(self):
+        self._stop.set()
+        if self.server:
+            self.server.shutdown()
+            self.server.server_close()
+        if self.path:
+            self.registry.dump(self.path)
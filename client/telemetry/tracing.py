@@ -0,0 +1,158 @@
+import contextvars
+import json
+import os
+import threading
+import time
+import uuid
+from collections import deque
+from contextlib import contextmanager
+from telemetry.log import get_logger
+
+log = get_logger("tracing")
+
+
+class Span:
+    """One timed operation inside a trace. end() is idempotent and may run on any thread."""
+
+    __slots__ = ("tracer", "name", "trace_id", "span_id", "parent_id", "start_ns", "end_ns",
+                 "attributes", "thread_id", "thread_name")
+
+    def __init__(self, tracer, name: str, trace_id: str, parent_id: str = None, attributes: dict = None):
+        self.tracer = tracer
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent_id = parent_id
+        self.start_ns = time.perf_counter_ns()
+        self.end_ns = None
+        self.attributes = dict(attributes or {})
+        thread = threading.current_thread()
+        self.thread_id = thread.ident
+        self.thread_name = thread.name
+
+    def set(self, key: str, value):
+        self.attributes[key] = value
+
+    def end(self):
+        if self.end_ns is None:
+            self.end_ns = time.perf_counter_ns()
+            self.tracer._record(self)
+
+    @property
+    def duration_ms(self):
+        if self.end_ns is None:
+            return None
+        return (self.end_ns - self.start_ns) / 1e6
+
+    def traceparent(self) -> str:
+        """W3C Trace Context header value"""
+        return f"00-{self.trace_id}-{self.span_id}-01"
+
+
+class Tracer:
+    """
+    Collects spans for user actions (send prompt, +/-, optimize) from click to repaint.
+
+    The current span is tracked per thread, and per asyncio task (a context variable), so
+    coroutines interleaved on one loop thread each keep their own. Work handed to another thread
+    carries its parent span explicitly and re-activates it there (see activate()). span() only records when it has
+    a parent, so calls outside a user action cost nothing. Finished spans are kept in a bounded
+    buffer and exported as a Chrome trace (chrome://tracing, Perfetto).
+    """
+
+    def __init__(self, max_spans: int = 10000):
+        self._finished = deque(maxlen=max_spans)
+        self._stack = contextvars.ContextVar(f"tracer_stack_{id(self)}", default=())
+        self._lock = threading.Lock()
+        self._epoch_ns = time.perf_counter_ns()
+
+    # --- Creating spans ---
+    def start_trace(self, name: str, **attributes) -> Span:
+        """Root span of a new trace; the caller ends it (usually after the repaint)"""
+        return Span(self, name, uuid.uuid4().hex, attributes=attributes)
+
+    def start_span(self, name: str, parent: Span = None, **attributes):
+        parent = parent or self.current()
+        if parent is None:
+            return None
+        return Span(self, name, parent.trace_id, parent.span_id, attributes)
+
+    @contextmanager
+    def span(self, name: str, **attributes):
+        """Child of the current span for the duration of the with-block (None outside a trace)"""
+        span = self.start_span(name, **attributes)
+        if span is None:
+            yield None
+            return
+        with self.activate(span):
+            try:
+                yield span
+            except BaseException as e:
+                span.set("error", repr(e))
+                raise
+            finally:
+                span.end()
+
+    @contextmanager
+    def activate(self, span: Span):
+        """Makes *span* the current span on this thread or asyncio task (e.g. inside a worker)"""
+        if span is None:
+            yield
+            return
+        stack = self._stack.get()
+        self._stack.set(stack + (span,))
+        try:
+            yield
+        finally:
+            self._stack.set(stack)
+
+    def current(self):
+        stack = self._stack.get()
+        return stack[-1] if stack else None
+
+    # --- Reading / export ---
+    def _record(self, span: Span):
+        with self._lock:
+            self._finished.append(span)
+
+    def finished_spans(self, trace_id: str = None) -> list:
+        with self._lock:
+            spans = list(self._finished)
+        return [s for s in spans if trace_id is None or s.trace_id == trace_id]
+
+    def clear(self):
+        with self._lock:
+            self._finished.clear()
+
+    def chrome_trace(self) -> dict:
+        """Trace Event Format: one complete ("X") event per span, one thread_name record per thread"""
+        pid = os.getpid()
+        events = []
+        threads = {}
+        for span in self.finished_spans():
+            threads[span.thread_id] = span.thread_name
+            events.append({
+                "name": span.name,
+                "cat": span.name.split(".")[0],
+                "ph": "X",
+                "ts": (span.start_ns - self._epoch_ns) / 1000,
+                "dur": (span.end_ns - span.start_ns) / 1000,
+                "pid": pid,
+                "tid": span.thread_id,
+                "args": dict(span.attributes, trace_id=span.trace_id, span_id=span.span_id,
+                             parent_id=span.parent_id),
+            })
+        for tid, name in threads.items():
+            events.append({"name": "thread_name", "ph": "M", "pid": pid, "tid": tid, "args": {"name": name}})
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def export_chrome_trace(self, path: str):
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.chrome_trace(), f)
+        os.replace(tmp_path, path)
+        log.info("Wrote Chrome trace", spans=len(self.finished_spans()), path=path)
+
+
+# The tracer every module records into
+TRACER = Tracer()
@@ -0,0 +1,48 @@
+import os
+import sys
+import pytest
+
+# Widgets and Qt signals are exercised without a display
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+# PySide6 6.12 bindings drop a reference to None on every call of a void Qt method (QTimer.stop,
+# QWebSocket.close, ...). None is immortal from Python 3.12 on; on older interpreters a test run
+# makes enough of these calls to free None and abort ("deallocating None"). Spare references
+# keep it alive for the session.
+if sys.version_info < (3, 12):
+    _NONE_REFS = [None] * 1_000_000
+
+@pytest.fixture(scope="session")
+def qapp():
+    """One QApplication shared by every Qt-based test"""
+    from PySide6.QtWidgets import QApplication
+    app = QApplication.instance() or QApplication([])
+    yield app
+
+@pytest.fixture
+def stub_server():
+    """In-memory agent + DB backend (mock.stub_backend) on a free local port"""
+    from client.mock.stub_backend import StubBackendServer
+    server = StubBackendServer().start()
+    yield server
+    server.stop()
+
+@pytest.fixture
+def stall_watchdog(qapp):
+    """Test mode: fails the test if the GUI event loop stalls for more than $SUPERMARKET_STALL_FAIL_MS (200)"""
+    from client.core.stall_watchdog import StallWatchdog
+    from client.telemetry.metrics import MetricsRegistry
+    limit = float(os.environ.get("SUPERMARKET_STALL_FAIL_MS", "200"))
+    watchdog = StallWatchdog(threshold_ms=limit / 2, fail_over_ms=limit, registry=MetricsRegistry()).start()
+    yield watchdog
+    watchdog.stop()
+    watchdog.assert_no_stalls()
+
+def wait_until(app, predicate, timeout=2.0):
+    """Pumps the Qt event loop until predicate() is true or the timeout expires"""
+    import time
+    deadline = time.monotonic() + timeout
+    while not predicate() and time.monotonic() < deadline:
+        app.processEvents()
+        time.sleep(0.001)
+    return predicate()
@@ -0,0 +1,137 @@
+import threading
+import time
+import pytest
+from conftest import wait_until
+from client.core import task_executor
+from client.models.types import StoreResult
+
+
+class SlowRepo:
+    """Session init blocks until released; records the prompts that reach the agent"""
+    def __init__(self):
+        self.current_cart_id = None
+        self.release = threading.Event()
+        self.prompts = []
+        self.fetch_threads = []
+
+    def initialize_session(self):
+        self.release.wait(5)
+        self.current_cart_id = "cart-1"
+        return True
+
+    def backend_health(self):
+        return {}
+
+    def cart_push_url(self):
+        return None
+
+    def has_pending_mutations(self, cart_id=None):
+        return False
+
+    def pending_mutation_carts(self):
+        return []
+
+    def stream_prompt_to_ai(self, text, user_id, on_chunk):
+        self.prompts.append((text, user_id))
+        return "Done"
+
+    def fetch_cart(self):
+        self.fetch_threads.append(threading.current_thread())
+        return StoreResult("Mega", "", 0.0, [])
+
+
+@pytest.fixture
+def controller(qapp):
+    from client.core.app_controller import AppController
+    repo = SlowRepo()
+    started = time.perf_counter()
+    controller = AppController(repo=repo)
+    controller.construct_seconds = time.perf_counter() - started
+    yield controller
+    repo.release.set()
+    wait_until(qapp, lambda: controller.is_ready)
+    controller.close()
+
+
+def test_window_does_not_wait_for_backend(qapp, controller):
+    """Test: The controller is built (and can paint) while login and session init are still running"""
+    assert controller.construct_seconds < 0.4  # Login alone sleeps 0.5 s
+    assert not controller.is_ready
+    assert controller.chat_presenter.view.chat_input.input_field.placeholderText().startswith("Connecting")
+
+
+def test_prompts_typed_while_connecting_are_replayed(qapp, controller):
+    """Test: Prompts sent before the session is ready go out in order once it is, with the logged-in user"""
+    controller.chat_presenter.handle_send_click("milk please")
+    controller.chat_presenter.handle_send_click("and eggs")
+    assert controller.repo.prompts == []
+
+    controller.repo.release.set()
+    assert wait_until(qapp, lambda: len(controller.repo.prompts) == 2, timeout=3)
+    user_id = controller.user_manager.current_user.id
+    assert controller.repo.prompts == [("milk please", user_id), ("and eggs", user_id)]
+    assert controller.chat_presenter.view.chat_input.input_field.placeholderText() == "Message the AI assistant..."
+
+
+def test_cart_refresh_after_reply_runs_off_the_gui_thread(qapp, controller, stall_watchdog):
+    """Test: The post-reply cart fetch is a background stage; text and cart are rendered in one go"""
+    controller.repo.release.set()
+    assert wait_until(qapp, lambda: controller.is_ready, timeout=3)
+    rendered = []
+    controller.chat_presenter.complete_agent_stream = lambda text: rendered.append(("text", text))
+    controller.cart_presenter.update_data = lambda cart: rendered.append(("cart", cart.store_name))
+
+    controller.handle_user_message("add milk")
+
+    assert wait_until(qapp, lambda: len(rendered) == 2, timeout=3)
+    assert rendered == [("text", "Done"), ("cart", "Mega")]
+    assert controller.repo.fetch_threads and threading.main_thread() not in controller.repo.fetch_threads
+
+
+def test_failed_stream_is_shown_to_the_user(qapp, controller):
+    """Test: A stream that breaks after some chunks ends its bubble and adds an error, instead of hanging"""
+    from client.core.app_controller import ClarificationRequest  # The class the controller checks (models.types)
+    controller.repo.release.set()
+    assert wait_until(qapp, lambda: controller.is_ready, timeout=3)
+    def stream_prompt_to_ai(text, user_id, on_chunk):
+        on_chunk("Adding mi")
+        return ClarificationRequest(question="Server Error", options=["Try Again"])
+    controller.repo.stream_prompt_to_ai = stream_prompt_to_ai
+
+    controller.handle_user_message("add milk")
+
+    messages = controller.chat_presenter.model.messages
+    assert wait_until(qapp, lambda: messages and "interrupted" in messages[-1].text, timeout=3)
+    assert "Server Error" in messages[-1].text
+    view = controller.chat_presenter.view
+    assert view._stream_bubble is None and view._thinking_bubble is None
+
+
+def test_cart_refresh_is_decided_when_the_prompt_is_sent(qapp, controller):
+    """Test: The worker gets the push channel's state as a bool read on the GUI thread, not a callable"""
+    from client.core.prompt_queue import QueuedPrompt
+    controller.cart_push.available = True
+    pushed = controller._make_prompt_task(QueuedPrompt("add milk"))
+    controller.cart_push.available = False
+    polled = controller._make_prompt_task(QueuedPrompt("add eggs"))
+
+    assert pushed.refresh_cart is False and polled.refresh_cart is True
+
+
+def test_failed_optimize_ends_its_trace(qapp, controller):
+    """Test: When the optimize worker raises, the user.optimize trace ends (with the error) and the user is told"""
+    controller.repo.release.set()
+    assert wait_until(qapp, lambda: controller.is_ready, timeout=3)
+    def optimize_current_cart():
+        raise RuntimeError("optimizer crashed")
+    controller.repo.optimize_current_cart = optimize_current_cart
+    shown = []
+    controller.chat_presenter.display_agent_response = shown.append
+
+    controller.handle_optimize_request()
+
+    def failed_trace():
+        return [span for span in task_executor.TRACER.finished_spans()
+                if span.name == "user.optimize" and "optimizer crashed" in span.attributes.get("error", "")]
+    assert wait_until(qapp, failed_trace, timeout=3)
+    assert shown[-1].startswith("⚠️ Optimization failed")
@@ -0,0 +1,316 @@
+import asyncio
+import json
+
+import httpx
+import pytest
+from client.core.async_bridge import AsyncBridge, AsyncTaskExecutor
+from client.core.task_executor import TaskExecutor
+from client.core.workers import AIWorker, CartUpdateWorker
+from client.data.api.backend_health import CLOSED, OPEN
+from client.data.api.async_supermarket_client import AsyncSupermarketAPIClient
+from client.data.repositories.async_supermarket_repo import AsyncSupermarketRepository, BlockingRepository
+from client.data.repositories.mutation_journal import MutationJournal
+from conftest import wait_until
+
+MEGA = {"cart": {"store_name": "Mega", "items": [
+    {"id": "milk", "item_name": "Milk", "quantity": 4, "price": 5.0},
+    {"id": "eggs", "item_name": "Eggs", "quantity": 1, "price": 12.0}]}}
+
+def _backend(request: httpx.Request) -> httpx.Response:
+    """In-process stand-in for both backends"""
+    if request.url.path == "/session/initialize":
+        return httpx.Response(200, json={"type": "session_initialized", "data": {"cart_id": "c1", "message": "Ready"}})
+    if request.url.path == "/chat_message":
+        message = json.loads(request.content)["message"]
+        return httpx.Response(200, json={"type": "response", "data": {"ai_message": f"Echo: {message}"}})
+    if request.url.path == "/cart/c1":
+        return httpx.Response(200, json={"cart": {"store_name": "Mega", "total_price": 20.0,
+                                                  "items": [{"item_name": "Milk", "quantity": 2, "price": 10.0}]}})
+    if request.url.path == "/cart/c2":
+        return httpx.Response(200, json={"cart": {"store_name": "Corner", "total_price": 6.0, "items": []}})
+    if request.url.path.endswith(("/items", "/optimize")):
+        return httpx.Response(200, json={"status": "ok"})
+    return httpx.Response(404)
+
+@pytest.fixture
+def bridge():
+    bridge = AsyncBridge()
+    yield bridge
+    bridge.shutdown()
+
+@pytest.fixture
+def async_repo():
+    return AsyncSupermarketRepository(AsyncSupermarketAPIClient(transport=httpx.MockTransport(_backend)))
+
+def test_blocking_wrapper_keeps_sync_api(qapp, bridge, async_repo):
+    """Test: The sync wrapper behaves like SupermarketRepository"""
+    repo = BlockingRepository(async_repo, bridge)
+
+    assert repo.initialize_session() is True
+    assert repo.current_cart_id == "c1"
+    assert repo.send_prompt_to_ai("milk", "u1") == "Echo: milk"
+
+    cart = repo.fetch_cart()
+    assert cart.store_name == "Mega"
+    assert cart.items[0].name == "Milk" and cart.items[0].quantity == 2
+
+def test_concurrent_calls_share_one_loop(qapp, bridge, async_repo):
+    """Test: Independent requests run concurrently on the bridge and results arrive via Qt signals"""
+    async_repo.current_cart_id = "c1"
+    results = {}
+
+    chat = bridge.submit(async_repo.send_prompt_to_ai("eggs", "u1"))
+    cart = bridge.submit(async_repo.fetch_cart())
+    chat.finished.connect(lambda r: results.__setitem__("chat", r))
+    cart.finished.connect(lambda r: results.__setitem__("cart", r))
+
+    assert wait_until(qapp, lambda: len(results) == 2)
+    assert results["chat"] == "Echo: eggs"
+    assert results["cart"].total_price == 20.0
+
+def test_update_returns_the_cart_it_changed(qapp, bridge, async_repo):
+    """Test: Updating a cart other than the current one returns that cart, not the current one"""
+    repo = BlockingRepository(async_repo, bridge)
+    async_repo.current_cart_id = "c1"
+
+    assert repo.update_cart_items({"milk": 1}, "c2").store_name == "Corner"
+    assert repo.fetch_cart().store_name == "Mega"
+
+def test_failures_are_delivered_as_signal(qapp, bridge):
+    """Test: An exception inside the coroutine is reported through the failed signal"""
+    async def boom():
+        await asyncio.sleep(0)
+        raise RuntimeError("boom")
+
+    errors = []
+    call = bridge.submit(boom())
+    call.failed.connect(errors.append)
+
+    assert wait_until(qapp, lambda: errors)
+    assert "boom" in str(errors[0])
+
+def test_circuit_breaker_covers_async_transport(qapp, bridge):
+    """Test: 5xx answers open the backend's circuit; later calls fail fast without reaching the server"""
+    hits = []
+
+    def failing(request):
+        hits.append(request.url.path)
+        return httpx.Response(503)
+
+    repo = BlockingRepository(AsyncSupermarketRepository(AsyncSupermarketAPIClient(transport=httpx.MockTransport(failing))), bridge)
+    repo.current_cart_id = "c1"
+    health = repo.backend_health()
+    assert set(health) == {"agent", "db"} and health["db"].state == CLOSED
+
+    for _ in range(health["db"].failure_threshold):
+        assert repo.fetch_cart().store_name == "Server Error"
+    assert health["db"].state == OPEN
+    assert health["agent"].state == CLOSED
+
+    calls = len(hits)
+    assert repo.fetch_cart().store_name == "Server Error"
+    assert len(hits) == calls
+
+@pytest.fixture
+def journaled(tmp_path, bridge):
+    """BlockingRepository over a journaled async repo whose DB answers are set per test"""
+    db = {"patch": lambda request: httpx.Response(200, json={"status": "updated"}), "patches": [], "gets": 0}
+
+    async def backend(request):
+        if request.method == "PATCH":
+            db["patches"].append(request)
+            return db["patch"](request)
+        if request.method == "POST":
+            return httpx.Response(200, json={"status": "optimized"})
+        db["gets"] += 1
+        await asyncio.sleep(0.05)  # Slow enough for concurrent fetches to overlap
+        return db.get("get", lambda request: httpx.Response(200, headers={"ETag": "v1"}, json=MEGA))(request)
+
+    api = AsyncSupermarketAPIClient(transport=httpx.MockTransport(backend))
+    api.db.backoff_base = 0.001
+    journal = MutationJournal(str(tmp_path / "journal.jsonl"))
+    repo = BlockingRepository(AsyncSupermarketRepository(api, journal=journal), bridge)
+    repo.current_cart_id = "c1"
+    yield repo, db
+    journal.close()
+
+def offline(request):
+    raise httpx.ConnectError("DB unreachable", request=request)
+
+def test_offline_update_is_journaled_and_replayed(journaled):
+    """Test: With the DB unreachable the change is journaled and shown; the replay sends it and clears it"""
+    repo, db = journaled
+    repo.fetch_cart()
+    db["patch"] = offline
+
+    shown = repo.update_cart_items({"milk": 2})
+
+    assert shown.store_name == "Mega" and shown.items[0].quantity == 2 and shown.total_price == 22.0
+    assert repo.has_pending_mutations("c1")
+    assert repo.pending_mutation_carts() == ["c1"]
+
+    db["patch"] = lambda request: httpx.Response(200, json={"status": "updated"})
+    assert repo.update_cart_items({}, "c1").store_name == "Mega"
+    assert not repo.has_pending_mutations()
+    assert json.loads(db["patches"][-1].content) == {"item_names": ["milk"], "quantities": [2]}
+
+def test_rejected_change_is_dropped(journaled):
+    """Test: A 4xx from the async transport drops the refused item only and keeps nothing pending"""
+    repo, db = journaled
+    db["patch"] = lambda request: httpx.Response(422 if b"bogus" in request.content else 200, json={})
+
+    assert repo.update_cart_items({"bogus": -1}).store_name == "Update Failed"
+    assert repo.update_cart_items({"milk": 2, "bogus": -1}).store_name == "Mega"
+    assert not repo.has_pending_mutations()
+    assert [json.loads(call.content)["item_names"] for call in db["patches"]] == [
+        ["bogus"], ["milk", "bogus"], ["milk"], ["bogus"]]
+
+def test_patch_retries_keep_the_idempotency_key(journaled):
+    """Test: A PATCH answered with 503 is retried with the same Idempotency-Key"""
+    repo, db = journaled
+    answers = iter([503, 200])
+    db["patch"] = lambda request: httpx.Response(next(answers), json={})
+
+    assert repo.update_cart_items({"milk": 2}).store_name == "Mega"
+    first, retry = db["patches"]
+    assert first.headers["Idempotency-Key"] == retry.headers["Idempotency-Key"]
+
+def test_failed_fetch_keeps_the_last_known_cart(journaled):
+    """Test: When the DB fails, fetch_cart returns the cart we last saw instead of an error cart"""
+    repo, db = journaled
+    assert repo.fetch_cart().store_name == "Mega"
+    db["get"] = lambda request: httpx.Response(500)
+
+    assert repo.fetch_cart().store_name == "Mega"
+
+def test_concurrent_fetches_share_one_request(qapp, journaled, bridge):
+    """Test: Simultaneous fetch_cart() coroutines make one GET; each caller gets its own copy"""
+    repo, db = journaled
+    results = []
+
+    for _ in range(5):
+        bridge.submit(repo.async_repo.fetch_cart()).finished.connect(results.append)
+
+    assert wait_until(qapp, lambda: len(results) == 5)
+    assert db["gets"] == 1
+    assert len({id(result) for result in results}) == 5
+
+@pytest.fixture
+def no_run_sync(bridge, monkeypatch):
+    """Records any call that would park a thread on the loop"""
+    blocked = []
+
+    def run_sync(coro, timeout=None):
+        blocked.append(coro)
+        coro.close()
+    monkeypatch.setattr(bridge, "run_sync", run_sync)
+    return blocked
+
+@pytest.fixture
+def executor(qapp, bridge):
+    executor = AsyncTaskExecutor(bridge, fallback=TaskExecutor(max_threads=1))
+    yield executor
+    executor.shutdown()
+
+def test_workers_run_on_the_loop(qapp, bridge, async_repo, executor, no_run_sync):
+    """Test: Prompt and cart workers are awaited on the loop: progress and results arrive, no thread waits"""
+    repo = BlockingRepository(async_repo, bridge)
+    repo.current_cart_id = "c1"
+    chunks, results = [], {}
+
+    prompt = executor.submit(AIWorker(repo, "milk", "u1", refresh_cart=True))
+    update = executor.submit(CartUpdateWorker(repo, {"milk": 1}, "c2"))
+    prompt.progress.connect(chunks.append)
+    prompt.finished.connect(lambda reply: results.__setitem__("prompt", reply))
+    update.finished.connect(lambda cart: results.__setitem__("update", cart))
+
+    assert wait_until(qapp, lambda: len(results) == 2)
+    assert chunks == ["Echo: milk"]
+    assert results["prompt"].result == "Echo: milk" and results["prompt"].cart.store_name == "Mega"
+    assert results["update"].store_name == "Corner"
+    assert no_run_sync == [] and executor.fallback.pool.activeThreadCount() == 0
+    assert wait_until(qapp, lambda: executor.pending() == 0)
+
+def test_cancel_stops_the_coroutine(qapp, bridge, executor):
+    """Test: Cancelling a running task cancels its request; the circuit does not count it as a failure"""
+    started = []
+
+    async def hanging(request):
+        started.append(request.url.path)
+        await asyncio.sleep(10)
+
+    async_repo = AsyncSupermarketRepository(AsyncSupermarketAPIClient(transport=httpx.MockTransport(hanging)))
+    repo = BlockingRepository(async_repo, bridge)
+    repo.current_cart_id = "c1"
+    outcome = []
+
+    future = executor.submit(AIWorker(repo, "milk", "u1"))
+    future.cancelled.connect(lambda: outcome.append("cancelled"))
+    future.finished.connect(lambda reply: outcome.append("finished"))
+    assert wait_until(qapp, lambda: started)
+    future.cancel()
+
+    assert wait_until(qapp, lambda: outcome)
+    assert outcome == ["cancelled"]
+    assert async_repo.api.agent.health._consecutive_failures == 0
+    assert wait_until(qapp, lambda: executor.pending() == 0)
+
+def test_controller_uses_the_loop(qapp, bridge, async_repo, executor, no_run_sync):
+    """Test: With AsyncTaskExecutor the controller's session, prompt and optimize paths never block a thread"""
+    from client.core.app_controller import AppController
+    controller = AppController(repo=BlockingRepository(async_repo, bridge), executor=executor)
+    try:
+        assert wait_until(qapp, lambda: controller.is_ready, timeout=3)
+        carts = []
+        controller.cart_presenter.update_data = carts.append
+
+        controller.handle_user_message("eggs")
+        controller.handle_optimize_request()
+
+        messages = controller.chat_presenter.model.messages
+        assert wait_until(qapp, lambda: any("Echo: eggs" in m.text for m in messages) and carts, timeout=3)
+        assert carts[-1].store_name == "Mega"
+        assert no_run_sync == []
+    finally:
+        controller.close()
+
+@pytest.fixture
+def h2c_server():
+    """_backend served over HTTP/2 without TLS (prior knowledge), answering after 0.2 s"""
+    pytest.importorskip("h2")
+    from client.mock.h2c_server import H2cServer
+
+    def handler(method, path, body):
+        response = _backend(httpx.Request(method, f"http://backend{path}", content=body))
+        return response.status_code, response.content
+
+    server = H2cServer(handler, delay=0.2).start()
+    yield server
+    server.stop()
+
+def test_plain_http_backend_is_multiplexed(qapp, bridge, h2c_server):
+    """Test: With h2 installed, concurrent calls to an http:// backend are streams of one HTTP/2 connection"""
+    api = AsyncSupermarketAPIClient(base_url=h2c_server.url, db_url=h2c_server.url)
+    repo = AsyncSupermarketRepository(api)
+    replies = []
+
+    for word in ("milk", "eggs", "bread", "jam"):
+        bridge.submit(repo.send_prompt_to_ai(word, "u1")).finished.connect(replies.append)
+
+    assert wait_until(qapp, lambda: len(replies) == 4)
+    assert sorted(replies) == ["Echo: bread", "Echo: eggs", "Echo: jam", "Echo: milk"]
+    assert h2c_server.connections == 1 and h2c_server.max_open_streams == 4
+    bridge.run_sync(api.close())
+
+def test_http1_backend_falls_back_from_h2c(qapp, bridge, stub_server):
+    """Test: An http:// backend that only speaks HTTP/1.1 is still served; the first call is resent, not failed"""
+    pytest.importorskip("h2")
+    api = AsyncSupermarketAPIClient(base_url=stub_server.url, db_url=stub_server.url)
+    repo = BlockingRepository(AsyncSupermarketRepository(api), bridge)
+
+    assert repo.initialize_session() is True
+    assert repo.fetch_cart().store_name == "Stub Supermarket"
+    response = bridge.run_sync(api.db.request("GET", f"/cart/{repo.current_cart_id}", timeout=5))
+    assert response.http_version == "HTTP/1.1"
+    assert api.agent.health._consecutive_failures == 0 and api.db.health._consecutive_failures == 0
+    bridge.run_sync(api.close())
@@ -0,0 +1,127 @@
+import pytest
+import requests
+from client.data.api.backend_health import BackendHealth, CircuitOpenError, CLOSED, OPEN, HALF_OPEN
+from client.data.api.http_transport import BackendTransport
+
+BASE_URL_DB = "http://test-db:8000"
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+    def __call__(self):
+        return self.now
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+@pytest.fixture
+def health(clock):
+    return BackendHealth("db", min_timeout=0.5, min_samples=5, failure_threshold=3, reset_timeout=10, clock=clock)
+
+@pytest.fixture
+def transport(health):
+    return BackendTransport(BASE_URL_DB, max_retries=0, health=health)
+
+def test_timeout_uses_default_until_enough_samples(health):
+    """Test: Without history the caller's fixed timeout is kept (connect timeout is capped)"""
+    assert health.timeout_for(60) == (3.0, 60)
+
+def test_timeout_adapts_to_observed_p99(health):
+    """Test: With history, read timeout = p99 * multiplier, clamped to [min_timeout, default]"""
+    for latency in [0.1, 0.1, 0.2, 0.2, 0.3]:
+        health.record_success(latency)
+
+    connect, read = health.timeout_for(60)
+    assert read == pytest.approx(1.2)
+    assert connect == pytest.approx(1.2)
+
+    for _ in range(5):
+        health.record_success(0.01)
+    assert health.timeout_for(60)[1] >= 0.5
+
+def test_timeouts_are_learned_per_endpoint(health, transport, requests_mock):
+    """Test: Fast cart GETs don't shrink the timeout of a slow endpoint such as /optimize"""
+    requests_mock.get(f"{BASE_URL_DB}/cart/42", json={})
+    requests_mock.post(f"{BASE_URL_DB}/cart/42/optimize", json={})
+    for _ in range(5):
+        transport.request("GET", "/cart/42", timeout=60)
+
+    assert health.timeout_for(60, "GET /cart/{id}")[1] == pytest.approx(0.5)  # Clamped to min_timeout
+    assert health.timeout_for(60, "POST /cart/{id}/optimize") == (3.0, 60)   # No history of its own yet
+    transport.request("POST", "/cart/42/optimize", timeout=60)
+    assert requests_mock.last_request.timeout == (3.0, 60)
+
+    for latency in [4.0, 4.0, 5.0, 5.0, 6.0]:
+        health.record_success(latency, "POST /cart/{id}/optimize")
+    assert health.timeout_for(60, "POST /cart/{id}/optimize")[1] == pytest.approx(24.0)
+
+def test_circuit_opens_and_fails_fast(transport, health, requests_mock):
+    """Test: After repeated 5xx the circuit opens and later calls never reach the network"""
+    requests_mock.get(f"{BASE_URL_DB}/cart/abc", status_code=500)
+    changes = []
+    health.add_listener(lambda name, state: changes.append(state))
+
+    for _ in range(3):
+        with pytest.raises(requests.exceptions.HTTPError):
+            transport.request("GET", "/cart/abc", timeout=5)
+
+    with pytest.raises(CircuitOpenError):
+        transport.request("GET", "/cart/abc", timeout=5)
+
+    assert requests_mock.call_count == 3
+    assert health.state == OPEN
+    assert changes == [OPEN]
+
+def test_half_open_probe_closes_circuit(transport, health, clock, requests_mock):
+    """Test: After reset_timeout one probe goes through; success closes the circuit"""
+    for _ in range(3):
+        health.record_failure()
+    assert health.state == OPEN
+
+    clock.now = 11
+    requests_mock.get(f"{BASE_URL_DB}/cart/abc", json={"cart": {}})
+    transport.request("GET", "/cart/abc", timeout=5)
+
+    assert health.state == CLOSED
+
+def test_only_one_probe_while_half_open(health, clock):
+    """Test: Concurrent callers fail fast while the single probe is in flight; a failed probe re-opens"""
+    for _ in range(3):
+        health.record_failure()
+    clock.now = 11
+
+    health.before_call()
+    assert health.state == HALF_OPEN
+    with pytest.raises(CircuitOpenError):
+        health.before_call()
+
+    health.record_failure()
+    assert health.state == OPEN
+
+@pytest.mark.parametrize("error", [requests.exceptions.ChunkedEncodingError, requests.exceptions.TooManyRedirects,
+                                   requests.exceptions.InvalidURL])
+def test_any_request_error_ends_the_half_open_probe(transport, health, clock, requests_mock, error):
+    """Test: A probe failing with a non-connection error re-opens the circuit instead of staying in flight"""
+    for _ in range(3):
+        health.record_failure()
+    clock.now = 11
+    requests_mock.get(f"{BASE_URL_DB}/cart/abc", exc=error)
+    with pytest.raises(error):
+        transport.request("GET", "/cart/abc", timeout=5)
+    assert health.state == OPEN
+
+    # After the next reset_timeout a new probe reaches the network and can close the circuit
+    clock.now = 22
+    requests_mock.get(f"{BASE_URL_DB}/cart/abc", json={"cart": {}})
+    transport.request("GET", "/cart/abc", timeout=5)
+    assert health.state == CLOSED
+    assert requests_mock.call_count == 2
+
+def test_read_timeout_counts_as_failure(transport, health, requests_mock):
+    """Test: A hung backend (read timeout) is recorded as a failure"""
+    requests_mock.get(f"{BASE_URL_DB}/cart/abc", exc=requests.exceptions.ReadTimeout)
+    for _ in range(3):
+        with pytest.raises(requests.exceptions.ReadTimeout):
+            transport.request("GET", "/cart/abc", timeout=5)
+    assert health.state == OPEN
@@ -0,0 +1,49 @@
+import pytest
+from client.data.api.supermarket_client import SupermarketAPIClient
+from client.data.repositories.cart_cache import CartCache
+from client.data.repositories.supermarket_repo import SupermarketRepository
+from client.models.types import CartItem, StoreResult
+
+@pytest.fixture
+def repo(stub_server):
+    repo = SupermarketRepository(SupermarketAPIClient(base_url=stub_server.url, db_url=stub_server.url))
+    repo.current_cart_id = stub_server.create_cart()
+    stub_server.set_quantities(repo.current_cart_id, ["Milk"], [2])
+    return repo
+
+def test_unchanged_cart_is_served_from_304(repo, stub_server):
+    """Test: The second fetch sends If-None-Match, gets a 304 and returns the cached mapping"""
+    first = repo.fetch_cart()
+    second = repo.fetch_cart()
+
+    assert stub_server.not_modified_count == 1
+    assert second == first
+    assert second.items[0].name == "Milk"
+
+def test_mutation_produces_a_fresh_result(repo, stub_server):
+    """Test: After a PATCH the version changes, so the next fetch downloads the new cart"""
+    repo.fetch_cart()
+    updated = repo.update_cart_item("Milk", 5)
+
+    assert updated.items[0].quantity == 5
+    assert stub_server.not_modified_count == 0
+
+def test_cached_result_is_isolated_from_ui_mutations(repo):
+    """Test: CartModel mutates items in place; that must not leak into the cache"""
+    first = repo.fetch_cart()
+    first.items[0].quantity = 99
+
+    assert repo.fetch_cart().items[0].quantity == 2
+
+def test_cache_evicts_least_recently_used():
+    """Test: The cache is bounded and forgets the newest version of evicted carts"""
+    cache = CartCache(max_entries=2)
+    result = StoreResult("Mega", "", 10.0, [CartItem("1", "Milk", 1, 10.0)])
+    cache.put("a", "v1", result)
+    cache.put("b", "v1", result)
+    cache.get("a", "v1")
+    cache.put("c", "v1", result)
+
+    assert cache.get("b", "v1") is None
+    assert cache.latest_version("b") is None
+    assert cache.get("a", "v1") == result
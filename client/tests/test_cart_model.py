@@ -0,0 +1,83 @@
+from client.models.types import CartDelta, CartItem, StoreResult
+from client.ui.components.cart_mfe.model import CartChange, CartModel
+from client.ui.components.cart_mfe.presenter import CartPresenter
+
+
+def cart(*items, total=0.0, store="Mega"):
+    return StoreResult(store, "Herzl 1", total, [CartItem(*item) for item in items])
+
+
+def recorded(model: CartModel) -> list:
+    batches = []
+    model.add_listener(batches.append)
+    return batches
+
+
+def test_totals_are_exact_after_many_edits():
+    """Test: Thousands of +/- on prices like 0.1 and 3.3 leave the total exact (integer agorot)"""
+    model = CartModel()
+    model.set_data(cart(("a", "Gum", 0, 0.1), ("b", "Milk", 0, 3.3), total=0.0))
+    for _ in range(1000):
+        model.update_quantity("a", +1)
+        model.update_quantity("b", +1)
+    for _ in range(999):
+        model.update_quantity("b", -1)
+
+    assert model.total_agorot == 1000 * 10 + 330
+    assert model.total_price == 103.3
+    assert model.get_item_quantity("b") == 1
+    assert model.update_quantity("missing", +1) is False
+    assert model.update_quantity("b", -2) is False
+
+
+def test_operations_report_fine_grained_changes():
+    """Test: Each operation reports which rows and fields changed"""
+    model = CartModel()
+    batches = recorded(model)
+    model.set_data(cart(("1", "Milk", 1, 5.0), ("2", "Eggs", 2, 10.0), total=25.0))
+    assert batches[-1][-1] == CartChange("reset")
+
+    model.update_quantity("2", +1)
+    assert batches[-1] == [CartChange("update", 1, "2", ("quantity",)), CartChange("summary", fields=("total_price",))]
+
+    # Server echo with a new price for one item: same rows, so no reset
+    model.set_data(cart(("1", "Milk", 1, 6.0), ("2", "Eggs", 3, 10.0), total=36.0))
+    assert batches[-1] == [CartChange("summary", fields=("total_price",)), CartChange("update", 0, "1", ("price",))]
+
+    count = len(batches)
+    model.set_data(cart(("1", "Milk", 1, 6.0), ("2", "Eggs", 3, 10.0), total=36.0))
+    assert len(batches) == count  # Nothing changed, nothing reported
+
+
+def test_delta_changes_apply_in_order():
+    """Test: Delta changes are updates, then removals (highest row first), then appends"""
+    model = CartModel()
+    model.set_data(cart(("1", "Milk", 1, 5.0), ("2", "Eggs", 1, 5.0), ("3", "Jam", 1, 5.0), total=15.0))
+    batches = recorded(model)
+
+    model.apply_delta(CartDelta("2", "1", upserts=[CartItem("3", "Jam", 2, 5.0), CartItem("4", "Tea", 1, 2.5)],
+                                removed=["1", "2"]))
+
+    assert batches[-1][:4] == [CartChange("update", 2, "3", ("quantity",)), CartChange("remove", 1, "2"),
+                               CartChange("remove", 0, "1"), CartChange("insert", 1, "4")]
+    assert [item.id for item in model.items] == ["3", "4"]
+    assert model.get_item_quantity("4") == 1 and model.get_item_quantity("1") is None
+    assert model.total_agorot == 1250
+
+
+def test_presenter_patches_one_card_on_click(qapp):
+    """Test: A +/- click updates that card and the total without re-rendering the cart"""
+    presenter = CartPresenter(repo=None)
+    presenter.update_data(cart(("1", "Milk", 1, 5.0), ("2", "Eggs", 2, 10.0), total=25.0))
+    full_renders = []
+    render_cart = presenter.view.render_cart
+    presenter.view.render_cart = lambda *args: full_renders.append(args) or render_cart(*args)
+
+    presenter.on_increment("2")
+
+    assert full_renders == []
+    assert presenter.view._cards["2"].qty_label.text() == "3"
+    assert presenter.view.total_price_label.text() == "₪35.00"
+
+    presenter.update_data(cart(("2", "Eggs", 3, 10.0), total=30.0))
+    assert len(full_renders) == 1 and list(presenter.view._cards) == ["2"]
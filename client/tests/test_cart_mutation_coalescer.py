@@ -0,0 +1,100 @@
+import threading
+
+import pytest
+from client.core.cart_mutation_coalescer import CartMutationCoalescer
+from client.models.types import StoreResult
+from conftest import wait_until
+
+class FakeRepo:
+    """Records batched updates; can hold a flush open to test ordering"""
+    def __init__(self):
+        self.current_cart_id = "cart-1"
+        self.calls = []
+        self.release = threading.Event()
+        self.release.set()
+
+    def update_cart_items(self, quantities, cart_id=None):
+        self.calls.append((cart_id, dict(quantities)))
+        self.release.wait(2)
+        return StoreResult("Mega", "", 0.0, [])
+
+    def has_pending_mutations(self, cart_id=None):
+        return False
+
+    def pending_mutation_carts(self):
+        return []
+
+@pytest.fixture
+def repo():
+    return FakeRepo()
+
+def test_fast_clicks_become_one_batched_patch(qapp, repo):
+    """Test: Ten clicks inside the window produce a single flush with the last quantity per item"""
+    coalescer = CartMutationCoalescer(repo, window_ms=30)
+    synced = []
+    coalescer.cart_synced.connect(synced.append)
+
+    for qty in range(1, 11):
+        coalescer.queue("milk", qty)
+    coalescer.queue("eggs", 3)
+
+    assert wait_until(qapp, lambda: synced)
+    assert repo.calls == [("cart-1", {"milk": 10, "eggs": 3})]
+
+def test_flushes_for_same_cart_are_ordered(qapp, repo):
+    """Test: A batch queued while another is in flight waits for it, and only the newest result is emitted"""
+    coalescer = CartMutationCoalescer(repo, window_ms=10)
+    synced = []
+    coalescer.cart_synced.connect(synced.append)
+
+    repo.release.clear()
+    coalescer.queue("milk", 1)
+    assert wait_until(qapp, lambda: len(repo.calls) == 1)
+
+    # Arrives while the first flush is still blocked in the "network"
+    coalescer.queue("milk", 5)
+    wait_until(qapp, lambda: False, timeout=0.05)
+    assert len(repo.calls) == 1
+
+    repo.release.set()
+    assert wait_until(qapp, lambda: synced)
+    assert [batch for _, batch in repo.calls] == [{"milk": 1}, {"milk": 5}]
+    assert len(synced) == 1
+
+def test_max_delay_caps_debounce(qapp, repo):
+    """Test: Continuous clicking still flushes once max_delay_ms has passed"""
+    coalescer = CartMutationCoalescer(repo, window_ms=50, max_delay_ms=60)
+    for qty in range(8):
+        coalescer.queue("milk", qty)
+        wait_until(qapp, lambda: False, timeout=0.02)
+
+    assert repo.calls, "flush should not be postponed forever"
+
+def test_undelivered_batch_is_replayed(qapp, repo):
+    """Test: While the DB is unreachable nothing is rendered; the journaled batch is retried until it lands"""
+    journaled = {}
+    online = threading.Event()
+
+    def update_cart_items(quantities, cart_id=None):
+        repo.calls.append((cart_id, dict(quantities)))
+        journaled.update(quantities)
+        if online.is_set():
+            journaled.clear()
+        return StoreResult("Mega", "", 0.0, [])
+
+    repo.update_cart_items = update_cart_items
+    repo.has_pending_mutations = lambda cart_id=None: bool(journaled)
+    repo.pending_mutation_carts = lambda: ["cart-1"] if journaled else []
+
+    coalescer = CartMutationCoalescer(repo, window_ms=10, retry_ms=20)
+    synced, deferred = [], []
+    coalescer.cart_synced.connect(synced.append)
+    coalescer.mutations_deferred.connect(deferred.append)
+
+    coalescer.queue("milk", 2)
+    assert wait_until(qapp, lambda: deferred == ["cart-1"])
+    assert not synced
+
+    online.set()
+    assert wait_until(qapp, lambda: synced)
+    assert repo.calls[-1] == ("cart-1", {})
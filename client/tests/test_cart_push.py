@@ -0,0 +1,95 @@
+import json
+import pytest
+from conftest import wait_until
+from client.core.cart_push_channel import CartPushChannel
+from client.data.api.supermarket_client import cart_push_url
+from client.models.types import CartDelta, CartItem, StoreResult
+from client.ui.components.cart_mfe.model import CartModel
+from client.ui.components.cart_mfe.presenter import CartPresenter
+
+@pytest.fixture
+def channel(qapp):
+    channel = CartPushChannel(reconnect_ms=50)
+    yield channel
+    channel.close()
+
+def cart_id_url(server, cart_id):
+    return cart_push_url(server.url, cart_id)
+
+def test_push_url_is_derived_from_db_url():
+    """Test: The channel lives on the DB server under /ws/cart/{id}"""
+    assert cart_push_url("http://localhost:8000", "abc") == "ws://localhost:8000/ws/cart/abc"
+    assert cart_push_url("https://db.example/", "abc") == "wss://db.example/ws/cart/abc"
+
+def test_server_changes_are_applied_as_deltas(qapp, stub_server, channel):
+    """Test: Snapshot on subscribe, then each server-side change reaches the presenter without a GET"""
+    cart_id = stub_server.create_cart()
+    stub_server.set_quantities(cart_id, ["Milk"], [1])
+    presenter = CartPresenter(repo=None)
+    channel.snapshot_received.connect(presenter.update_data)
+    channel.delta_received.connect(presenter.apply_delta)
+
+    channel.subscribe(cart_id_url(stub_server, cart_id))
+    assert wait_until(qapp, lambda: len(presenter.model.items) == 1)
+    assert channel.available
+
+    # e.g. the agent adds items while it handles a chat message
+    stub_server.set_quantities(cart_id, ["Bread", "Milk"], [2, 3])
+    assert wait_until(qapp, lambda: len(presenter.model.items) == 2)
+    assert presenter.model.get_item_quantity("Milk") == 3
+    assert presenter.model.total_price == pytest.approx(50.0)
+
+    stub_server.set_quantities(cart_id, ["Milk"], [0])
+    assert wait_until(qapp, lambda: len(presenter.model.items) == 1)
+    assert "get_cart" not in stub_server.call_counts
+
+def test_missed_delta_triggers_resync(qapp, stub_server, channel):
+    """Test: A delta that does not build on the last applied version is dropped and a snapshot is requested"""
+    cart_id = stub_server.create_cart()
+    snapshots = []
+    channel.snapshot_received.connect(snapshots.append)
+    channel.subscribe(cart_id_url(stub_server, cart_id))
+    assert wait_until(qapp, lambda: len(snapshots) == 1)
+
+    channel.version = "stale"
+    stub_server.set_quantities(cart_id, ["Eggs"], [6])
+
+    assert wait_until(qapp, lambda: len(snapshots) == 2)
+    assert snapshots[-1].items[0].name == "Eggs"
+    assert channel.version == "1"
+
+def test_unreachable_server_leaves_channel_unavailable(qapp, channel):
+    """Test: Without a push server the channel reports unavailable (callers keep polling) and retries"""
+    changes = []
+    channel.availability_changed.connect(changes.append)
+    channel.subscribe("ws://127.0.0.1:9/ws/cart/abc")
+
+    assert wait_until(qapp, lambda: channel._reconnect_timer.isActive())
+    assert not channel.available
+    assert changes == []
+
+@pytest.mark.parametrize("message", [
+    {"type": "delta", "version": "2", "base_version": "1", "total_price": []},
+    {"type": "delta", "version": "2", "base_version": "1", "upserts": 5},
+    {"type": "delta", "version": "2", "base_version": "1", "upserts": [{"price": {}}]},
+    ["not", "an", "object"],
+])
+def test_malformed_push_is_ignored(channel, message):
+    """Test: A push that can't be mapped is logged and dropped; the channel keeps its version"""
+    deltas = []
+    channel.delta_received.connect(deltas.append)
+    channel.version = "1"
+    channel._on_message(json.dumps(message))
+    assert deltas == [] and channel.version == "1"
+
+def test_model_applies_upserts_and_removals():
+    """Test: Deltas replace items by id in place, append new ones and drop removed ids"""
+    model = CartModel()
+    model.set_data(StoreResult("Mega", "", 30.0, [CartItem("1", "Milk", 1, 10.0), CartItem("2", "Eggs", 2, 10.0)]))
+
+    model.apply_delta(CartDelta("2", "1", upserts=[CartItem("1", "Milk", 4, 10.0), CartItem("3", "Jam", 1, 5.0)],
+                                removed=["2"]))
+
+    assert [(item.id, item.quantity) for item in model.items] == [("1", 4), ("3", 1)]
+    assert model.total_price == pytest.approx(45.0)
+    assert model.store_name == "Mega"
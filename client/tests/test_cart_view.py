@@ -0,0 +1,106 @@
+from dataclasses import replace
+from PySide6.QtCore import Qt
+from PySide6.QtTest import QTest
+from client.models.types import CartItem
+from client.ui.components.cart_mfe.view import CartView
+from client.ui.components.cart_mfe.list_view import VirtualCartView, card_rect, pill_rects
+
+
+def make_items(count: int) -> list:
+    return [CartItem(str(i), f"Item {i}", 1, 10.0) for i in range(count)]
+
+
+def cards_of(view: CartView) -> list:
+    """Cards in on-screen order (index 0 is the empty state, the last entry the stretch)"""
+    layout = view.items_layout
+    return [layout.itemAt(i).widget() for i in range(1, layout.count() - 1)]
+
+
+def test_quantity_change_patches_one_label(qapp):
+    """Test: Re-rendering with one changed quantity keeps every card and touches one label"""
+    view = CartView()
+    items = make_items(5)
+    view.render_cart("Mega", "Herzl 1", items, 50.0)
+    before = cards_of(view)
+
+    items = [replace(item) for item in items]
+    items[2].quantity = 3
+    view.render_cart("Mega", "Herzl 1", items, 70.0)
+
+    assert cards_of(view) == before
+    assert view.render_stats == {"inserted": 0, "removed": 0, "moved": 0, "patched": 1}
+    assert before[2].qty_label.text() == "3"
+    assert before[2].item is items[2]
+
+
+def test_cards_are_inserted_removed_and_moved_by_id(qapp):
+    """Test: Only new ids get cards, dropped ids lose theirs, reordered cards are moved"""
+    view = CartView()
+    a, b, c = make_items(3)
+    view.render_cart("Mega", "", [a, b, c], 30.0)
+    card_a, card_b, card_c = cards_of(view)
+
+    d = CartItem("9", "Eggs", 6, 1.5)
+    view.render_cart("Mega", "", [c, a, d], 29.0)
+
+    cards = cards_of(view)
+    assert cards[:2] == [card_c, card_a]
+    assert cards[2].item is d
+    assert view.render_stats["inserted"] == 1 and view.render_stats["removed"] == 1
+    assert view.render_stats["moved"] >= 1
+
+
+def test_empty_state_and_repeated_ids(qapp):
+    """Test: The empty state toggles without rebuilds; repeated ids each keep their own card"""
+    view = CartView()
+    view.render_cart("", "", [], 0.0)
+    assert not view._empty_widget.isHidden()
+
+    twins = [CartItem("1", "Milk", 1, 5.0), CartItem("1", "Milk", 2, 5.0)]
+    view.render_cart("Mega", "", twins, 15.0)
+    assert view._empty_widget.isHidden()
+    assert [card.qty_label.text() for card in cards_of(view)] == ["1", "2"]
+
+    view.render_cart("Mega", "", [], 0.0)
+    assert cards_of(view) == [] and not view._empty_widget.isHidden()
+
+
+def test_virtual_view_hit_tests_the_pill_buttons(qapp):
+    """Test: Clicks on a painted row's +/- buttons emit the row's item id; elsewhere nothing"""
+    view = VirtualCartView()
+    view.resize(360, 600)
+    view.show()
+    view.render_cart("Mega", "", make_items(3), 30.0)
+    clicks = []
+    view.item_incremented.connect(lambda item_id: clicks.append(("+", item_id)))
+    view.item_decremented.connect(lambda item_id: clicks.append(("-", item_id)))
+
+    lst = view.list_view
+    row1 = pill_rects(card_rect(lst.visualRect(lst.cart_model.index(1))))
+    row0 = pill_rects(card_rect(lst.visualRect(lst.cart_model.index(0))))
+    QTest.mouseClick(lst.viewport(), Qt.LeftButton, pos=row1["plus"].center())
+    QTest.mouseClick(lst.viewport(), Qt.LeftButton, pos=row0["minus"].center())
+    QTest.mouseClick(lst.viewport(), Qt.LeftButton, pos=row0["quantity"].center())
+
+    assert clicks == [("+", "1"), ("-", "0")]
+    assert not lst.grab().isNull()  # Paints every visible row without errors
+
+
+def test_virtual_view_repaints_only_changed_rows(qapp):
+    """Test: Same contract as CartView; a quantity change repaints one row, reordering resets"""
+    view = VirtualCartView()
+    items = make_items(100)
+    view.render_cart("Mega", "", items, 1000.0)
+    changed_rows = []
+    view.list_view.cart_model.dataChanged.connect(lambda first, last: changed_rows.append(first.row()))
+
+    items[42].quantity = 5  # CartModel mutates items in place
+    view.render_cart("Mega", "", items, 1040.0)
+    assert changed_rows == [42]
+    assert view.render_stats == {"rows": 100, "repainted": 1}
+
+    view.render_cart("Mega", "", items[::-1], 1040.0)
+    assert view.list_view.cart_model.item_at(0) is items[-1]
+
+    view.render_cart("", "", [], 0.0)
+    assert view.list_view.isHidden() and not view._empty_widget.isHidden()
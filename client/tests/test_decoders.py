@@ -0,0 +1,51 @@
+import json
+
+import pytest
+from client.data.api import decoders
+
+PAYLOAD = {
+    "cart": {
+        "store_name": "Mega",
+        "address": "Herzl 1",
+        "total_price": 32.5,
+        "items": [
+            {"id": 7, "item_name": "Milk", "quantity": 2, "price": 6.5, "image_url": "http://img/milk.png"},
+            {"name": "Bread", "quantity": 1.0, "price": 12, "image": "http://img/bread.png"},
+            {"quantity": 1},
+        ],
+    }
+}
+
+@pytest.fixture(params=["msgspec", "fallback"])
+def decode(request, monkeypatch):
+    """Runs every test against the typed decoder and the dict fallback"""
+    if request.param == "msgspec":
+        if not decoders.MSGSPEC_AVAILABLE:
+            pytest.skip("msgspec not installed")
+    else:
+        monkeypatch.setattr(decoders, "MSGSPEC_AVAILABLE", False)
+    return decoders.decode_cart_payload
+
+def test_field_aliases_and_defaults(decode):
+    """Test: item_name/name aliases, id fallback and numeric coercion match the dict mapping"""
+    result = decode(json.dumps(PAYLOAD).encode())
+
+    assert result == decoders.map_cart_payload(PAYLOAD)
+    assert [item.id for item in result.items] == ["7", "Bread", "Item 2"]
+    assert [item.name for item in result.items] == ["Milk", "Bread", "Item 2"]
+    assert [item.quantity for item in result.items] == [2, 1, 1]
+    assert result.items[1].price == 12.0
+    assert [item.image_url for item in result.items] == ["http://img/milk.png", "http://img/bread.png", None]
+
+def test_missing_cart_gives_empty_result(decode):
+    """Test: An empty body maps to the default store with no items"""
+    result = decode(b"{}")
+    assert result.store_name == "Supermarket"
+    assert result.items == []
+
+def test_loosely_typed_payload_falls_back(decode):
+    """Test: Values the typed schema rejects (price as string) still decode through the lenient path"""
+    payload = {"cart": {"items": [{"item_name": "Eggs", "quantity": "3", "price": "9.90"}]}}
+    result = decode(json.dumps(payload).encode())
+    assert result.items[0].quantity == 3
+    assert result.items[0].price == 9.9
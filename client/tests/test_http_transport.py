@@ -0,0 +1,69 @@
+import pytest
+import requests
+from client.data.api.http_transport import BackendTransport
+
+BASE_URL_DB = "http://test-db:8000"
+
+@pytest.fixture
+def transport():
+    """Transport with zero backoff so retry tests run instantly"""
+    return BackendTransport(BASE_URL_DB, max_retries=2, backoff_base=0.0)
+
+def test_get_is_retried_on_gateway_error(transport, requests_mock):
+    """Test: A GET that first hits a 503 is retried and eventually succeeds"""
+    requests_mock.get(f"{BASE_URL_DB}/cart/abc", [
+        {"status_code": 503},
+        {"json": {"cart": {"items": []}}, "status_code": 200},
+    ])
+
+    response = transport.request("GET", "/cart/abc", timeout=5)
+
+    assert response.json() == {"cart": {"items": []}}
+    assert requests_mock.call_count == 2
+
+def test_retries_are_bounded(transport, requests_mock):
+    """Test: After max_retries the last error is raised to the caller"""
+    requests_mock.get(f"{BASE_URL_DB}/cart/abc", status_code=503)
+
+    with pytest.raises(requests.exceptions.HTTPError) as excinfo:
+        transport.request("GET", "/cart/abc", timeout=5)
+
+    assert "503" in str(excinfo.value)
+    assert requests_mock.call_count == 3
+
+def test_post_is_not_retried_by_default(transport, requests_mock):
+    """Test: Non-idempotent calls surface the first failure"""
+    requests_mock.post(f"{BASE_URL_DB}/chat_message", status_code=503)
+
+    with pytest.raises(requests.exceptions.HTTPError):
+        transport.request("POST", "/chat_message", json={"message": "hi"}, timeout=5)
+
+    assert requests_mock.call_count == 1
+
+def test_idempotency_key_is_stable_across_retries(transport, requests_mock):
+    """Test: A retried PATCH replays the same Idempotency-Key"""
+    requests_mock.patch(f"{BASE_URL_DB}/cart/abc/items", [
+        {"status_code": 502},
+        {"json": {"status": "updated"}, "status_code": 200},
+    ])
+
+    transport.request("PATCH", "/cart/abc/items", json={"item_names": ["Milk"], "quantities": [2]},
+                      timeout=5, retry=True)
+
+    keys = [req.headers.get("Idempotency-Key") for req in requests_mock.request_history]
+    assert len(keys) == 2
+    assert keys[0] and keys[0] == keys[1]
+
+def test_connection_error_is_retried_for_get(transport, requests_mock):
+    """Test: Connection failures on idempotent calls are retried"""
+    requests_mock.get(f"{BASE_URL_DB}/cart/abc", [
+        {"exc": requests.exceptions.ConnectionError},
+        {"json": {"cart": {}}, "status_code": 200},
+    ])
+
+    assert transport.request("GET", "/cart/abc", timeout=5).json() == {"cart": {}}
+
+def test_backoff_is_capped():
+    """Test: Jittered delay never exceeds the configured cap"""
+    transport = BackendTransport(BASE_URL_DB, backoff_base=1.0, backoff_cap=0.5)
+    assert all(0 <= transport.backoff_delay(10) <= 0.5 for _ in range(100))
@@ -0,0 +1,113 @@
+import logging
+import threading
+import pytest
+from client.telemetry import log as structured_log
+from client.telemetry.log import configure_logging, get_logger, parse_levels, shutdown_logging
+
+
+class CapturingHandler(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.lines = []
+        self.threads = []
+
+    def emit(self, record):
+        self.lines.append(self.format(record))
+        self.threads.append(threading.current_thread())
+
+
+class CountingField:
+    """A field value that counts how often it is rendered"""
+
+    def __init__(self):
+        self.renders = 0
+
+    def __str__(self):
+        self.renders += 1
+        return "field"
+
+    __repr__ = __str__
+
+
+@pytest.fixture
+def handler():
+    handler = CapturingHandler()
+    yield handler
+    shutdown_logging()
+    root = logging.getLogger(structured_log.ROOT)
+    root.handlers.clear()
+    root.setLevel(logging.NOTSET)
+    root.propagate = True
+
+
+def test_parse_levels():
+    """Test: A default level plus per-component overrides"""
+    assert parse_levels("warning,transport=debug, repo=error") == (
+        logging.WARNING, {"transport": logging.DEBUG, "repo": logging.ERROR})
+    assert parse_levels("") == (logging.INFO, {})
+
+
+def test_disabled_level_does_no_formatting(handler):
+    """Test: A call below the component's level never renders its fields"""
+    configure_logging("info", handler)
+    field = CountingField()
+    get_logger("repo").debug("Cart fetched", value=field)
+    shutdown_logging()
+
+    assert field.renders == 0
+    assert handler.lines == []
+
+
+def test_component_overrides(handler):
+    """Test: One component can log at debug while the rest stay at warning"""
+    configure_logging("warning,transport=debug", handler)
+    get_logger("transport").debug("Retrying request", attempt=1)
+    get_logger("repo").info("Cart fetched", items=3)
+    get_logger("repo").warning("No cart id stored")
+    shutdown_logging()
+
+    assert len(handler.lines) == 2
+    assert "DEBUG transport: Retrying request attempt=1" in handler.lines[0]
+    assert "WARNING repo: No cart id stored" in handler.lines[1]
+
+
+def test_records_are_formatted_on_the_listener_thread(handler):
+    """Test: The caller only enqueues; rendering happens on the background thread"""
+    configure_logging("debug", handler)
+    field = CountingField()
+    get_logger("coalescer").info("Flushing item changes", cart_id="c1", value=field)
+    assert handler.threads == [] or handler.threads[0] is not threading.current_thread()
+    shutdown_logging()
+
+    assert field.renders == 1
+    assert handler.threads[0] is not threading.current_thread()
+    assert handler.lines[0].endswith("coalescer: Flushing item changes cart_id=c1 value=field")
+
+
+def test_payload_is_sampled_and_lazy(handler):
+    """Test: Only 1 in N payload dumps is logged, and only those build the payload"""
+    configure_logging("debug", handler)
+    logger = get_logger("repo")
+    built = []
+
+    def build():
+        built.append(1)
+        return {"type": "response"}
+
+    for _ in range(10):
+        logger.payload("Agent raw response", build, every=5)
+    shutdown_logging()
+
+    assert len(built) == 2
+    assert len(handler.lines) == 2
+    assert "sampled=1/5" in handler.lines[0]
+
+
+def test_payload_skipped_entirely_when_debug_is_off(handler):
+    """Test: With debug disabled the payload callable is never evaluated"""
+    configure_logging("info", handler)
+    built = []
+    get_logger("repo").payload("Agent raw response", lambda: built.append(1), every=1)
+    shutdown_logging()
+
+    assert built == []
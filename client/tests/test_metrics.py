@@ -0,0 +1,95 @@
+import json
+import pytest
+import requests
+from client.data.api.http_transport import BackendTransport
+from client.data.api.backend_health import BackendHealth
+from client.telemetry.metrics import MetricsRegistry, MetricsExporter, endpoint_name
+
+BASE_URL_DB = "http://test-db:8000"
+
+@pytest.fixture
+def registry():
+    return MetricsRegistry()
+
+@pytest.fixture
+def transport(registry):
+    transport = BackendTransport(BASE_URL_DB, max_retries=1, backoff_base=0, health=BackendHealth("db"),
+                                 metrics=registry)
+    return transport
+
+def test_histogram_quantiles(registry):
+    """Test: p50/p95/p99 estimates stay within one bucket (25%) of the true value"""
+    for ms in range(1, 1001):
+        registry.observe("latency", ms / 1000, endpoint="GET /cart/{id}")
+    hist = registry.histogram("latency", endpoint="GET /cart/{id}")
+
+    assert hist.quantile(0.50) == pytest.approx(0.50, rel=0.25)
+    assert hist.quantile(0.95) == pytest.approx(0.95, rel=0.25)
+    assert hist.quantile(0.99) == pytest.approx(0.99, rel=0.25)
+    assert hist.count == 1000
+
+def test_endpoint_names_collapse_ids():
+    """Test: Cart ids are folded so all carts share one series"""
+    assert endpoint_name("PATCH", "/cart/3f2a9c1e-1b2c-4d5e-8f90-a1b2c3d4e5f6/items") == "PATCH /cart/{id}/items"
+    assert endpoint_name("GET", "/cart/42") == "GET /cart/{id}"
+    assert endpoint_name("POST", "/chat_message") == "POST /chat_message"
+
+def test_transport_records_latency_errors_retries_and_bytes(transport, registry, requests_mock):
+    """Test: Each backend call feeds the endpoint histogram and the error/retry/byte counters"""
+    requests_mock.get(f"{BASE_URL_DB}/cart/42", content=b'{"cart": {}}')
+    requests_mock.patch(f"{BASE_URL_DB}/cart/42/items", [{"status_code": 503}, {"json": {"status": "ok"}}])
+
+    transport.request("GET", "/cart/42", timeout=5)
+    transport.request("PATCH", "/cart/42/items", timeout=5, json={"item_names": ["milk"]}, retry=True)
+
+    get_labels = {"backend": "db", "endpoint": "GET /cart/{id}"}
+    patch_labels = {"backend": "db", "endpoint": "PATCH /cart/{id}/items"}
+    assert registry.histogram("http_request_duration_seconds", **get_labels).count == 1
+    assert registry.counter("http_response_bytes_total", **get_labels).value == 12
+    assert registry.histogram("http_request_duration_seconds", **patch_labels).count == 2
+    assert registry.counter("http_errors_total", kind="http_5xx", **patch_labels).value == 1
+    assert registry.counter("http_retries_total", **patch_labels).value == 1
+    assert registry.counter("http_request_bytes_total", **patch_labels).value > 0
+
+def test_connection_errors_are_counted(transport, registry, requests_mock):
+    """Test: Unreachable backend shows up as connection errors (one per attempt)"""
+    requests_mock.get(f"{BASE_URL_DB}/cart/42", exc=requests.exceptions.ConnectionError)
+
+    with pytest.raises(requests.exceptions.ConnectionError):
+        transport.request("GET", "/cart/42", timeout=5)
+
+    assert registry.counter("http_errors_total", backend="db", endpoint="GET /cart/{id}", kind="connection").value == 2
+
+def test_dump_formats(registry, tmp_path):
+    """Test: .json dumps carry quantiles; .prom dumps are Prometheus text with cumulative buckets"""
+    registry.describe("step_seconds", "Pipeline steps")
+    registry.observe("step_seconds", 0.010, step="patch")
+    registry.observe("step_seconds", 0.200, step="patch")
+    registry.inc("errors_total", kind="timeout")
+
+    registry.dump(str(tmp_path / "metrics.json"))
+    registry.dump(str(tmp_path / "metrics.prom"))
+
+    snapshot = json.loads((tmp_path / "metrics.json").read_text())
+    series = snapshot["histograms"]["step_seconds"][0]
+    assert series["labels"] == {"step": "patch"} and series["count"] == 2
+    assert series["p50"] <= series["p99"]
+
+    text = (tmp_path / "metrics.prom").read_text()
+    assert "# HELP step_seconds Pipeline steps" in text
+    assert "# TYPE step_seconds histogram" in text
+    assert 'step_seconds_bucket{step="patch",le="+Inf"} 2' in text
+    assert 'step_seconds_count{step="patch"} 2' in text
+    assert 'errors_total{kind="timeout"} 1' in text
+
+def test_prometheus_endpoint(registry):
+    """Test: --metrics-port serves the registry at /metrics"""
+    registry.inc("errors_total", kind="timeout")
+    exporter = MetricsExporter(registry, port=0)
+    try:
+        port = exporter.server.server_address[1]
+        response = requests.get(f"http://127.0.0.1:{port}/metrics", timeout=2)
+        assert response.status_code == 200
+        assert 'errors_total{kind="timeout"} 1' in response.text
+    finally:
+        exporter.stop()
@@ -0,0 +1,152 @@
+import pytest
+import requests
+from client.data.api.supermarket_client import SupermarketAPIClient
+from client.data.repositories.mutation_journal import MutationJournal
+from client.data.repositories.supermarket_repo import SupermarketRepository
+
+BASE_URL_DB = "http://test-db:8000"
+CART_ID = "cart-1"
+
+@pytest.fixture
+def journal_path(tmp_path):
+    return str(tmp_path / "journal.jsonl")
+
+@pytest.fixture
+def repo(journal_path):
+    api = SupermarketAPIClient(db_url=BASE_URL_DB)
+    api.db.max_retries = 0
+    repo = SupermarketRepository(api, journal=MutationJournal(journal_path))
+    repo.current_cart_id = CART_ID
+    yield repo
+    repo.journal.close()
+
+def test_pending_changes_survive_a_restart(journal_path):
+    """Test: Unacked changes are read back in order, compacted per item, without close() (crash)"""
+    journal = MutationJournal(journal_path)
+    journal.append(CART_ID, {"milk": 1, "eggs": 2})
+    journal.append(CART_ID, {"milk": 3})
+    journal.sync()
+
+    reopened = MutationJournal(journal_path)
+    assert reopened.pending(CART_ID) == ({"eggs": 2, "milk": 3}, 3)
+    reopened.close()
+
+def test_ack_retires_changes(journal_path):
+    """Test: Acked changes are gone after a restart; newer ones for the same cart stay"""
+    journal = MutationJournal(journal_path)
+    journal.append(CART_ID, {"milk": 1})
+    seq = journal.append("cart-2", {"bread": 1})
+    journal.append(CART_ID, {"eggs": 6})
+    journal.ack(CART_ID, 1)
+    journal.close()
+
+    reopened = MutationJournal(journal_path)
+    assert reopened.pending(CART_ID) == ({"eggs": 6}, 3)
+    assert reopened.pending_carts() == ["cart-2", CART_ID]
+    reopened.ack("cart-2", seq)
+    assert not reopened.has_pending("cart-2")
+    reopened.close()
+
+def test_compaction_keeps_the_file_bounded(journal_path):
+    """Test: Thousands of clicks on a few items never grow the file past max_bytes"""
+    journal = MutationJournal(journal_path, max_bytes=2048)
+    for qty in range(5000):
+        journal.append(CART_ID, {"milk": qty, "eggs": qty})
+        assert journal.size() <= 2048 + 200
+    journal.close()
+
+    assert MutationJournal(journal_path).pending(CART_ID)[0] == {"milk": 4999, "eggs": 4999}
+
+def test_torn_last_record_is_skipped(journal_path):
+    """Test: A half-written line (crash mid-append) doesn't lose the records before it"""
+    journal = MutationJournal(journal_path)
+    journal.append(CART_ID, {"milk": 2})
+    journal.close()
+    with open(journal_path, "a") as f:
+        f.write('{"seq": 2, "cart": "cart-1", "it')
+
+    assert MutationJournal(journal_path).pending(CART_ID)[0] == {"milk": 2}
+
+def test_offline_update_is_journaled_and_replayed_in_order(repo, requests_mock):
+    """Test: PATCHes that fail for connectivity stay pending; the replay sends them as one ordered batch"""
+    patch = requests_mock.patch(f"{BASE_URL_DB}/cart/{CART_ID}/items", exc=requests.exceptions.ConnectionError)
+    requests_mock.post(f"{BASE_URL_DB}/cart/{CART_ID}/optimize", json={"status": "optimized"})
+    requests_mock.get(f"{BASE_URL_DB}/cart/{CART_ID}", json={"cart": {"store_name": "Mega", "items": [
+        {"id": "milk", "item_name": "Milk", "quantity": 4, "price": 5.0},
+        {"id": "eggs", "item_name": "Eggs", "quantity": 1, "price": 12.0}]}})
+
+    offline = repo.update_cart_items({"milk": 2})
+    repo.update_cart_items({"eggs": 1, "milk": 4})
+
+    assert offline.store_name != "Update Failed"
+    assert patch.call_count == 2  # Both offline attempts carried everything still pending
+    assert patch.request_history[1].json() == {"item_names": ["eggs", "milk"], "quantities": [1, 4]}
+    assert repo.has_pending_mutations(CART_ID)
+    assert repo.pending_mutation_carts() == [CART_ID]
+
+    requests_mock.patch(f"{BASE_URL_DB}/cart/{CART_ID}/items", json={"status": "updated"})
+    fresh = repo.update_cart_items({}, CART_ID)
+
+    assert fresh.store_name == "Mega"
+    assert not repo.has_pending_mutations()
+    sent = [call for call in requests_mock.request_history if call.method == "PATCH"][-1].json()
+    assert sent == {"item_names": ["eggs", "milk"], "quantities": [1, 4]}
+
+def test_replay_returns_the_replayed_cart(repo, requests_mock):
+    """Test: Replaying a cart that is no longer the current one returns that cart"""
+    requests_mock.patch(f"{BASE_URL_DB}/cart/cart-2/items", exc=requests.exceptions.ConnectionError)
+    repo.update_cart_items({"milk": 2}, "cart-2")
+
+    requests_mock.patch(f"{BASE_URL_DB}/cart/cart-2/items", json={"status": "updated"})
+    requests_mock.post(f"{BASE_URL_DB}/cart/cart-2/optimize", json={"status": "optimized"})
+    requests_mock.get(f"{BASE_URL_DB}/cart/cart-2", json={"cart": {"store_name": "Corner", "items": [
+        {"id": "milk", "item_name": "Milk", "quantity": 2, "price": 5.0}]}})
+    requests_mock.get(f"{BASE_URL_DB}/cart/{CART_ID}", json={"cart": {"store_name": "Mega", "items": []}})
+
+    replayed = repo.update_cart_items({}, "cart-2")
+
+    assert replayed.store_name == "Corner"
+    assert not repo.has_pending_mutations("cart-2")
+
+def test_rejection_drops_only_the_refused_change(repo, requests_mock):
+    """Test: A 4xx for a coalesced batch keeps the valid changes in it; only the refused item is dropped"""
+    requests_mock.patch(f"{BASE_URL_DB}/cart/{CART_ID}/items", exc=requests.exceptions.ConnectionError)
+    repo.update_cart_items({"milk": 2, "bogus": -1})
+
+    def patch(request, context):
+        context.status_code = 422 if "bogus" in request.json()["item_names"] else 200
+        return {}
+
+    requests_mock.patch(f"{BASE_URL_DB}/cart/{CART_ID}/items", json=patch)
+    requests_mock.post(f"{BASE_URL_DB}/cart/{CART_ID}/optimize", json={"status": "optimized"})
+    requests_mock.get(f"{BASE_URL_DB}/cart/{CART_ID}", json={"cart": {"store_name": "Mega", "items": [
+        {"id": "milk", "item_name": "Milk", "quantity": 2, "price": 5.0}]}})
+
+    result = repo.update_cart_items({}, CART_ID)
+
+    assert result.store_name == "Mega"
+    assert not repo.has_pending_mutations()
+    offline, batch, *single = [call.json() for call in requests_mock.request_history if call.method == "PATCH"]
+    assert batch == {"item_names": ["milk", "bogus"], "quantities": [2, -1]}
+    assert single == [{"item_names": ["milk"], "quantities": [2]}, {"item_names": ["bogus"], "quantities": [-1]}]
+
+def test_offline_cart_total_is_exact(repo, requests_mock):
+    """Test: The offline cart is summed in agorot (like CartModel) and leaves the cached DB cart untouched"""
+    requests_mock.get(f"{BASE_URL_DB}/cart/{CART_ID}", headers={"ETag": "v1"}, json={"cart": {
+        "store_name": "Mega", "items": [{"id": "gum", "item_name": "Gum", "quantity": 1, "price": 0.1}]}})
+    repo.fetch_cart()
+    requests_mock.patch(f"{BASE_URL_DB}/cart/{CART_ID}/items", exc=requests.exceptions.ConnectionError)
+
+    offline = repo.update_cart_items({"gum": 3})
+
+    assert offline.items[0].quantity == 3 and offline.total_price == 0.3
+    assert repo.cart_cache.get(CART_ID, "v1").items[0].quantity == 1
+
+def test_rejected_update_is_not_replayed(repo, requests_mock):
+    """Test: A 4xx means the DB refused the change; it is dropped instead of retried forever"""
+    requests_mock.patch(f"{BASE_URL_DB}/cart/{CART_ID}/items", status_code=422)
+
+    result = repo.update_cart_items({"milk": -5})
+
+    assert result.store_name == "Update Failed"
+    assert not repo.has_pending_mutations()
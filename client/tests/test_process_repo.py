@@ -0,0 +1,83 @@
+import os
+import threading
+import pytest
+from conftest import wait_until
+from client.data.repositories.process_repo import ProcessRepository, RepositoryProcessError, pack, unpack
+from client.models.types import CartItem, ClarificationRequest, StoreResult
+from client.telemetry.metrics import MetricsRegistry
+
+
+
+@pytest.fixture
+def repo(stub_server, tmp_path):
+    repo = ProcessRepository(registry=MetricsRegistry(), base_url=stub_server.url, db_url=stub_server.url,
+                             journal_path=str(tmp_path / "journal.jsonl"))
+    yield repo
+    repo.close()
+
+
+def test_frames_round_trip_the_models():
+    """Test: Carts and clarifications survive packing; other values pass through"""
+    cart = StoreResult("Mega", "Main st", 25.0, [CartItem("1", "Milk", 2, 12.5, "http://img/milk.png")])
+    assert unpack(pack(cart)) == cart
+    question = ClarificationRequest("Which milk?", ["3%", "1%"])
+    assert unpack(pack(question)) == question
+    assert unpack(pack(["cart-a"])) == ["cart-a"]
+
+
+def test_repository_api_runs_in_the_child(stub_server, repo):
+    """Test: Session, streaming, updates and fetches behave like the in-process repository"""
+    assert repo.initialize_session()
+    assert repo.current_cart_id in stub_server.carts
+    assert repo.process.pid != os.getpid()
+
+    chunks = []
+    assert repo.stream_prompt_to_ai("milk", "u1", chunks.append) == "Echo: milk"
+    assert "".join(chunks) == "Echo: milk" and len(chunks) > 1
+
+    cart = repo.update_cart_items({"Milk": 3})
+    assert [(item.name, item.quantity) for item in cart.items] == [("Milk", 3)]
+    assert cart.total_price == pytest.approx(30.0)
+    assert repo.fetch_cart() == cart
+    assert not repo.has_pending_mutations()
+    assert repo.cart_push_url().endswith(f"/ws/cart/{repo.current_cart_id}")
+    assert repo.registry.histogram("ipc_call_duration_seconds", method="fetch_cart").count == 1
+
+
+def test_cart_id_and_health_cross_the_process_boundary(qapp):
+    """Test: A cart id set in the GUI reaches the child; circuit state changes come back"""
+    repo = ProcessRepository(registry=MetricsRegistry(), db_url="http://127.0.0.1:9", journal=False)
+    try:
+        states = []
+        repo.backend_health()["db"].add_listener(lambda backend, state: states.append((backend, state)))
+        repo.current_cart_id = "abc"
+        for _ in range(5):
+            assert repo.fetch_cart().store_name == "Server Error"
+        assert wait_until(qapp, lambda: ("db", "open") in states)
+        assert repo.backend_health()["db"].state == "open"
+    finally:
+        repo.close()
+
+
+def test_calls_fail_once_the_process_is_gone(repo):
+    """Test: Killing the child fails calls with RepositoryProcessError instead of hanging"""
+    repo.process.kill()
+    repo.process.join(2)
+    with pytest.raises(RepositoryProcessError):
+        repo.fetch_cart()
+
+
+def test_large_cart_decodes_off_the_gui_process(qapp, stub_server, repo, stall_watchdog):
+    """Test: Fetching a 2000-item cart keeps the GUI event loop responsive"""
+    names = [f"Item {i}" for i in range(2000)]
+
+    def fetch():
+        # Worker thread, like the real callers; the GUI thread only pumps events
+        repo.initialize_session()
+        stub_server.set_quantities(repo.current_cart_id, names, [1] * len(names))
+        results.append(repo.fetch_cart())
+
+    results = []
+    threading.Thread(target=fetch).start()
+    assert wait_until(qapp, lambda: results, timeout=10)
+    assert len(results[0].items) == 2000
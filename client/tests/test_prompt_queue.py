@@ -0,0 +1,142 @@
+import threading
+import pytest
+from conftest import wait_until
+from client.core.prompt_queue import PromptQueue
+from client.core.task_executor import TaskExecutor
+from client.ui.components.chat_mfe.view import ChatInputWidget
+from client.telemetry.metrics import MetricsRegistry
+
+
+class Agent:
+    """Answers each prompt once it is released; streams one chunk first"""
+    def __init__(self):
+        self.releases = {}
+        self.sent = []
+
+    def task(self, prompt):
+        release = self.releases.setdefault(prompt.text, threading.Event())
+        agent = self
+
+        class Reply:
+            def run(self, context):
+                agent.sent.append(prompt.text)
+                context.progress(f"{prompt.text}-chunk")
+                release.wait(2)
+                return f"{prompt.text}-reply"
+        return Reply()
+
+    def release(self, text):
+        self.releases.setdefault(text, threading.Event()).set()
+
+
+@pytest.fixture
+def executor(qapp):
+    executor = TaskExecutor(max_threads=4, registry=MetricsRegistry())
+    yield executor
+    executor.shutdown()
+
+
+@pytest.fixture
+def agent():
+    return Agent()
+
+
+def record(queue):
+    events = []
+    queue.prompt_active.connect(lambda prompt: events.append(("active", prompt.text)))
+    queue.chunk_received.connect(lambda chunk: events.append(("chunk", chunk)))
+    queue.reply_ready.connect(lambda prompt, reply: events.append(("reply", reply)))
+    return events
+
+
+def test_replies_are_delivered_in_order(qapp, executor, agent):
+    """Test: With depth 2 the second reply may finish first, but it is shown after the first"""
+    queue = PromptQueue(executor, agent.task, depth=2)
+    events = record(queue)
+
+    queue.submit("a")
+    queue.submit("b")
+    assert wait_until(qapp, lambda: agent.sent == ["a", "b"] or agent.sent == ["b", "a"])
+
+    agent.release("b")
+    wait_until(qapp, lambda: False, timeout=0.05)
+    assert ("reply", "b-reply") not in events
+
+    agent.release("a")
+    assert wait_until(qapp, lambda: len([e for e in events if e[0] == "reply"]) == 2)
+    assert events == [("active", "a"), ("chunk", "a-chunk"), ("reply", "a-reply"),
+                      ("active", "b"), ("chunk", "b-chunk"), ("reply", "b-reply")]
+
+
+def test_depth_limits_prompts_in_flight(qapp, executor, agent):
+    """Test: With depth 1 the next prompt is only sent after the previous reply"""
+    queue = PromptQueue(executor, agent.task, depth=1)
+    queue.submit("a")
+    queue.submit("b")
+    assert wait_until(qapp, lambda: agent.sent == ["a"])
+    wait_until(qapp, lambda: False, timeout=0.05)
+    assert agent.sent == ["a"] and queue.waiting() == 1
+
+    agent.release("a")
+    assert wait_until(qapp, lambda: agent.sent == ["a", "b"])
+    agent.release("b")
+
+
+def test_cancel_queued_and_backpressure(qapp, executor, agent):
+    """Test: Waiting prompts can be dropped; a full queue refuses more and reports it"""
+    queue = PromptQueue(executor, agent.task, depth=1, max_waiting=2)
+    backlog, cancelled = [], []
+    queue.backlog_changed.connect(lambda waiting, full: backlog.append((waiting, full)))
+    queue.prompts_cancelled.connect(lambda prompts: cancelled.extend(p.text for p in prompts))
+
+    queue.submit("a")
+    queue.submit("b")
+    queue.submit("c")
+    assert queue.is_full
+    assert queue.submit("d") is None
+    assert backlog[-1] == (2, True)
+
+    assert queue.cancel_queued() == 2
+    assert cancelled == ["b", "c"]
+    assert backlog[-1] == (0, False)
+
+    agent.release("a")
+    assert wait_until(qapp, lambda: queue.in_flight() == 0)
+    wait_until(qapp, lambda: False, timeout=0.05)
+    assert agent.sent == ["a"]
+
+
+def test_paused_queue_sends_nothing(qapp, executor, agent):
+    """Test: Prompts typed while paused (connecting) go out in order on resume"""
+    queue = PromptQueue(executor, agent.task, depth=1)
+    queue.pause()
+    queue.submit("a")
+    wait_until(qapp, lambda: False, timeout=0.05)
+    assert agent.sent == []
+
+    agent.release("a")
+    queue.resume()
+    assert wait_until(qapp, lambda: agent.sent == ["a"])
+
+
+def test_input_shows_backpressure(qapp):
+    """Test: The input shows the queued count, stops sending while full, and offers cancelling"""
+    widget = ChatInputWidget()
+    sent, cancels = [], []
+    widget.send_requested.connect(sent.append)
+    widget.cancel_queued_requested.connect(lambda: cancels.append(True))
+
+    widget.set_backlog(3, True)
+    widget.input_field.setText("more milk")
+    widget._on_send()
+    assert sent == [] and widget.get_text() == "more milk"
+    assert widget.queue_label.text() == "3 queued (full)"
+    assert not widget.send_btn.isEnabled()
+
+    widget.cancel_queue_btn.click()
+    assert cancels == [True]
+
+    widget.set_backlog(0, False)
+    widget._on_send()
+    assert sent == ["more milk"]
+    assert widget.queue_label.isHidden()
@@ -0,0 +1,59 @@
+from PySide6.QtCore import QRect, Qt
+from PySide6.QtGui import QColor, QImage, QPainter, QPixmap
+from client.models.types import CartItem
+from client.telemetry.metrics import MetricsRegistry
+from client.ui.components.cart_mfe.view import CartView
+from client.ui.styles.render_cache import PixmapCache, draw_shadow, glyph_pixmap
+
+
+def test_lru_evicts_by_pixel_memory(qapp):
+    """Test: The least recently used pixmap goes first once the byte budget is exceeded"""
+    cache = PixmapCache(max_bytes=3 * 10 * 10 * 4, registry=MetricsRegistry())
+    render = lambda: QPixmap(10, 10)
+    for key in ("a", "b", "c"):
+        cache.get(key, render)
+    cache.get("a", render)  # a is now the most recent
+    cache.get("d", render)
+
+    assert len(cache) == 3 and cache.bytes_used == 3 * 400
+    misses = []
+    cache.get("b", lambda: misses.append("b") or QPixmap(10, 10))
+    assert misses == ["b"]
+    assert cache.registry.counter("render_cache_requests_total", result="hit").value == 1
+
+
+def test_glyphs_are_shared_per_size_and_dpi(qapp):
+    """Test: Same glyph, size and DPI reuse one pixmap; another DPI renders a sharper one"""
+    cache = PixmapCache(registry=MetricsRegistry())
+    first = glyph_pixmap("🛒", 46, "#40414F", 22, 1.0, cache)
+    assert glyph_pixmap("🛒", 46, "#40414F", 22, 1.0, cache) is first
+    hidpi = glyph_pixmap("🛒", 46, "#40414F", 22, 2.0, cache)
+    assert (hidpi.width(), hidpi.devicePixelRatio()) == (92, 2.0)
+    assert len(cache) == 2
+
+
+def test_nine_slice_shadow_stretches_to_any_size(qapp):
+    """Test: One cached shadow paints a soft, symmetric shadow around rects of any size"""
+    cache = PixmapCache(registry=MetricsRegistry())
+    image = QImage(400, 200, QImage.Format_ARGB32_Premultiplied)
+    image.fill(Qt.transparent)
+    painter = QPainter(image)
+    draw_shadow(painter, QRect(50, 50, 300, 90), offset=(0, 0), cache=cache)
+    draw_shadow(painter, QRect(10, 160, 60, 30), offset=(0, 0), cache=cache)
+    painter.end()
+
+    alpha = lambda x, y: QColor(image.pixelColor(x, y)).alpha()
+    assert len(cache) == 1
+    assert alpha(200, 95) > 0                         # Under the rect
+    assert 0 < alpha(200, 42) < alpha(200, 95)        # Fading out past the edge
+    assert alpha(200, 5) == 0                         # Beyond the blur
+    assert abs(alpha(45, 95) - alpha(354, 95)) <= 2   # Left and right edges match
+
+
+def test_cards_paint_without_graphics_effects(qapp):
+    """Test: Cart cards no longer carry a per-card blur effect"""
+    view = CartView()
+    view.render_cart("Mega", "", [CartItem("1", "Milk", 1, 5.0)], 5.0)
+    card = view._cards["1"]
+    assert card.graphicsEffect() is None
+    assert not view.grab().isNull()
@@ -0,0 +1,79 @@
+import threading
+from conftest import wait_until
+from client.core.cart_mutation_coalescer import CartMutationCoalescer
+from client.core.request_generations import RequestGenerations
+from client.models.types import StoreResult
+from client.telemetry.metrics import MetricsRegistry
+
+
+class FakeFuture:
+    def __init__(self):
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+
+
+def test_later_mutation_supersedes_earlier_responses():
+    """Test: Responses issued before the newest mutation are dropped and counted; later ones render"""
+    registry = MetricsRegistry()
+    generations = RequestGenerations(registry)
+    optimize = generations.issue(mutation=True)
+    fetch = generations.issue()
+    click = generations.issue(mutation=True)
+    after_click = generations.issue()
+
+    assert not generations.accept(optimize, "optimize")
+    assert not generations.accept(fetch, "fetch")
+    assert generations.accept(click, "cart_update")
+    assert generations.accept(after_click, "fetch")
+    assert registry.counter("cart_responses_dropped_total", source="optimize").value == 1
+
+
+def test_superseded_requests_are_cancelled():
+    """Test: Tracked requests are cancelled by a later mutation, not by later reads"""
+    generations = RequestGenerations(MetricsRegistry())
+    optimize, optimize_future = generations.issue(mutation=True), FakeFuture()
+    generations.track(optimize, optimize_future)
+
+    generations.issue()
+    assert not optimize_future.cancelled
+
+    generations.issue(mutation=True)
+    assert optimize_future.cancelled
+
+    # Tracking something already superseded cancels it right away
+    late = FakeFuture()
+    generations.track(optimize, late)
+    assert late.cancelled
+
+
+def test_flush_superseded_by_optimize_is_not_rendered(qapp):
+    """Test: An optimize requested while a +/- batch is in flight wins; the batch result is dropped"""
+    release = threading.Event()
+    calls = []
+
+    class FakeRepo:
+        current_cart_id = "cart-1"
+        def update_cart_items(self, quantities, cart_id=None):
+            calls.append(quantities)
+            release.wait(2)
+            return StoreResult("Stale", "", 0.0, [])
+        def has_pending_mutations(self, cart_id=None):
+            return False
+        def pending_mutation_carts(self):
+            return []
+
+    generations = RequestGenerations(MetricsRegistry())
+    coalescer = CartMutationCoalescer(FakeRepo(), window_ms=10, generations=generations)
+    synced = []
+    coalescer.cart_synced.connect(synced.append)
+
+    coalescer.queue("milk", 2)
+    assert wait_until(qapp, lambda: calls)
+    generations.issue(mutation=True)  # The user clicks "Find Cheapest Store"
+    release.set()
+
+    assert wait_until(qapp, lambda: not coalescer._in_flight)
+    wait_until(qapp, lambda: False, timeout=0.05)
+    assert synced == []
@@ -0,0 +1,122 @@
+import asyncio
+import threading
+import time
+import pytest
+from client.data.api.supermarket_client import SupermarketAPIClient
+from client.data.repositories.single_flight import AsyncSingleFlight, SingleFlight
+from client.data.repositories.supermarket_repo import SupermarketRepository
+
+@pytest.fixture
+def stub_server(stub_server):
+    # Slow responses, so concurrent callers overlap
+    stub_server.request_delay = 0.2
+    return stub_server
+
+@pytest.fixture
+def repo(stub_server):
+    repo = SupermarketRepository(SupermarketAPIClient(base_url=stub_server.url, db_url=stub_server.url))
+    repo.current_cart_id = stub_server.create_cart()
+    stub_server.set_quantities(repo.current_cart_id, ["Milk"], [2])
+    return repo
+
+def run_concurrently(fn, count):
+    """Starts *count* threads calling fn() at the same moment and returns their results"""
+    barrier = threading.Barrier(count)
+    results = [None] * count
+
+    def worker(i):
+        barrier.wait()
+        results[i] = fn()
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(count)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return results
+
+def test_concurrent_fetches_share_one_request(repo, stub_server):
+    """Test: Five simultaneous fetch_cart() calls make one GET; each caller gets its own copy"""
+    results = run_concurrently(repo.fetch_cart, 5)
+
+    assert stub_server.call_counts["get_cart"] == 1
+    assert all(result == results[0] for result in results)
+    assert len({id(result) for result in results}) == 5
+    assert len({id(result.items[0]) for result in results}) == 5
+
+def test_concurrent_optimizations_share_one_request(repo, stub_server):
+    """Test: Double-clicking optimize runs the optimization once"""
+    results = run_concurrently(repo.optimize_current_cart, 3)
+
+    assert stub_server.call_counts["optimize"] == 1
+    assert all(result.items[0].name == "Milk" for result in results)
+
+def test_fetch_after_mutation_does_not_join_stale_flight(repo, stub_server):
+    """Test: A fetch in flight before a PATCH is not reused for the fetch that follows it"""
+    early = threading.Thread(target=repo.fetch_cart)
+    early.start()
+    while not stub_server.call_counts.get("get_cart"):
+        time.sleep(0.01)
+
+    updated = repo.update_cart_item("Milk", 5)
+    early.join()
+
+    assert updated.items[0].quantity == 5
+    assert stub_server.call_counts["get_cart"] == 2
+
+def test_errors_reach_every_waiter():
+    """Test: If the shared call fails, every caller sees the exception and the key is released"""
+    flights = SingleFlight()
+    started = threading.Event()
+    release = threading.Event()
+    errors = []
+
+    def failing():
+        started.set()
+        release.wait()
+        raise RuntimeError("boom")
+
+    def call():
+        try:
+            flights.do("key", failing)
+        except RuntimeError as e:
+            errors.append(e)
+
+    leader = threading.Thread(target=call)
+    leader.start()
+    started.wait()
+    follower = threading.Thread(target=call)
+    follower.start()
+    time.sleep(0.05)  # Let the follower join the running call
+    release.set()
+    leader.join()
+    follower.join()
+
+    assert len(errors) == 2
+    assert not flights.in_flight("key")
+    assert flights.do("key", lambda: 42) == (42, False)
+
+def test_async_flight_shares_results_and_errors():
+    """Test: Coroutines joining a running call get its result (or its error) without calling again"""
+    flights = AsyncSingleFlight()
+    calls = []
+
+    async def slow(value):
+        calls.append(value)
+        await asyncio.sleep(0.01)
+        if isinstance(value, Exception):
+            raise value
+        return value
+
+    async def scenario():
+        shared = await asyncio.gather(*(flights.do("key", lambda: slow(7)) for _ in range(3)))
+        failed = await asyncio.gather(*(flights.do("key", lambda: slow(RuntimeError("boom"))) for _ in range(2)),
+                                      return_exceptions=True)
+        return shared, failed
+
+    shared, failed = asyncio.run(scenario())
+
+    assert shared == [(7, False), (7, True), (7, True)]
+    assert [str(e) for e in failed] == ["boom", "boom"]
+    assert len(calls) == 2
+    assert not flights.in_flight("key")
@@ -0,0 +1,43 @@
+import time
+import pytest
+from PySide6.QtCore import QTimer
+from conftest import wait_until
+from client.core.stall_watchdog import StallWatchdog, StallError
+from client.telemetry.metrics import MetricsRegistry
+
+
+def blocking_network_call():
+    time.sleep(0.3)
+
+
+@pytest.fixture
+def watchdog(qapp):
+    watchdog = StallWatchdog(threshold_ms=100, heartbeat_ms=20, fail_over_ms=150, registry=MetricsRegistry())
+    watchdog.start()
+    yield watchdog
+    watchdog.stop()
+
+
+def test_stall_is_reported_with_the_blocking_stack(qapp, watchdog):
+    """Test: Blocking the GUI thread is measured and the report points at the blocking call"""
+    QTimer.singleShot(0, blocking_network_call)
+
+    assert wait_until(qapp, lambda: watchdog.stalls, timeout=2)
+    stall = watchdog.stalls[0]
+    assert stall.duration_ms >= 200
+    assert "blocking_network_call" in stall.stack
+    assert stall.where.startswith("test_stall_watchdog.py:") and "blocking_network_call" in stall.where
+    assert watchdog.registry.counter("gui_stalls_total").value == 1
+    assert watchdog.registry.histogram("gui_stall_duration_seconds").count == 1
+
+
+def test_test_mode_fails_on_long_stalls(qapp, watchdog):
+    """Test: assert_no_stalls raises for stalls over fail_over_ms and passes for a responsive loop"""
+    wait_until(qapp, lambda: False, timeout=0.2)
+    watchdog.assert_no_stalls()
+    assert watchdog.registry.histogram("event_loop_latency_seconds").count > 0
+
+    QTimer.singleShot(0, blocking_network_call)
+    assert wait_until(qapp, lambda: watchdog.stalls, timeout=2)
+    with pytest.raises(StallError, match="blocking_network_call"):
+        watchdog.assert_no_stalls()
@@ -0,0 +1,54 @@
+from client.data.api.supermarket_client import SupermarketAPIClient, iter_sse_data
+from client.data.repositories.supermarket_repo import SupermarketRepository
+from conftest import wait_until
+
+BASE_URL_AGENT = "http://test-agent:8001"
+
+def test_sse_parser_handles_multiline_and_comments():
+    """Test: data lines are joined per event; comments and other fields are ignored"""
+    lines = [": keep-alive", "event: delta", "data: a", "data: b", "", "id: 7", "data:c", ""]
+    assert list(iter_sse_data(lines)) == ["a\nb", "c"]
+
+def test_stream_delivers_chunks_before_the_full_reply(stub_server):
+    """Test: The repository forwards each SSE delta and returns the joined reply"""
+    api = SupermarketAPIClient(base_url=stub_server.url, db_url=stub_server.url)
+    repo = SupermarketRepository(api)
+    chunks = []
+
+    result = repo.stream_prompt_to_ai("milk and bread", "u1", chunks.append)
+
+    assert result == "Echo: milk and bread"
+    assert len(chunks) == 4
+    assert "".join(chunks) == result
+
+def test_non_streaming_backend_yields_one_chunk(requests_mock):
+    """Test: A plain JSON reply still works and is delivered as a single chunk"""
+    requests_mock.post(f"{BASE_URL_AGENT}/chat_message",
+                       json={"type": "response", "data": {"ai_message": "Hello"}})
+    repo = SupermarketRepository(SupermarketAPIClient(base_url=BASE_URL_AGENT))
+    chunks = []
+
+    assert repo.stream_prompt_to_ai("hi", "u1", chunks.append) == "Hello"
+    assert chunks == ["Hello"]
+
+def test_chat_view_grows_one_bubble_with_throttled_repaints(qapp, monkeypatch):
+    """Test: A burst of chunks lands in one bubble and is repainted once per frame, not per chunk"""
+    from client.ui.components.chat_mfe import view as chat_view
+    view = chat_view.ChatView()
+    repaints = []
+    original = chat_view.ChatBubble.set_text
+    monkeypatch.setattr(chat_view.ChatBubble, "set_text",
+                        lambda self, text: (repaints.append(text), original(self, text)))
+
+    view.show_thinking()
+    for word in ["Milk", " is", " in", " your", " cart"]:
+        view.append_stream_chunk(word)
+
+    assert view._thinking_bubble is None
+    assert wait_until(qapp, lambda: repaints)
+    assert repaints == ["Milk is in your cart"]
+
+    bubble = view._stream_bubble
+    assert view.finish_stream("Milk is in your cart.") is True
+    assert bubble.message == "Milk is in your cart."
+    assert view.finish_stream() is False
@@ -0,0 +1,120 @@
+import threading
+import pytest
+from conftest import wait_until
+from client.core.task_executor import TaskExecutor, Priority
+from client.telemetry.metrics import MetricsRegistry
+
+
+class Job:
+    """Blocks until released, then returns its name (or raises)"""
+    def __init__(self, name, priority=Priority.BACKGROUND_SYNC, release=None, started=None, error=None):
+        self.name = name
+        self.priority = priority
+        self.release = release
+        self.started = started
+        self.error = error
+
+    def run(self, context):
+        if self.started is not None:
+            self.started.append(self.name)
+        if self.release is not None:
+            self.release.wait(2)
+        context.progress(f"{self.name}:working")
+        if self.error:
+            raise self.error
+        return self.name
+
+
+@pytest.fixture
+def registry():
+    return MetricsRegistry()
+
+
+@pytest.fixture
+def executor(qapp, registry):
+    executor = TaskExecutor(max_threads=1, registry=registry)
+    yield executor
+    executor.shutdown()
+
+
+def test_result_and_progress_arrive_on_gui_thread(qapp, executor):
+    """Test: Progress and the result are delivered through the future's signals, on the submitting thread"""
+    seen = []
+    future = executor.submit(Job("a"))
+    future.progress.connect(lambda value: seen.append((value, threading.current_thread())))
+    future.finished.connect(lambda value: seen.append((value, threading.current_thread())))
+
+    assert wait_until(qapp, lambda: future.done)
+    assert seen == [("a:working", threading.current_thread()), ("a", threading.current_thread())]
+    assert executor.pending() == 0
+
+
+def test_queued_tasks_start_in_priority_order(qapp, executor):
+    """Test: With the only thread busy, a prompt overtakes cart work, which overtakes background sync"""
+    release = threading.Event()
+    started = []
+    blocker = executor.submit(Job("blocker", release=release, started=started))
+    assert wait_until(qapp, lambda: started == ["blocker"])
+
+    futures = [executor.submit(Job(name, priority, started=started)) for name, priority in
+               [("sync", Priority.BACKGROUND_SYNC), ("cart", Priority.CART_MUTATION), ("prompt", Priority.USER_PROMPT)]]
+    release.set()
+
+    assert wait_until(qapp, lambda: all(f.done for f in futures + [blocker]))
+    assert started == ["blocker", "prompt", "cart", "sync"]
+
+
+def test_cancel_before_start_never_runs(qapp, executor, registry):
+    """Test: A queued task that is cancelled is removed from the pool and reports cancelled"""
+    release = threading.Event()
+    started = []
+    executor.submit(Job("blocker", release=release, started=started))
+    assert wait_until(qapp, lambda: started)
+
+    future = executor.submit(Job("queued", started=started))
+    outcome = []
+    future.finished.connect(lambda value: outcome.append("finished"))
+    future.cancelled.connect(lambda: outcome.append("cancelled"))
+    assert registry.gauge("executor_queue_depth", priority="background_sync").value == 1
+
+    future.cancel()
+    release.set()
+
+    assert wait_until(qapp, lambda: executor.pending() == 0)
+    assert outcome == ["cancelled"]
+    assert started == ["blocker"]
+    assert registry.gauge("executor_queue_depth", priority="background_sync").value == 0
+    assert registry.counter("executor_tasks_total", task="Job", outcome="cancelled").value == 1
+
+
+def test_cancel_while_running_discards_result(qapp, executor):
+    """Test: A running task is told to stop and its result is never delivered"""
+    release = threading.Event()
+    started = []
+    future = executor.submit(Job("slow", release=release, started=started))
+    outcome = []
+    future.progress.connect(outcome.append)
+    future.finished.connect(lambda value: outcome.append("finished"))
+    future.cancelled.connect(lambda: outcome.append("cancelled"))
+    assert wait_until(qapp, lambda: started)
+
+    future.cancel()
+    release.set()
+
+    assert wait_until(qapp, lambda: future.done)
+    assert outcome == ["cancelled"]
+
+
+def test_failures_are_reported(qapp, executor, registry):
+    """Test: An exception in the task arrives through failed, and the pool keeps working"""
+    errors = []
+    future = executor.submit(Job("broken", error=ValueError("boom")))
+    future.failed.connect(errors.append)
+    assert wait_until(qapp, lambda: future.done)
+
+    after = executor.submit(Job("next"))
+    assert wait_until(qapp, lambda: after.done)
+    assert [str(e) for e in errors] == ["boom"]
+    assert registry.counter("executor_tasks_total", task="Job", outcome="failed").value == 1
+    assert registry.counter("executor_tasks_total", task="Job", outcome="ok").value == 1
+    assert registry.gauge("executor_active_tasks").value == 0
@@ -0,0 +1,185 @@
+import os
+import pytest
+from PySide6.QtGui import QColor
+from conftest import wait_until
+from client.core.thumbnail_loader import ThumbnailLoader, render_thumbnail
+from client.data.repositories.thumbnail_store import ThumbnailStore
+from client.mock.image_server import ImageFixtureServer, make_png
+from client.models.types import CartItem
+from client.telemetry.metrics import MetricsRegistry
+from client.ui.components.cart_mfe.list_view import VirtualCartView
+from client.ui.components.cart_mfe.view import CartView
+
+BG = "#40414F"
+
+
+@pytest.fixture
+def image_server():
+    server = ImageFixtureServer().start()
+    yield server
+    server.stop()
+
+
+@pytest.fixture
+def loader(qapp, tmp_path):
+    loader = ThumbnailLoader(ThumbnailStore(str(tmp_path / "thumbs")), registry=MetricsRegistry())
+    yield loader
+    loader.executor.shutdown()
+
+
+def load(qapp, loader, url, size=46, dpr=1.0):
+    """Requests a thumbnail and pumps events until it arrives; returns (pixmap, was_immediate)"""
+    arrived = []
+    pixmap = loader.request(url, size, BG, dpr, lambda url, pixmap: arrived.append(pixmap))
+    if pixmap is not None:
+        return pixmap, True
+    wait_until(qapp, lambda: arrived, timeout=5)
+    return (arrived[0] if arrived else None), False
+
+
+def test_thumbnail_is_downscaled_into_a_round_badge(qapp):
+    """Test: A large image becomes a badge of the requested size, clipped to a circle"""
+    image = render_thumbnail(make_png(800, 400, (0, 0, 255)), 46, BG, dpr=2.0)
+    assert (image.width(), image.height(), image.devicePixelRatio()) == (92, 92, 2.0)
+    assert QColor(image.pixel(46, 46)) == QColor(0, 0, 255)
+    assert QColor.fromRgba(image.pixel(0, 0)).alpha() == 0  # Outside the circle
+
+    with pytest.raises(ValueError):
+        render_thumbnail(b"not an image", 46, BG)
+
+
+def test_images_load_off_the_gui_thread_then_come_from_memory(qapp, image_server, loader, stall_watchdog):
+    """Test: The first request downloads asynchronously; the next ones are answered at once"""
+    image_server.delay = 0.3  # A GUI-thread download would trip the watchdog
+    url = image_server.add("/milk.png", make_png(300, 300))
+
+    pixmap, immediate = load(qapp, loader, url)
+    assert not immediate and pixmap.width() == 46
+    again, immediate = load(qapp, loader, url)
+    assert immediate and again is pixmap
+    assert image_server.hits["/milk.png"] == 1
+    assert loader.registry.counter("thumbnail_requests_total", source="network").value == 1
+    assert loader.registry.counter("thumbnail_requests_total", source="memory").value == 1
+
+
+def test_concurrent_requests_share_one_download(qapp, image_server, loader):
+    """Test: Several cards asking for the same image while it loads cause one request"""
+    image_server.delay = 0.1
+    url = image_server.add("/bread.png", make_png(64, 64))
+    arrived = []
+    for _ in range(3):
+        loader.request(url, 46, BG, 1.0, lambda url, pixmap: arrived.append(pixmap))
+    assert wait_until(qapp, lambda: len(arrived) == 3, timeout=5)
+    assert image_server.hits["/bread.png"] == 1
+
+
+def test_disk_cache_is_content_addressed_and_survives_restarts(qapp, image_server, tmp_path):
+    """Test: A new loader reads from disk without the network; equal images are stored once"""
+    png = make_png(120, 120, (10, 200, 10))
+    first_url = image_server.add("/a.png", png)
+    second_url = image_server.add("/b.png", png)
+    store = ThumbnailStore(str(tmp_path / "thumbs"))
+    first = ThumbnailLoader(store, registry=MetricsRegistry())
+    assert load(qapp, first, first_url)[0] is not None
+    assert load(qapp, first, second_url)[0] is not None
+    first.executor.shutdown()
+    assert len(store) == 1 and store.bytes_used == len(png)
+
+    restarted = ThumbnailLoader(ThumbnailStore(str(tmp_path / "thumbs")), registry=MetricsRegistry())
+    try:
+        pixmap, immediate = load(qapp, restarted, first_url)
+        assert pixmap is not None and not immediate
+        assert image_server.hits["/a.png"] == 1
+        assert restarted.registry.counter("thumbnail_requests_total", source="disk").value == 1
+    finally:
+        restarted.executor.shutdown()
+
+
+def test_disk_cache_evicts_least_recently_read(tmp_path):
+    """Test: Past max_bytes the image read longest ago is removed; its URL becomes a miss"""
+    store = ThumbnailStore(str(tmp_path / "thumbs"), max_bytes=250)
+    store.put("http://x/1", b"1" * 100)
+    store.put("http://x/2", b"2" * 100)
+    assert store.get("http://x/1") == b"1" * 100  # 2 is now the oldest
+    store.put("http://x/3", b"3" * 100)
+
+    assert store.get("http://x/2") is None
+    assert store.get("http://x/1") and store.get("http://x/3")
+    assert len(os.listdir(tmp_path / "thumbs" / "blobs")) == 2
+    assert len(os.listdir(tmp_path / "thumbs" / "refs")) == 2  # The evicted blob's ref went with it
+    assert ThumbnailStore(str(tmp_path / "thumbs"), max_bytes=250).bytes_used == 200
+
+
+def test_disk_cache_prunes_leftovers_on_load(tmp_path):
+    """Test: Temporary files and refs whose blob is gone (crash between writes) are deleted on load"""
+    store = ThumbnailStore(str(tmp_path / "thumbs"))
+    store.put("http://x/1", b"1" * 100)
+    digest = store.put("http://x/2", b"2" * 100)
+    os.remove(tmp_path / "thumbs" / "blobs" / digest)
+    for directory in ("blobs", "refs"):
+        (tmp_path / "thumbs" / directory / "abc.123.tmp").write_bytes(b"torn")
+
+    reopened = ThumbnailStore(str(tmp_path / "thumbs"))
+
+    assert reopened.get("http://x/1") == b"1" * 100 and reopened.get("http://x/2") is None
+    assert len(os.listdir(tmp_path / "thumbs" / "blobs")) == 1
+    assert len(os.listdir(tmp_path / "thumbs" / "refs")) == 1
+
+
+def test_undecodable_disk_image_is_discarded(qapp, image_server, loader):
+    """Test: A stored image that no longer decodes is removed from disk, so the next run downloads it again"""
+    url = image_server.add("/milk.png", make_png(60, 60))
+    loader.store.put(url, b"not an image")
+    loader.store.put("http://x/alias", b"not an image")
+
+    assert loader.request(url, 46, BG, 1.0, lambda url, pixmap: None) is None
+    assert wait_until(qapp, lambda: loader.registry.counter("thumbnail_requests_total", source="failed").value == 1,
+                      timeout=5)
+    assert loader.store.get(url) is None and loader.store.get("http://x/alias") is None
+    assert len(loader.store) == 0 and not os.listdir(os.path.join(loader.store.path, "refs"))
+
+    loader.clear_failures()
+    assert load(qapp, loader, url)[0] is not None
+    assert image_server.hits["/milk.png"] == 1
+
+
+def test_missing_images_keep_the_placeholder(qapp, image_server, loader):
+    """Test: A 404 is reported once, never retried, and no callback fires"""
+    url = image_server.url + "/missing.png"
+    arrived = []
+    assert loader.request(url, 46, BG, 1.0, lambda url, pixmap: arrived.append(pixmap)) is None
+    assert wait_until(qapp, lambda: loader.registry.counter("thumbnail_requests_total", source="failed").value == 1,
+                      timeout=5)
+    assert loader.request(url, 46, BG, 1.0, lambda url, pixmap: arrived.append(pixmap)) is None
+    qapp.processEvents()
+    assert not arrived and image_server.hits["/missing.png"] == 1
+
+
+def test_cards_fill_their_placeholder_when_the_image_arrives(qapp, image_server, loader):
+    """Test: A card starts with the placeholder and shows the thumbnail once it is loaded"""
+    url = image_server.add("/eggs.png", make_png(200, 200, (255, 0, 0)))
+    view = CartView(thumbnails=loader)
+    view.render_cart("Store", "Addr", [CartItem("1", "Eggs", 1, 9.9, url), CartItem("2", "Salt", 1, 2.0)], 11.9)
+    eggs, salt = view._cards["1"], view._cards["2"]
+    placeholder = salt.icon_label.pixmap().cacheKey()
+    assert eggs.icon_label.pixmap().cacheKey() == placeholder
+
+    assert wait_until(qapp, lambda: eggs.icon_label.pixmap().cacheKey() != placeholder, timeout=5)
+    assert QColor(eggs.icon_label.pixmap().toImage().pixel(23, 23)) == QColor(255, 0, 0)
+    assert salt.icon_label.pixmap().cacheKey() == placeholder
+
+
+def test_painted_rows_repaint_when_the_image_arrives(qapp, image_server, loader):
+    """Test: The virtual list asks for visible rows' images and shows them once loaded"""
+    url = image_server.add("/tea.png", make_png(200, 200, (0, 255, 0)))
+    view = VirtualCartView(thumbnails=loader)
+    view.resize(400, 600)
+    view.render_cart("Store", "Addr", [CartItem("1", "Tea", 1, 5.0, url)], 5.0)
+    view.show()
+    assert wait_until(qapp, lambda: image_server.hits.get("/tea.png"), timeout=5)
+    assert wait_until(qapp, lambda: loader.memory.bytes_used > 0, timeout=5)
+    qapp.processEvents()
+
+    frame = view.list_view.viewport().grab().toImage()
+    assert QColor(frame.pixel(12 + 14 + 23, 5 + 45)) == QColor(0, 255, 0)
+    view.close()
@@ -0,0 +1,151 @@
+import asyncio
+import json
+import threading
+import pytest
+from conftest import wait_until
+from PySide6.QtWidgets import QLabel
+from client.core import task_executor
+from client.core.cart_mutation_coalescer import CartMutationCoalescer
+from client.core.repaint_tracker import RepaintTracker
+from client.data.api import http_transport
+from client.data.api.http_transport import BackendTransport
+from client.models.types import StoreResult
+from client.telemetry.tracing import Tracer
+
+BASE_URL_DB = "http://test-db:8000"
+
+@pytest.fixture
+def tracer():
+    return Tracer()
+
+def test_spans_link_across_threads(tracer):
+    """Test: Work handed to a worker thread stays in the trace of the user action"""
+    root = tracer.start_trace("user.optimize")
+    opened = []
+
+    def worker():
+        with tracer.activate(root):
+            with tracer.span("optimize_pipeline") as step:
+                with tracer.span("http.POST /cart/{id}/optimize") as call:
+                    opened.extend([step, call])
+
+    thread = threading.Thread(target=worker, name="worker-1")
+    thread.start()
+    thread.join()
+    root.end()
+
+    spans = {span.name: span for span in tracer.finished_spans(root.trace_id)}
+    assert set(spans) == {"user.optimize", "optimize_pipeline", "http.POST /cart/{id}/optimize"}
+    assert opened == [spans["optimize_pipeline"], spans["http.POST /cart/{id}/optimize"]]  # Recorded as yielded
+    assert spans["optimize_pipeline"].parent_id == root.span_id
+    assert spans["http.POST /cart/{id}/optimize"].parent_id == spans["optimize_pipeline"].span_id
+    assert spans["optimize_pipeline"].thread_name == "worker-1"
+    assert root.duration_ms >= spans["optimize_pipeline"].duration_ms
+
+def test_concurrent_tasks_keep_their_own_trace(tracer):
+    """Test: Coroutines interleaved on one loop each nest their spans under their own trace"""
+    roots = [tracer.start_trace(f"user.action{i}") for i in range(2)]
+
+    async def action(root):
+        with tracer.activate(root):
+            with tracer.span("step"):
+                await asyncio.sleep(0.01)  # The other task runs here
+                with tracer.span("http.call"):
+                    await asyncio.sleep(0)
+
+    async def both():
+        await asyncio.gather(*(action(root) for root in roots))
+
+    asyncio.run(both())
+    for root in roots:
+        root.end()
+        spans = {span.name: span for span in tracer.finished_spans(root.trace_id)}
+        assert spans["step"].parent_id == root.span_id
+        assert spans["http.call"].parent_id == spans["step"].span_id
+    assert tracer.current() is None
+
+def test_spans_outside_a_trace_are_not_recorded(tracer):
+    """Test: Background calls that aren't part of a user action cost nothing"""
+    with tracer.span("fetch_cart") as span:
+        assert span is None
+    assert tracer.finished_spans() == []
+
+def test_request_id_headers_are_propagated(requests_mock):
+    """Test: Calls inside a trace carry its id (X-Request-ID) and a W3C traceparent"""
+    tracer = http_transport.TRACER  # The tracer the transport records into
+    requests_mock.get(f"{BASE_URL_DB}/cart/42", json={"cart": {}})
+    transport = BackendTransport(BASE_URL_DB)
+
+    root = tracer.start_trace("user.send_prompt")
+    with tracer.activate(root):
+        transport.request("GET", "/cart/42", timeout=5)
+    transport.request("GET", "/cart/42", timeout=5)
+
+    traced, untraced = requests_mock.request_history
+    assert traced.headers["X-Request-ID"] == root.trace_id
+    version, trace_id, span_id, flags = traced.headers["traceparent"].split("-")
+    assert trace_id == root.trace_id
+    http_span = [s for s in tracer.finished_spans(root.trace_id) if s.span_id == span_id][0]
+    assert http_span.name == "http.GET /cart/{id}" and http_span.attributes["status"] == 200
+    assert untraced.headers["X-Request-ID"] and "traceparent" not in untraced.headers
+
+def test_chrome_trace_export(tracer, tmp_path):
+    """Test: Export is valid Trace Event Format with parent links in args"""
+    root = tracer.start_trace("user.change_quantity", item="milk")
+    with tracer.activate(root):
+        with tracer.span("patch"):
+            pass
+    root.end()
+
+    path = tmp_path / "trace.json"
+    tracer.export_chrome_trace(str(path))
+    events = json.loads(path.read_text())["traceEvents"]
+
+    complete = {event["name"]: event for event in events if event["ph"] == "X"}
+    assert complete["patch"]["args"]["parent_id"] == root.span_id
+    assert complete["user.change_quantity"]["args"]["item"] == "milk"
+    assert complete["patch"]["dur"] >= 0
+    assert any(event["ph"] == "M" and event["name"] == "thread_name" for event in events)
+
+def test_trace_ends_after_repaint(qapp, tracer):
+    """Test: The root span ends once the widget has painted, not when the data was set"""
+    label = QLabel("cart")
+    label.show()
+    wait_until(qapp, lambda: False, timeout=0.05)
+    repaint = RepaintTracker(label)
+
+    root = tracer.start_trace("user.optimize")
+    label.setText("new cart")
+    repaint.end_on_next_paint([root])
+    assert root.end_ns is None
+
+    assert wait_until(qapp, lambda: root.end_ns is not None)
+    assert root.attributes["repaint"] == "painted"
+    label.close()
+
+def test_coalesced_clicks_finish_together(qapp):
+    """Test: The batch runs under the newest click's trace; every click's trace is handed back on sync"""
+    tracer = task_executor.TRACER  # The tracer pool threads activate spans on
+    seen_parents = []
+
+    class FakeRepo:
+        current_cart_id = "cart-1"
+        def update_cart_items(self, quantities, cart_id=None):
+            seen_parents.append(tracer.current())
+            return StoreResult("Mega", "", 0.0, [])
+        def has_pending_mutations(self, cart_id=None):
+            return False
+        def pending_mutation_carts(self):
+            return []
+
+    coalescer = CartMutationCoalescer(FakeRepo(), window_ms=10)
+    finished = []
+    coalescer.traces_synced.connect(finished.extend)
+
+    clicks = [tracer.start_trace("user.change_quantity") for _ in range(3)]
+    for qty, click in enumerate(clicks):
+        coalescer.queue("milk", qty, click)
+
+    assert wait_until(qapp, lambda: finished)
+    assert finished == clicks
+    assert seen_parents == [clicks[-1]]
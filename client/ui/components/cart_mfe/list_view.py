@@ -0,0 +1,327 @@
+from PySide6.QtWidgets import (
+    QWidget, QVBoxLayout, QListView, QStyledItemDelegate, QStyle, QToolTip, QAbstractItemView
+)
+from PySide6.QtCore import Qt, Signal, QAbstractListModel, QModelIndex, QRect, QSize
+from PySide6.QtGui import QColor, QFont, QFontMetrics, QPainter, QPen
+from shiboken6 import isValid
+from core.thumbnail_loader import default_thumbnail_loader
+from ui.styles.theme import CURRENT_THEME
+from ui.styles.render_cache import draw_shadow, glyph_pixmap
+from .view import CartView
+
+
+# =============================================================================
+# Geometry - mirrors CartItemCard's layout so both renderers look the same
+# =============================================================================
+
+CARD_HEIGHT = 90
+ROW_GAP = 10      # Space between cards (the card list's layout spacing)
+LIST_MARGIN = 12  # Space around cards (the card list's layout margins)
+PADDING = 14      # Inside a card
+ICON_SIZE = 46
+BUTTON_SIZE = 28
+PILL_WIDTH, PILL_HEIGHT = 4 + 3 * BUTTON_SIZE + 4, 36
+
+TOOLTIPS = {"minus": "Decrease quantity", "plus": "Increase quantity"}
+
+
+def card_rect(row: QRect) -> QRect:
+    return row.adjusted(LIST_MARGIN, ROW_GAP // 2, -LIST_MARGIN, -ROW_GAP // 2)
+
+
+def pill_rects(card: QRect) -> dict:
+    """Rects of the quantity pill and its parts ("pill", "minus", "quantity", "plus") in a card"""
+    pill = QRect(card.right() - PADDING - PILL_WIDTH + 1, card.top() + (card.height() - PILL_HEIGHT) // 2,
+                 PILL_WIDTH, PILL_HEIGHT)
+    top = pill.top() + (PILL_HEIGHT - BUTTON_SIZE) // 2
+    minus = QRect(pill.left() + 4, top, BUTTON_SIZE, BUTTON_SIZE)
+    quantity = minus.translated(BUTTON_SIZE, 0)
+    return {"pill": pill, "minus": minus, "quantity": quantity, "plus": quantity.translated(BUTTON_SIZE, 0)}
+
+
+def hit_test(row: QRect, pos) -> str:
+    """"minus" / "plus" when *pos* is on that button of the row's card, otherwise None"""
+    rects = pill_rects(card_rect(row))
+    for part in ("minus", "plus"):
+        if rects[part].contains(pos):
+            return part
+    return None
+
+
+def _font(base: QFont, pixels: int, weight) -> QFont:
+    font = QFont(base)
+    font.setPixelSize(pixels)
+    font.setWeight(weight)
+    return font
+
+
+# =============================================================================
+# CartListModel - the cart's items as rows
+# =============================================================================
+
+class CartListModel(QAbstractListModel):
+    """
+    Rows of CartItems. Items are mutated in place by CartModel, so the values last reported to
+    the view are kept alongside; set_items compares against them and only changed rows repaint.
+    """
+
+    ItemRole = Qt.UserRole + 1
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._items = []
+        self._shown = []  # (id, name, price, quantity, image_url) per row, as last reported to the view
+
+    def rowCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self._items)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        if role == self.ItemRole:
+            return self._items[index.row()]
+        if role == Qt.DisplayRole:
+            return self._items[index.row()].name
+        return None
+
+    def item_at(self, row: int):
+        return self._items[row]
+
+    def update_row(self, row: int, item) -> bool:
+        """Shows a newer version of the item in *row*; False if that row holds another item"""
+        if not 0 <= row < len(self._items) or self._items[row].id != item.id:
+            return False
+        self._items[row] = item
+        shown = (item.id, item.name, item.price, item.quantity, item.image_url)
+        if shown != self._shown[row]:
+            self._shown[row] = shown
+            index = self.index(row)
+            self.dataChanged.emit(index, index)
+        return True
+
+    def set_items(self, items: list) -> int:
+        """Shows *items*; returns how many rows were repainted"""
+        shown = [(item.id, item.name, item.price, item.quantity, item.image_url) for item in items]
+        if [row[0] for row in shown] != [row[0] for row in self._shown]:
+            # Items added, removed or reordered
+            self.beginResetModel()
+            self._items, self._shown = list(items), shown
+            self.endResetModel()
+            return len(items)
+
+        changed = [row for row, (old, new) in enumerate(zip(self._shown, shown)) if old != new]
+        self._items, self._shown = list(items), shown
+        for row in changed:
+            index = self.index(row)
+            self.dataChanged.emit(index, index)
+        return len(changed)
+
+
+# =============================================================================
+# CartItemDelegate - paints one card per row
+# =============================================================================
+
+class CartItemDelegate(QStyledItemDelegate):
+    """Paints a row exactly like CartItemCard: [Icon] [Name + Price] [−  2  +]"""
+
+    def __init__(self, thumbnails=None, parent=None):
+        super().__init__(parent)
+        self.thumbnails = thumbnails  # ThumbnailLoader (None: the shared one)
+        self.hover = None    # (row, part) of the button under the mouse
+        self.pressed = None  # (row, part) of the button being pressed
+
+    def sizeHint(self, option, index) -> QSize:
+        return QSize(option.rect.width(), CARD_HEIGHT + ROW_GAP)
+
+    def paint(self, painter: QPainter, option, index):
+        T = CURRENT_THEME
+        item = index.model().item_at(index.row())
+        row = index.row()
+        card = card_rect(option.rect)
+        hovered = bool(option.state & QStyle.State_MouseOver)
+
+        painter.save()
+        painter.setRenderHint(QPainter.Antialiasing)
+
+        # Card (shadow from the shared cache, like the card widgets)
+        draw_shadow(painter, card)
+        painter.setPen(QPen(QColor(255, 255, 255, 38 if hovered else 13), 1))
+        painter.setBrush(QColor(255, 255, 255, 20 if hovered else 10))
+        painter.drawRoundedRect(card.adjusted(0, 0, -1, -1), 12, 12)
+
+        # Product thumbnail, or the placeholder until it arrives
+        icon = QRect(card.left() + PADDING, card.top() + (card.height() - ICON_SIZE) // 2, ICON_SIZE, ICON_SIZE)
+        dpr = painter.device().devicePixelRatioF()
+        pixmap = None
+        if item.image_url:
+            loader = self.thumbnails if self.thumbnails is not None else default_thumbnail_loader()
+            pixmap = loader.request(item.image_url, ICON_SIZE, T.BG_INPUT, dpr, self._on_thumbnail)
+        painter.drawPixmap(icon, pixmap or glyph_pixmap("🛒", ICON_SIZE, T.BG_INPUT, 22, dpr))
+
+        # Name + price
+        rects = pill_rects(card)
+        info = QRect(icon.right() + 1 + PADDING, card.top() + PADDING, 0, card.height() - 2 * PADDING)
+        info.setRight(rects["pill"].left() - PADDING)
+        price_font = _font(option.font, 13, QFont.Bold)
+        price_space = QFontMetrics(price_font).height() + 4  # A long name wraps but never hides the price
+        painter.setFont(_font(option.font, 14, QFont.DemiBold))
+        painter.setPen(QColor(T.TEXT_PRIMARY))
+        name_rect = painter.boundingRect(info, Qt.TextWordWrap | Qt.AlignLeft | Qt.AlignTop, item.name)
+        name_rect = name_rect.intersected(info.adjusted(0, 0, 0, -price_space))
+        painter.drawText(name_rect, Qt.TextWordWrap | Qt.AlignLeft | Qt.AlignTop, item.name)
+        painter.setFont(price_font)
+        painter.setPen(QColor(T.ACCENT_COLOR))
+        painter.drawText(info.adjusted(0, name_rect.height() + 4, 0, 0), Qt.AlignLeft | Qt.AlignTop,
+                         f"₪{item.price:.2f}")
+
+        # Pill-shaped quantity controls
+        painter.setPen(QPen(QColor(T.BORDER_SUBTLE), 1))
+        painter.setBrush(QColor(T.BG_INPUT))
+        painter.drawRoundedRect(rects["pill"].adjusted(0, 0, -1, -1), PILL_HEIGHT / 2, PILL_HEIGHT / 2)
+        painter.setFont(_font(option.font, 15, QFont.Bold))
+        for part, text in (("minus", "−"), ("plus", "+")):
+            if self.pressed == (row, part):
+                color = T.ACCENT_PRESSED
+            elif self.hover == (row, part):
+                color = T.ACCENT_COLOR
+            else:
+                color = T.BG_QUANTITY_BTN
+            painter.setPen(Qt.NoPen)
+            painter.setBrush(QColor(color))
+            painter.drawEllipse(rects[part])
+            painter.setPen(QColor("#FFFFFF"))
+            painter.drawText(rects[part], Qt.AlignCenter, text)
+        painter.setFont(_font(option.font, 14, QFont.Bold))
+        painter.setPen(QColor(T.TEXT_PRIMARY))
+        painter.drawText(rects["quantity"], Qt.AlignCenter, str(item.quantity))
+
+        painter.restore()
+
+    def _on_thumbnail(self, url: str, pixmap):
+        # Only visible rows asked for one; repainting them picks it up from the loader's memory
+        view = self.parent()
+        if view is not None and isValid(view):
+            view.viewport().update()
+
+    def helpEvent(self, event, view, option, index) -> bool:
+        part = hit_test(option.rect, event.pos())
+        if part is None:
+            QToolTip.hideText()
+            return False
+        QToolTip.showText(event.globalPos(), TOOLTIPS[part], view)
+        return True
+
+
+# =============================================================================
+# CartListView - only the visible rows are painted
+# =============================================================================
+
+class CartListView(QListView):
+    """List of painted cart cards; clicks on a card's pill buttons are hit-tested by geometry"""
+
+    item_incremented = Signal(str)
+    item_decremented = Signal(str)
+
+    def __init__(self, thumbnails=None, parent=None):
+        super().__init__(parent)
+        self.cart_model = CartListModel(self)
+        self.delegate = CartItemDelegate(thumbnails, self)
+        self.setModel(self.cart_model)
+        self.setItemDelegate(self.delegate)
+
+        self.setUniformItemSizes(True)  # Row positions are computed, not measured per row
+        self.setVerticalScrollMode(QAbstractItemView.ScrollPerPixel)
+        self.setHorizontalScrollBarPolicy(Qt.ScrollBarAlwaysOff)
+        self.setSelectionMode(QAbstractItemView.NoSelection)
+        self.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.setFocusPolicy(Qt.NoFocus)
+        self.setMouseTracking(True)
+        self.viewport().setAttribute(Qt.WA_Hover)
+        self.viewport().setCursor(Qt.PointingHandCursor)
+        self.setStyleSheet(f"background-color: {CURRENT_THEME.BG_SIDEBAR}; border: none;")
+
+    def _part_at(self, pos):
+        index = self.indexAt(pos)
+        if not index.isValid():
+            return None
+        part = hit_test(self.visualRect(index), pos)
+        return (index.row(), part) if part else None
+
+    def _set_state(self, attr: str, value):
+        old = getattr(self.delegate, attr)
+        if old == value:
+            return
+        setattr(self.delegate, attr, value)
+        for state in (old, value):
+            if state is not None:
+                self.update(self.cart_model.index(state[0]))
+
+    def mouseMoveEvent(self, event):
+        self._set_state("hover", self._part_at(event.position().toPoint()))
+        super().mouseMoveEvent(event)
+
+    def mousePressEvent(self, event):
+        target = self._part_at(event.position().toPoint())
+        if event.button() == Qt.LeftButton and target:
+            self._set_state("pressed", target)
+            event.accept()
+            return
+        super().mousePressEvent(event)
+
+    def mouseReleaseEvent(self, event):
+        pressed = self.delegate.pressed
+        if pressed is None:
+            super().mouseReleaseEvent(event)
+            return
+        self._set_state("pressed", None)
+        event.accept()
+        # Like a button: the click counts only if released over the button it started on
+        if self._part_at(event.position().toPoint()) == pressed:
+            item_id = self.cart_model.item_at(pressed[0]).id
+            if pressed[1] == "plus":
+                self.item_incremented.emit(item_id)
+            else:
+                self.item_decremented.emit(item_id)
+
+    def leaveEvent(self, event):
+        self._set_state("hover", None)
+        super().leaveEvent(event)
+
+
+# =============================================================================
+# VirtualCartView - CartView with the painted list instead of one widget per item
+# =============================================================================
+
+class VirtualCartView(CartView):
+    """
+    Same panel and presenter contract as CartView, but items are rows of a CartListModel
+    painted by CartItemDelegate: memory and layout cost no longer grow with the cart, and
+    only the visible rows are painted. Meant for large (family / business) orders.
+    """
+
+    def _build_items_area(self, T) -> QWidget:
+        area = QWidget()
+        area.setStyleSheet(f"background-color: {T.BG_SIDEBAR};")
+        layout = QVBoxLayout(area)
+        layout.setContentsMargins(0, LIST_MARGIN - ROW_GAP // 2, 0, LIST_MARGIN - ROW_GAP // 2)
+        layout.setSpacing(0)
+
+        self._empty_widget = self._make_empty_state(T)
+        self.list_view = CartListView(self.thumbnails)
+        self.list_view.item_incremented.connect(self.item_incremented.emit)
+        self.list_view.item_decremented.connect(self.item_decremented.emit)
+        self.list_view.hide()
+
+        layout.addWidget(self._empty_widget)
+        layout.addWidget(self.list_view, 1)
+        layout.addStretch()  # Keeps the empty state at the top while the list is hidden
+        return area
+
+    def update_item(self, index: int, item) -> bool:
+        return self.list_view.cart_model.update_row(index, item)
+
+    def _render_items(self, items: list):
+        changed = self.list_view.cart_model.set_items(items)
+        self._empty_widget.setVisible(not items)
+        self.list_view.setVisible(bool(items))
+        self.render_stats = {"rows": len(items), "repainted": changed}
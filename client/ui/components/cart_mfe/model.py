@@ -1,36 +1,137 @@
-from typing import List, Optional
-from models.types import CartItem, StoreResult
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+from models.types import CartItem, StoreResult, CartDelta, to_agorot
+
+# Item fields the view shows; an "update" change lists which of them changed
+ITEM_FIELDS = ("name", "quantity", "price", "image_url")
+
+
+@dataclass(slots=True)
+class CartChange:
+    kind: str                     # "reset" | "insert" | "remove" | "update" | "summary"
+    index: int = -1               # Row affected (remove: the row the item had)
+    item_id: Optional[str] = None
+    fields: Tuple[str, ...] = ()  # update: changed ITEM_FIELDS; summary: changed store_name/store_address/total_price
+
 
 class CartModel:
+    """
+    Cart state for the view. Items are indexed by id (updates and lookups are O(1)), the total
+    is kept in integer agorot, and every operation reports what it changed as CartChanges so
+    the view can repaint only the affected rows. Ids are unique within a cart; if the server
+    ever repeats one, the first occurrence is the one addressed by id.
+    """
+
     def __init__(self):
         # Initial State
         self.store_name: str = ""
         self.store_address: str = ""
-        self.total_price: float = 0.0
+        self.total_agorot: int = 0
         self.items: List[CartItem] = []
+        self._index = {}  # item id -> row in self.items
+        self._listeners = []
+
+    @property
+    def total_price(self) -> float:
+        return self.total_agorot / 100
+
+    def add_listener(self, callback):
+        """callback([CartChange]) is called after every operation that changed something"""
+        self._listeners.append(callback)
 
     def set_data(self, store_result: StoreResult):
         """Update all data at once (e.g. when AI returns a result)"""
-        self.store_name = store_result.store_name
-        self.store_address = store_result.address
-        self.total_price = store_result.total_price
-        self.items = store_result.items
+        changes = self._set_summary(store_result.store_name, store_result.address,
+                                    to_agorot(store_result.total_price))
+        items = store_result.items
+        if [item.id for item in items] == [item.id for item in self.items]:
+            # Same rows: report only the fields that differ
+            for row, (old, new) in enumerate(zip(self.items, items)):
+                fields = tuple(name for name in ITEM_FIELDS if getattr(old, name) != getattr(new, name))
+                if fields:
+                    changes.append(CartChange("update", row, new.id, fields))
+            self.items = items
+        else:
+            self.items = items
+            self._reindex()
+            changes.append(CartChange("reset"))
+        self._notify(changes)
+
+    def apply_delta(self, delta: CartDelta):
+        """Applies a pushed change: upserts items by id, drops removed ids, updates store info"""
+        changes = []
+        new_items = []
+        for item in delta.upserts:
+            row = self._index.get(item.id)
+            if row is None:
+                new_items.append(item)
+                continue
+            old = self.items[row]
+            fields = tuple(name for name in ITEM_FIELDS if getattr(old, name) != getattr(item, name))
+            self.items[row] = item
+            if fields:
+                changes.append(CartChange("update", row, item.id, fields))
+
+        # Highest row first, so each reported row is valid after the previous removals
+        removed_rows = sorted((self._index[item_id] for item_id in set(delta.removed) if item_id in self._index),
+                              reverse=True)
+        for row in removed_rows:
+            changes.append(CartChange("remove", row, self.items[row].id))
+            del self.items[row]
+        if removed_rows:
+            self._reindex()
+
+        for item in new_items:
+            self._index.setdefault(item.id, len(self.items))
+            changes.append(CartChange("insert", len(self.items), item.id))
+            self.items.append(item)
+
+        if delta.total_price is not None:
+            total = to_agorot(delta.total_price)
+        else:
+            total = sum(to_agorot(item.price) * item.quantity for item in self.items)
+        store_name = delta.store_name if delta.store_name is not None else self.store_name
+        address = delta.address if delta.address is not None else self.store_address
+        changes.extend(self._set_summary(store_name, address, total))
+        self._notify(changes)
 
     def update_quantity(self, item_id: str, delta: int):
         """Business logic: change quantity and update total price"""
-        for item in self.items:
-            if item.id == item_id:
-                # Update quantity (prevent going below 0)
-                if item.quantity + delta >= 0:
-                    item.quantity += delta
-                    # Update total price accordingly
-                    self.total_price += (item.price * delta)
-                    return True
-        return False
-    
+        row = self._index.get(item_id)
+        if row is None:
+            return False
+        item = self.items[row]
+        # Update quantity (prevent going below 0)
+        if item.quantity + delta < 0:
+            return False
+        item.quantity += delta
+        # Update total price accordingly (exact: integer agorot)
+        self.total_agorot += to_agorot(item.price) * delta
+        self._notify([CartChange("update", row, item_id, ("quantity",)),
+                      CartChange("summary", fields=("total_price",))])
+        return True
+
     def get_item_quantity(self, item_id: str) -> Optional[int]:
         """Helper function to get current quantity of an item (for syncing with server)"""
-        for item in self.items:
-            if item.id == item_id:
-                return item.quantity
-        return None
\ No newline at end of file
+        row = self._index.get(item_id)
+        return self.items[row].quantity if row is not None else None
+
+    # --- Internals ---
+    def _reindex(self):
+        self._index = {}
+        for row, item in enumerate(self.items):
+            self._index.setdefault(item.id, row)
+
+    def _set_summary(self, store_name: str, address: str, total_agorot: int) -> list:
+        fields = tuple(name for name, old, new in (("store_name", self.store_name, store_name),
+                                                   ("store_address", self.store_address, address),
+                                                   ("total_price", self.total_agorot, total_agorot))
+                       if old != new)
+        self.store_name, self.store_address, self.total_agorot = store_name, address, total_agorot
+        return [CartChange("summary", fields=fields)] if fields else []
+
+    def _notify(self, changes: list):
+        if not changes:
+            return
+        for callback in list(self._listeners):
+            callback(changes)
@@ -1,7 +1,8 @@
 from PySide6.QtCore import QObject, Signal
 from .view import CartView
 from .model import CartModel
-from models.types import StoreResult
+from models.types import StoreResult, CartDelta
+from telemetry.metrics import timed_step
 
 class CartPresenter(QObject):
     
@@ -9,12 +10,14 @@ class CartPresenter(QObject):
     cart_item_changed = Signal(str, int)
     optimize_requested = Signal()
         
-    def __init__(self, repo):
+    def __init__(self, repo, view: CartView = None):
         super().__init__()
         self.repo = repo
-        # 1. Create Model and View
+        # 1. Create Model and View (any renderer with CartView's contract, e.g. VirtualCartView)
         self.model = CartModel()
-        self.view = CartView()
+        self.view = view or CartView()
+        self._changes = []  # CartChanges since the view was last refreshed
+        self.model.add_listener(lambda changes: self._changes.extend(changes))
         
         # 2. Listen to events from View (clicks on +/-)
         self.view.item_incremented.connect(self.on_increment)
@@ -27,11 +30,22 @@ class CartPresenter(QObject):
         """Expose the View to the outside world (for the main Layout)"""
         return self.view
 
+    @timed_step("render_cart")
     def update_data(self, result: StoreResult):
         """Function called from outside (by AppController)"""
         self.model.set_data(result)
         self._refresh_view()
     
+    @timed_step("render_cart_delta")
+    def apply_delta(self, delta: CartDelta):
+        """Called when the push channel delivers a change (no refetch of the whole cart)"""
+        self.model.apply_delta(delta)
+        self._refresh_view()
+
+    def set_backend_available(self, available: bool):
+        """Called by AppController when the DB backend goes down / comes back"""
+        self.view.set_backend_available(available)
+
     def handle_quantity_change(self, item_id, delta):
         success = self.model.update_quantity(item_id, delta)
         
@@ -48,6 +62,19 @@ class CartPresenter(QObject):
         self.handle_quantity_change(item_id, -1)
 
     def _refresh_view(self):
+        """Pushes what changed in the model to the View: single items when possible, else the whole cart"""
+        changes, self._changes = self._changes, []
+        if not changes:
+            return
+        if all(change.kind in ("update", "summary") for change in changes):
+            patched = all(self.view.update_item(change.index, self.model.items[change.index])
+                          for change in changes if change.kind == "update")
+            if patched:
+                self.view.render_summary(self.model.store_name, self.model.store_address, self.model.total_price)
+                return
+        self._render_all()
+
+    def _render_all(self):
         """Takes data from model and pushes it to View"""
         
         # # ==========================================
@@ -1,11 +1,14 @@
 from PySide6.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QLabel, QPushButton,
-    QScrollArea, QFrame, QSizePolicy, QGraphicsDropShadowEffect
+    QScrollArea, QFrame, QSizePolicy
 )
 from PySide6.QtCore import Qt, Signal
-from PySide6.QtGui import QColor
+from PySide6.QtGui import QColor, QPainter
+from shiboken6 import isValid
 from models.types import CartItem
+from core.thumbnail_loader import default_thumbnail_loader
 from ui.styles.theme import CURRENT_THEME
+from ui.styles.render_cache import draw_shadow, glyph_pixmap
 
 
 # =============================================================================
@@ -16,13 +19,16 @@ class CartItemCard(QFrame):
     """
     Single product card: [Icon] [Name + Price] [−  2  +]
     Quantity controls are wrapped in a connected pill container.
+    The card is built once per item id; later renders patch its labels (see set_item).
+    The icon is a placeholder until the product's thumbnail arrives from *thumbnails*.
     """
 
-    def __init__(self, item: CartItem, on_plus, on_minus, parent=None):
+    def __init__(self, item: CartItem, on_plus, on_minus, thumbnails=None, parent=None):
         super().__init__(parent)
         self.item = item
         self.on_plus = on_plus
         self.on_minus = on_minus
+        self.thumbnails = thumbnails
         self._build()
 
     def _build(self):
@@ -44,33 +50,23 @@ class CartItemCard(QFrame):
             }
         """)
 
-        # Subtle elevation shadow
-        shadow = QGraphicsDropShadowEffect(self)
-        shadow.setBlurRadius(16)
-        shadow.setOffset(0, 2)
-        shadow.setColor(QColor(0, 0, 0, 60))
-        self.setGraphicsEffect(shadow)
+        # The elevation shadow is painted behind the card by CardList (cached, no graphics effect)
 
         row = QHBoxLayout(self)
         row.setContentsMargins(14, 14, 14, 14)
         row.setSpacing(14)
 
-        # --- Product icon placeholder ---
-        icon = QLabel("🛒")
+        # --- Product icon: pre-rendered placeholder badge until the thumbnail arrives ---
+        icon = self.icon_label = QLabel()
         icon.setFixedSize(46, 46)
-        icon.setAlignment(Qt.AlignCenter)
-        icon.setStyleSheet(f"""
-            background-color: {T.BG_INPUT};
-            border-radius: 23px;
-            font-size: 22px;
-        """)
+        self._load_thumbnail()
 
         # --- Info column (Name + Price) ---
         info = QVBoxLayout()
         info.setSpacing(4)
         info.setContentsMargins(0, 0, 0, 0)
 
-        name = QLabel(self.item.name)
+        name = self.name_label = QLabel(self.item.name)
         name.setWordWrap(True)
         name.setStyleSheet(f"""
             color: {T.TEXT_PRIMARY};
@@ -79,7 +75,7 @@ class CartItemCard(QFrame):
             background: transparent;
         """)
 
-        price = QLabel(f"₪{self.item.price:.2f}")
+        price = self.price_label = QLabel(f"₪{self.item.price:.2f}")
         price.setStyleSheet(f"""
             color: {T.ACCENT_COLOR};
             font-size: 13px;
@@ -132,9 +128,10 @@ class CartItemCard(QFrame):
         """)
         btn_minus.clicked.connect(lambda: self.on_minus(self.item.id))
 
-        qty_label = QLabel(str(self.item.quantity))
+        qty_label = self.qty_label = QLabel(str(self.item.quantity))
         qty_label.setAlignment(Qt.AlignCenter)
-        qty_label.setFixedWidth(28)
+        # Fixed size: a new quantity repaints the label without relaying out the whole list
+        qty_label.setFixedSize(28, 28)
         qty_label.setStyleSheet(f"""
             color: {T.TEXT_PRIMARY};
             font-size: 14px;
@@ -183,6 +180,55 @@ class CartItemCard(QFrame):
         row.addLayout(info, 1)
         row.addLayout(qty_wrapper)
 
+    def set_item(self, item: CartItem) -> int:
+        """Shows a newer version of the same item; only labels whose text changed are touched"""
+        self.item = item
+        patched = 0
+        for label, text in ((self.name_label, item.name),
+                            (self.price_label, f"₪{item.price:.2f}"),
+                            (self.qty_label, str(item.quantity))):
+            if label.text() != text:
+                label.setText(text)
+                patched += 1
+        if item.image_url != self._image_url:
+            self._load_thumbnail()
+            patched += 1
+        return patched
+
+    def _load_thumbnail(self):
+        T = CURRENT_THEME
+        self._image_url = self.item.image_url
+        pixmap = None
+        if self._image_url:
+            loader = self.thumbnails if self.thumbnails is not None else default_thumbnail_loader()
+            pixmap = loader.request(self._image_url, 46, T.BG_INPUT, self.devicePixelRatioF(), self._on_thumbnail)
+        self.icon_label.setPixmap(pixmap or glyph_pixmap("🛒", 46, T.BG_INPUT, 22, self.devicePixelRatioF()))
+
+    def _on_thumbnail(self, url: str, pixmap):
+        # The card may have been removed, or shown another item, while the image loaded
+        if isValid(self.icon_label) and url == self._image_url:
+            self.icon_label.setPixmap(pixmap)
+
+
+# =============================================================================
+# CardList - Container that paints the cards' shadows
+# =============================================================================
+
+class CardList(QWidget):
+    """
+    Background of the card list. Paints every card's drop shadow from the shared 9-slice
+    pixmap before the cards draw themselves, instead of a blur effect per card.
+    """
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        painter.fillRect(event.rect(), QColor(CURRENT_THEME.BG_SIDEBAR))
+        exposed = event.rect().adjusted(-32, -32, 32, 32)  # A card just outside still casts into view
+        for card in self.findChildren(CartItemCard, options=Qt.FindDirectChildrenOnly):
+            if card.isVisible() and card.geometry().intersects(exposed):
+                draw_shadow(painter, card.geometry())
+        painter.end()
+
 
 # =============================================================================
 # CartView - Full cart panel
@@ -198,8 +244,12 @@ class CartView(QWidget):
     item_decremented = Signal(str)
     optimize_clicked = Signal()
 
-    def __init__(self):
+    def __init__(self, thumbnails=None):
         super().__init__()
+        self.thumbnails = thumbnails  # ThumbnailLoader for product images (None: the shared one)
+        self._cards = {}  # Render key (item id) -> CartItemCard currently in the list
+        # What the last render_cart did: cards inserted/removed/moved and labels patched
+        self.render_stats = {"inserted": 0, "removed": 0, "moved": 0, "patched": 0}
         self._build()
 
     def _build(self):
@@ -249,27 +299,6 @@ class CartView(QWidget):
         hl.addWidget(self.store_name_label)
         hl.addWidget(self.store_address_label)
 
-        # === ITEMS SCROLL AREA ===
-        self.scroll_area = QScrollArea()
-        self.scroll_area.setWidgetResizable(True)
-        self.scroll_area.setHorizontalScrollBarPolicy(Qt.ScrollBarAlwaysOff)
-        self.scroll_area.setVerticalScrollBarPolicy(Qt.ScrollBarAsNeeded)
-        self.scroll_area.setStyleSheet("background: transparent; border: none;")
-
-        self.items_container = QWidget()
-        self.items_container.setStyleSheet(f"background-color: {T.BG_SIDEBAR};")
-
-        self.items_layout = QVBoxLayout(self.items_container)
-        self.items_layout.setContentsMargins(12, 12, 12, 12)
-        self.items_layout.setSpacing(10)
-        self.items_layout.addStretch()  # Sentinel
-
-        # Initial empty state
-        self._empty_widget = self._make_empty_state(T)
-        self.items_layout.insertWidget(0, self._empty_widget)
-
-        self.scroll_area.setWidget(self.items_container)
-
         # === FOOTER ===
         footer = QWidget()
         footer.setStyleSheet(f"""
@@ -300,7 +329,7 @@ class CartView(QWidget):
         total_row.addWidget(self.total_price_label)
 
         # Optimize button
-        self.optimize_btn = QPushButton("🔍  Find Cheapest Store")
+        self.optimize_btn = QPushButton(self.OPTIMIZE_TEXT)
         self.optimize_btn.setCursor(Qt.PointingHandCursor)
         self.optimize_btn.setMinimumHeight(48)
         self.optimize_btn.setStyleSheet(f"""
@@ -327,9 +356,31 @@ class CartView(QWidget):
 
         # === ASSEMBLE ===
         root.addWidget(header)
-        root.addWidget(self.scroll_area, 1)
+        root.addWidget(self._build_items_area(T), 1)
         root.addWidget(footer)
 
+    def _build_items_area(self, T) -> QWidget:
+        """The scrolling list of items between header and footer (renderers override this)"""
+        self.scroll_area = QScrollArea()
+        self.scroll_area.setWidgetResizable(True)
+        self.scroll_area.setHorizontalScrollBarPolicy(Qt.ScrollBarAlwaysOff)
+        self.scroll_area.setVerticalScrollBarPolicy(Qt.ScrollBarAsNeeded)
+        self.scroll_area.setStyleSheet("background: transparent; border: none;")
+
+        self.items_container = CardList()
+
+        self.items_layout = QVBoxLayout(self.items_container)
+        self.items_layout.setContentsMargins(12, 12, 12, 12)
+        self.items_layout.setSpacing(10)
+        self.items_layout.addStretch()  # Sentinel
+
+        # Empty state: always at index 0, hidden while the cart has items (cards follow it)
+        self._empty_widget = self._make_empty_state(T)
+        self.items_layout.insertWidget(0, self._empty_widget)
+
+        self.scroll_area.setWidget(self.items_container)
+        return self.scroll_area
+
     # --- Empty state ---
     @staticmethod
     def _make_empty_state(T) -> QWidget:
@@ -368,12 +419,25 @@ class CartView(QWidget):
 
     # --- Public API (presenter contract) ---
 
+    OPTIMIZE_TEXT = "🔍  Find Cheapest Store"
+    OPTIMIZE_UNAVAILABLE_TEXT = "⚠️  Store server unavailable"
+
+    def set_backend_available(self, available: bool):
+        """Disable server-side actions while the DB backend is unreachable"""
+        self.optimize_btn.setEnabled(available)
+        self.optimize_btn.setText(self.OPTIMIZE_TEXT if available else self.OPTIMIZE_UNAVAILABLE_TEXT)
+
     def render_cart(self, store_name: str, address: str, items: list, total_price: float):
         """
         Render the full cart. Preserves original interface signature.
+        Cards are reconciled by item id: only new items get a card, removed ones are deleted,
+        reordered ones are moved, and existing cards just patch the labels that changed.
         """
-        T = CURRENT_THEME
+        self.render_summary(store_name, address, total_price)
+        self._render_items(items)
 
+    def render_summary(self, store_name: str, address: str, total_price: float):
+        """Header and total only"""
         # Update header
         self.store_name_label.setText(store_name if store_name else "No store selected")
         self.store_address_label.setText(address or "")
@@ -381,20 +445,54 @@ class CartView(QWidget):
         # Update total
         self.total_price_label.setText(f"₪{total_price:.2f}")
 
-        # Clear existing items (keep stretch at end)
-        while self.items_layout.count() > 1:
-            child = self.items_layout.takeAt(0)
-            if child.widget():
-                child.widget().deleteLater()
-
-        if not items:
-            self._empty_widget = self._make_empty_state(T)
-            self.items_layout.insertWidget(0, self._empty_widget)
-        else:
-            for i, item in enumerate(items):
+    def update_item(self, index: int, item: CartItem) -> bool:
+        """Patches the card of one changed item; False if it has none (render the cart instead)"""
+        card = self._cards.get(item.id)
+        if card is None:
+            return False
+        card.set_item(item)
+        return True
+
+    def _render_items(self, items: list):
+        stats = {"inserted": 0, "removed": 0, "moved": 0, "patched": 0}
+        keys = self._render_keys(items)
+
+        wanted = set(keys)
+        for key in [key for key in self._cards if key not in wanted]:
+            card = self._cards.pop(key)
+            self.items_layout.removeWidget(card)
+            card.deleteLater()
+            stats["removed"] += 1
+
+        for index, (key, item) in enumerate(zip(keys, items), start=1):  # 0 is the empty state
+            card = self._cards.get(key)
+            if card is None:
                 card = CartItemCard(
                     item,
                     on_plus=self.item_incremented.emit,
-                    on_minus=self.item_decremented.emit
+                    on_minus=self.item_decremented.emit,
+                    thumbnails=self.thumbnails
                 )
-                self.items_layout.insertWidget(i, card)
\ No newline at end of file
+                self._cards[key] = card
+                self.items_layout.insertWidget(index, card)
+                stats["inserted"] += 1
+                continue
+            stats["patched"] += card.set_item(item)
+            if self.items_layout.itemAt(index).widget() is not card:
+                self.items_layout.removeWidget(card)
+                self.items_layout.insertWidget(index, card)
+                stats["moved"] += 1
+
+        self._empty_widget.setVisible(not items)
+        self.render_stats = stats
+
+    @staticmethod
+    def _render_keys(items: list) -> list:
+        """Item ids, made unique: a repeated id gets its occurrence number so it keeps its own card"""
+        seen = {}
+        keys = []
+        for item in items:
+            count = seen.get(item.id, 0)
+            seen[item.id] = count + 1
+            keys.append(item.id if count == 0 else (item.id, count))
+        return keys
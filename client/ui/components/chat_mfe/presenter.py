@@ -6,6 +6,8 @@ from .model import ChatModel
 class ChatPresenter(QObject):
     # Signal emitted from this entire MFE to the AppController
     user_input_submitted = Signal(str)
+    # The user wants the messages still waiting for the agent dropped
+    cancel_queued_requested = Signal()
 
     def __init__(self):
         super().__init__()
@@ -15,6 +17,7 @@ class ChatPresenter(QObject):
 
         # 2. Listen to the View
         self.view.send_clicked.connect(self.handle_send_click)
+        self.view.cancel_queued_clicked.connect(self.cancel_queued_requested.emit)
 
     def get_widget(self):
         """Function that returns the graphical widget so we can place it in the main window"""
@@ -30,6 +33,24 @@ class ChatPresenter(QObject):
         # Pass the info to AppController (which will talk to the AI)
         self.user_input_submitted.emit(text)
 
+    def display_agent_chunk(self, chunk):
+        """Called for each streamed piece of the agent reply; the view grows one bubble"""
+        self.view.append_stream_chunk(chunk)
+
+    def complete_agent_stream(self, text):
+        """Final text of an agent reply: finalizes the streamed bubble, or adds one if nothing streamed"""
+        self.model.add_message("Agent", text)
+        if not self.view.finish_stream(text):
+            self.view.append_message("Agent", text)
+
+    def set_backlog(self, queued: int, full: bool):
+        """Backpressure from the prompt queue, shown next to the input"""
+        self.view.chat_input.set_backlog(queued, full)
+
+    def set_connecting(self, connecting: bool):
+        """Startup state: the input explains that prompts wait for the session"""
+        self.view.chat_input.set_connecting(connecting)
+
     def display_agent_response(self, text):
         """Function that the AppController will call from outside"""
         self.model.add_message("Agent", text)
@@ -8,11 +8,20 @@ from PySide6.QtWidgets import (
 from PySide6.QtCore import Signal, Qt, QTimer
 from PySide6.QtGui import QColor
 from ui.styles.theme import CURRENT_THEME
+from ui.styles.render_cache import glyph_pixmap
 
 # Regex that matches one or more Hebrew characters (U+0590 – U+05FF)
 _HEB_RE = re.compile(r'[\u0590-\u05FF]')
 
 
+def avatar_label(glyph: str, background: str) -> QLabel:
+    """36 px round avatar painted from the shared render cache (no per-label stylesheet)"""
+    lbl = QLabel()
+    lbl.setFixedSize(36, 36)
+    lbl.setPixmap(glyph_pixmap(glyph, 36, background, 16, lbl.devicePixelRatioF()))
+    return lbl
+
+
 # =============================================================================
 # ChatBubble - Strict left/right alignment
 # =============================================================================
@@ -56,16 +65,7 @@ class ChatBubble(QWidget):
         is_agent = self.sender_type == "agent"
         icon = "🤖" if is_agent else "👤"
         bg   = T.BG_AVATAR_AGENT if is_agent else T.BG_AVATAR_USER
-
-        lbl = QLabel(icon)
-        lbl.setFixedSize(36, 36)
-        lbl.setAlignment(Qt.AlignCenter)
-        lbl.setStyleSheet(f"""
-            background-color: {bg};
-            border-radius: 18px;
-            font-size: 16px;
-        """)
-        return lbl
+        return avatar_label(icon, bg)
 
     # ----- Hebrew / RTL detection -----
     @staticmethod
@@ -96,16 +96,11 @@ class ChatBubble(QWidget):
         layout.setContentsMargins(18, 14, 18, 14)
         layout.setSpacing(0)
 
-        # Detect RTL for Hebrew text
-        rtl = self._is_hebrew(self.message)
-        alignment = Qt.AlignRight if rtl else Qt.AlignLeft
-        direction = Qt.RightToLeft if rtl else Qt.LeftToRight
-
         text = QLabel(self.message)
         text.setWordWrap(True)
         text.setTextFormat(Qt.PlainText)
-        text.setAlignment(alignment | Qt.AlignVCenter)
-        text.setLayoutDirection(direction)
+        self._text_label = text
+        self._apply_direction()
         text.setStyleSheet(f"""
             background: transparent;
             color: {color};
@@ -117,6 +112,22 @@ class ChatBubble(QWidget):
         layout.addWidget(text)
         return frame
 
+    def _apply_direction(self):
+        # Detect RTL for Hebrew text
+        rtl = self._is_hebrew(self.message)
+        alignment = Qt.AlignRight if rtl else Qt.AlignLeft
+        direction = Qt.RightToLeft if rtl else Qt.LeftToRight
+        self._text_label.setAlignment(alignment | Qt.AlignVCenter)
+        self._text_label.setLayoutDirection(direction)
+
+    def set_text(self, message: str):
+        """Replace the bubble text in place (used while a reply is streaming in)"""
+        if message == self.message:
+            return
+        self.message = message
+        self._text_label.setText(message)
+        self._apply_direction()
+
 
 # =============================================================================
 # ThinkingBubble - Animated typewriter "Thinking..."
@@ -145,14 +156,7 @@ class ThinkingBubble(QWidget):
         row.setSpacing(12)
 
         # Agent avatar
-        avatar = QLabel("🤖")
-        avatar.setFixedSize(36, 36)
-        avatar.setAlignment(Qt.AlignCenter)
-        avatar.setStyleSheet(f"""
-            background-color: {T.BG_AVATAR_AGENT};
-            border-radius: 18px;
-            font-size: 16px;
-        """)
+        avatar = avatar_label("🤖", T.BG_AVATAR_AGENT)
 
         # Bubble
         frame = QFrame()
@@ -205,9 +209,14 @@ class ChatInputWidget(QWidget):
     """Pill-shaped input area with embedded round send button and drop-shadow."""
 
     send_requested = Signal(str)
+    cancel_queued_requested = Signal()
+
+    PLACEHOLDER = "Message the AI assistant..."
+    CONNECTING_PLACEHOLDER = "Connecting... messages are sent once the assistant is ready"
 
     def __init__(self, parent=None):
         super().__init__(parent)
+        self._queue_full = False
         self._build()
 
     def _build(self):
@@ -240,7 +249,7 @@ class ChatInputWidget(QWidget):
         # Text field
         self.input_field = QLineEdit()
         self.input_field.setObjectName("chat_input")
-        self.input_field.setPlaceholderText("Message the AI assistant...")
+        self.input_field.setPlaceholderText(self.PLACEHOLDER)
         self.input_field.setStyleSheet("""
             QLineEdit { 
                 background-color: #40414F; 
@@ -277,10 +286,34 @@ class ChatInputWidget(QWidget):
         """)
         self.send_btn.clicked.connect(self._on_send)
 
+        # Backpressure: how many messages wait for the agent, with a way to drop them
+        self.queue_label = QLabel()
+        self.queue_label.setObjectName("queue_label")
+        self.queue_label.setStyleSheet(f"color: {T.TEXT_SECONDARY}; font-size: 12px; background: transparent;")
+        self.cancel_queue_btn = QPushButton("✕")
+        self.cancel_queue_btn.setObjectName("cancel_queue_btn")
+        self.cancel_queue_btn.setFixedSize(24, 24)
+        self.cancel_queue_btn.setCursor(Qt.PointingHandCursor)
+        self.cancel_queue_btn.setToolTip("Cancel queued messages")
+        self.cancel_queue_btn.setStyleSheet(f"""
+            QPushButton {{
+                background: transparent; border: none;
+                color: {T.TEXT_SECONDARY}; font-size: 13px;
+            }}
+            QPushButton:hover {{ color: {T.TEXT_PRIMARY}; }}
+        """)
+        self.cancel_queue_btn.clicked.connect(self.cancel_queued_requested.emit)
+        self.queue_label.hide()
+        self.cancel_queue_btn.hide()
+
         layout.addWidget(self.input_field, 1)
+        layout.addWidget(self.queue_label, 0)
+        layout.addWidget(self.cancel_queue_btn, 0)
         layout.addWidget(self.send_btn, 0)
 
     def _on_send(self):
+        if self._queue_full:
+            return  # Keep the text; it can be sent once the queue drains
         text = self.input_field.text().strip()
         if text:
             self.send_requested.emit(text)
@@ -292,6 +325,18 @@ class ChatInputWidget(QWidget):
     def clear(self):
         self.input_field.clear()
 
+    def set_backlog(self, queued: int, full: bool):
+        """Shows how many messages wait for the agent; sending pauses while the queue is full"""
+        self._queue_full = full
+        self.queue_label.setText(f"{queued} queued" + (" (full)" if full else ""))
+        self.queue_label.setVisible(queued > 0)
+        self.cancel_queue_btn.setVisible(queued > 0)
+        self.send_btn.setEnabled(not full)
+
+    def set_connecting(self, connecting: bool):
+        # Typing stays enabled: prompts sent while connecting are queued by the controller
+        self.input_field.setPlaceholderText(self.CONNECTING_PLACEHOLDER if connecting else self.PLACEHOLDER)
+
 
 # =============================================================================
 # ChatView - Main container
@@ -304,14 +349,23 @@ class ChatView(QWidget):
     """
 
     send_clicked = Signal(str)
+    cancel_queued_clicked = Signal()
 
     USER_KEYWORDS = ["me", "you", "user"]
     THINKING_TRIGGERS = ["thinking...", "thinking"]
 
+    # Streaming text is repainted at most once per frame (~60 fps)
+    STREAM_REPAINT_MS = 16
+
     def __init__(self):
         super().__init__()
         self._thinking_bubble: ThinkingBubble | None = None
         self._welcome_visible = True
+        self._stream_bubble: ChatBubble | None = None
+        self._stream_text = ""
+        self._stream_timer = QTimer(self)
+        self._stream_timer.setSingleShot(True)
+        self._stream_timer.timeout.connect(self._repaint_stream)
         self._build()
 
     def _build(self):
@@ -354,6 +408,7 @@ class ChatView(QWidget):
 
         self.chat_input = ChatInputWidget()
         self.chat_input.send_requested.connect(self._on_send_requested)
+        self.chat_input.cancel_queued_requested.connect(self.cancel_queued_clicked.emit)
 
         disclaimer = QLabel("AI may make mistakes. Verify important information.")
         disclaimer.setAlignment(Qt.AlignCenter)
@@ -436,8 +491,10 @@ class ChatView(QWidget):
         sender_type = "user" if self._is_user_sender(sender) else "agent"
 
         # Remove thinking animation when agent sends a real message
+        # (and close a streamed reply that was never finalized, so it is not overwritten)
         if sender_type == "agent":
             self.remove_thinking()
+            self.finish_stream()
 
         # Intercept "Thinking..." → show animated bubble instead
         if sender_type == "agent" and self._is_thinking_text(text):
@@ -452,6 +509,43 @@ class ChatView(QWidget):
         self.messages_layout.insertWidget(count - 1, bubble)
         self._scroll_to_bottom()
 
+    def append_stream_chunk(self, chunk: str):
+        """
+        Append a piece of a streaming agent reply to one growing bubble.
+        Chunks are buffered; the bubble is repainted at most once per frame.
+        """
+        if self._stream_bubble is None:
+            self.remove_thinking()
+            self._hide_welcome()
+            self._stream_text = ""
+            self._stream_bubble = ChatBubble("agent", "")
+            count = self.messages_layout.count()
+            self.messages_layout.insertWidget(count - 1, self._stream_bubble)
+
+        self._stream_text += chunk
+        if not self._stream_timer.isActive():
+            self._stream_timer.start(self.STREAM_REPAINT_MS)
+
+    def _repaint_stream(self):
+        if self._stream_bubble is not None:
+            self._stream_bubble.set_text(self._stream_text)
+            self._scroll_to_bottom()
+
+    def finish_stream(self, final_text: str = None) -> bool:
+        """
+        Close the streaming bubble, optionally replacing its text with the final reply.
+        Returns False if no reply was streaming.
+        """
+        if self._stream_bubble is None:
+            return False
+        self._stream_timer.stop()
+        if final_text is not None:
+            self._stream_text = final_text
+        self._repaint_stream()
+        self._stream_bubble = None
+        self._stream_text = ""
+        return True
+
     def show_thinking(self):
         """Display the animated thinking bubble."""
         if self._thinking_bubble is not None:
@@ -474,6 +568,9 @@ class ChatView(QWidget):
     def clear_messages(self):
         """Clear all messages (keeps the trailing stretch)."""
         self.remove_thinking()
+        self._stream_timer.stop()
+        self._stream_bubble = None
+        self._stream_text = ""
         while self.messages_layout.count() > 1:
             item = self.messages_layout.takeAt(0)
             if item.widget():
@@ -0,0 +1,169 @@
+"""
+Shared cache of pre-rendered decorations: blurred 9-slice shadows and round glyph badges
+(avatars, product icons). Rendering them once per (size, theme, DPI) replaces per-widget
+QGraphicsDropShadowEffects and stylesheet-drawn labels, which re-render on every repaint.
+"""
+from collections import OrderedDict
+
+from PySide6.QtCore import Qt, QRect, QRectF, QPointF
+from PySide6.QtGui import QColor, QFont, QImage, QPainter, QPixmap
+from PySide6.QtWidgets import QGraphicsBlurEffect, QGraphicsPixmapItem, QGraphicsScene
+from ui.styles.theme import CURRENT_THEME
+from telemetry.metrics import REGISTRY
+
+# Defaults matching the cart cards' former QGraphicsDropShadowEffect
+CARD_SHADOW = {"radius": 12, "blur": 16, "offset": (0, 2), "color": QColor(0, 0, 0, 60)}
+
+
+class PixmapCache:
+    """
+    LRU of QPixmaps bounded by their pixel memory. Keys are tuples that must include everything
+    the picture depends on (size, colors, theme, device pixel ratio); render() makes a miss.
+    Only used from the GUI thread.
+    """
+
+    def __init__(self, max_bytes: int = 16 * 1024 * 1024, registry=REGISTRY):
+        self.max_bytes = max_bytes
+        self.registry = registry
+        self._pixmaps = OrderedDict()  # key -> QPixmap, least recently used first
+        self._bytes = 0
+
+    def __len__(self):
+        return len(self._pixmaps)
+
+    @property
+    def bytes_used(self) -> int:
+        return self._bytes
+
+    def get(self, key, render) -> QPixmap:
+        pixmap = self.find(key)
+        if pixmap is not None:
+            self.registry.inc("render_cache_requests_total", result="hit")
+            return pixmap
+
+        self.registry.inc("render_cache_requests_total", result="miss")
+        return self.put(key, render())
+
+    def find(self, key) -> QPixmap:
+        """The cached pixmap or None, for pictures that arrive later instead of being rendered on a miss"""
+        pixmap = self._pixmaps.get(key)
+        if pixmap is not None:
+            self._pixmaps.move_to_end(key)
+        return pixmap
+
+    def put(self, key, pixmap: QPixmap) -> QPixmap:
+        old = self._pixmaps.pop(key, None)
+        if old is not None:
+            self._bytes -= self._cost(old)
+        self._pixmaps[key] = pixmap
+        self._bytes += self._cost(pixmap)
+        while self._bytes > self.max_bytes and len(self._pixmaps) > 1:
+            _, evicted = self._pixmaps.popitem(last=False)
+            self._bytes -= self._cost(evicted)
+        return pixmap
+
+    def clear(self):
+        self._pixmaps.clear()
+        self._bytes = 0
+
+    @staticmethod
+    def _cost(pixmap: QPixmap) -> int:
+        return pixmap.width() * pixmap.height() * 4
+
+
+RENDER_CACHE = PixmapCache()
+
+
+def _theme_key() -> str:
+    return CURRENT_THEME.__name__
+
+
+def _blurred(image: QImage, blur: float) -> QImage:
+    # QGraphicsBlurEffect applied once, offscreen; the result is cached by the callers
+    scene = QGraphicsScene()
+    item = QGraphicsPixmapItem(QPixmap.fromImage(image))
+    effect = QGraphicsBlurEffect()
+    effect.setBlurRadius(blur)
+    effect.setBlurHints(QGraphicsBlurEffect.QualityHint)
+    item.setGraphicsEffect(effect)
+    scene.addItem(item)
+    result = QImage(image.size(), QImage.Format_ARGB32_Premultiplied)
+    result.fill(Qt.transparent)
+    painter = QPainter(result)
+    scene.render(painter, QRectF(result.rect()), QRectF(0, 0, image.width(), image.height()))
+    painter.end()
+    return result
+
+
+def shadow_pixmap(radius: int, blur: int, color: QColor, dpr: float = 1.0, cache: PixmapCache = None) -> QPixmap:
+    """
+    Smallest blurred rounded rect that can be stretched to any size (9-slice): a margin of
+    blur pixels for the spread, then a rect large enough that its center is unaffected by the
+    blur; the middle row and column (1 pixel) are the stretchable part.
+    """
+    cache = cache if cache is not None else RENDER_CACHE
+    key = ("shadow", radius, blur, color.rgba(), _theme_key(), dpr)
+
+    def render():
+        inner = 2 * (radius + blur) + 1
+        size = int((inner + 2 * blur) * dpr)
+        image = QImage(size, size, QImage.Format_ARGB32_Premultiplied)
+        image.fill(Qt.transparent)
+        painter = QPainter(image)
+        painter.setRenderHint(QPainter.Antialiasing)
+        painter.scale(dpr, dpr)
+        painter.setPen(Qt.NoPen)
+        painter.setBrush(color)
+        painter.drawRoundedRect(QRectF(blur, blur, inner, inner), radius, radius)
+        painter.end()
+        pixmap = QPixmap.fromImage(_blurred(image, blur * dpr))
+        pixmap.setDevicePixelRatio(dpr)
+        return pixmap
+
+    return cache.get(key, render)
+
+
+def draw_shadow(painter: QPainter, rect: QRect, radius: int = CARD_SHADOW["radius"], blur: int = CARD_SHADOW["blur"],
+                offset=CARD_SHADOW["offset"], color: QColor = CARD_SHADOW["color"], cache: PixmapCache = None):
+    """Paints the drop shadow of a rounded rect (rect = the element itself, not the shadow)"""
+    dpr = painter.device().devicePixelRatioF()
+    pixmap = shadow_pixmap(radius, blur, color, dpr, cache)
+    edge = radius + 2 * blur  # Corner slice size, see shadow_pixmap
+    target = QRectF(rect).adjusted(-blur, -blur, blur, blur).translated(*offset)
+    # Slice boundaries in logical pixels (the pixmap carries the DPI); the middle slice is 1 px
+    sx = (0, edge, edge + 1, 2 * edge + 1)
+    tx = (target.left(), target.left() + edge, target.right() - edge, target.right())
+    ty = (target.top(), target.top() + edge, target.bottom() - edge, target.bottom())
+    for row in range(3):
+        for col in range(3):
+            dest = QRectF(QPointF(tx[col], ty[row]), QPointF(tx[col + 1], ty[row + 1]))
+            if dest.width() <= 0 or dest.height() <= 0:
+                continue
+            source = QRectF(QPointF(sx[col] * dpr, sx[row] * dpr), QPointF(sx[col + 1] * dpr, sx[row + 1] * dpr))
+            painter.drawPixmap(dest, pixmap, source)
+
+
+def glyph_pixmap(glyph: str, size: int, background: str, font_px: int, dpr: float = 1.0,
+                 cache: PixmapCache = None) -> QPixmap:
+    """A round badge of *size* with *glyph* (an emoji) centered on it, e.g. avatars and product icons"""
+    cache = cache if cache is not None else RENDER_CACHE
+    key = ("glyph", glyph, size, background, font_px, _theme_key(), dpr)
+
+    def render():
+        pixmap = QPixmap(int(size * dpr), int(size * dpr))
+        pixmap.setDevicePixelRatio(dpr)
+        pixmap.fill(Qt.transparent)
+        painter = QPainter(pixmap)
+        painter.setRenderHint(QPainter.Antialiasing)
+        painter.setPen(Qt.NoPen)
+        painter.setBrush(QColor(background))
+        painter.drawEllipse(QRectF(0, 0, size, size))
+        font = QFont()
+        font.setPixelSize(font_px)
+        painter.setFont(font)
+        painter.setPen(QColor(CURRENT_THEME.TEXT_PRIMARY))
+        painter.drawText(QRectF(0, 0, size, size), Qt.AlignCenter, glyph)
+        painter.end()
+        return pixmap
+
+    return cache.get(key, render)